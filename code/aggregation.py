@@ -0,0 +1,194 @@
+import argparse
+import numpy as np
+import pandas as pd
+
+# Profile columns of the RD sheets, the chronological profiles are given with the same column names
+profile_columns = ['gammaRS_rth_north', 'gammaRS_rth_south', 'gammaRW_rth_north', 'gammaRW_rth_south', 'gammaD_dth_west', 'gammaD_dth_east']
+# Clustering methods of the days
+rd_methods = ['kmedoids', 'kmeans', 'hierarchical']
+# Number of hours of a day and of days the RD weights are scaled to
+day_hours = 24
+year_days = 365
+
+# Return the chronological profiles of a CSV file as a (days, hours, profiles) array, one row per hour in chronological order
+def read_profiles(path):
+    profiles = pd.read_csv(path)
+    missing = sorted(set(profile_columns) - set(profiles.columns))
+    if missing:
+        raise ValueError("Chronological profiles {} miss the column(s) {}".format(path, missing))
+    if len(profiles) % day_hours:
+        raise ValueError("Chronological profiles {} have {} rows, expected whole days of {} hours".format(path, len(profiles), day_hours))
+    return profiles[profile_columns].to_numpy(dtype=np.float64).reshape(-1, day_hours, len(profile_columns))
+
+# Return the k-means++ seeds of the rows of x
+def kmeans_seeds(x, nb_clusters, rng):
+    seeds = [rng.integers(len(x))]
+    dist = ((x - x[seeds[0]]) ** 2).sum(axis=1)
+    for _ in range(1, nb_clusters):
+        seeds.append(rng.choice(len(x), p=dist / dist.sum()) if dist.sum() > 0 else rng.integers(len(x)))
+        dist = np.minimum(dist, ((x - x[seeds[-1]]) ** 2).sum(axis=1))
+    return np.array(seeds)
+
+# Return the medoid rows of x by PAM (partitioning around medoids) on their squared Euclidean distances
+# BUILD adds the rows that lower the total distance of the rows to their nearest medoid the most, one at a time,
+# SWAP then replaces a medoid by a non-medoid row while the best such exchange lowers the total distance
+def pam_medoids(x, nb_clusters, max_iter=100):
+    norms = (x ** 2).sum(axis=1)
+    dist = np.maximum(norms[:, None] + norms[None, :] - 2 * x @ x.T, 0.0)
+    medoids = [int(dist.sum(axis=1).argmin())]
+    nearest = dist[medoids[0]]
+    for _ in range(1, nb_clusters):
+        gain = np.maximum(nearest[None, :] - dist, 0.0).sum(axis=1)
+        gain[medoids] = -1.0
+        medoids.append(int(gain.argmax()))
+        nearest = np.minimum(nearest, dist[medoids[-1]])
+    medoids = np.array(medoids)
+    cost = nearest.sum()
+    for _ in range(max_iter):
+        best = (cost, None, None)
+        for i in range(nb_clusters):
+            # Distance of every row to its nearest medoid other than medoid i, then total distance with each candidate in its place
+            rest = dist[np.delete(medoids, i)].min(axis=0) if nb_clusters > 1 else np.full(len(x), np.inf)
+            swap_cost = np.minimum(rest[None, :], dist).sum(axis=1)
+            swap_cost[medoids] = np.inf
+            candidate = int(swap_cost.argmin())
+            if swap_cost[candidate] < best[0] - 1e-12 * max(cost, 1.0):
+                best = (swap_cost[candidate], i, candidate)
+        if best[1] is None:
+            break
+        cost, medoids[best[1]] = best[0], best[2]
+    return medoids
+
+# Return the cluster of each row of x and the representative of each cluster (centroids for k-means, medoid rows otherwise)
+# k-means keeps the best of nb_init seedings, PAM and the Ward hierarchical clustering are deterministic
+def cluster_days(x, nb_clusters, method, nb_init=10, max_iter=100, seed=0):
+    if method not in rd_methods:
+        raise ValueError("Unknown clustering method {}, expected one of {}".format(method, rd_methods))
+    if not 0 < nb_clusters <= len(x):
+        raise ValueError("Cannot cluster {} days into {} RDs".format(len(x), nb_clusters))
+    if method == 'hierarchical':
+        labels = ward_labels(x, nb_clusters)
+        return labels, np.array([medoid(x, np.flatnonzero(labels == c)) for c in range(nb_clusters)])
+    if method == 'kmedoids':
+        medoids = pam_medoids(x, nb_clusters, max_iter)
+        centers = x[medoids]
+        labels = ((x[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+    else:
+        rng = np.random.default_rng(seed)
+        best = None
+        for _ in range(nb_init):
+            centers = x[kmeans_seeds(x, nb_clusters, rng)]
+            for _ in range(max_iter):
+                labels = ((x[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+                # A cluster left empty keeps its previous center
+                new_centers = np.array([x[labels == c].mean(axis=0) if (labels == c).any() else centers[c] for c in range(nb_clusters)])
+                if np.allclose(new_centers, centers):
+                    break
+                centers = new_centers
+            labels = ((x[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+            cost = ((x - centers[labels]) ** 2).sum()
+            if best is None or cost < best[0]:
+                best = (cost, labels, centers)
+        _, labels, centers = best
+    # Clusters are numbered by their first day so that the RDs come out in chronological order
+    order = np.argsort([np.flatnonzero(labels == c)[0] if (labels == c).any() else len(x) for c in range(nb_clusters)])
+    labels = np.argsort(order)[labels]
+    return labels, medoids[order] if method == 'kmedoids' else centers[order]
+
+# Return the medoid of the given rows of x, for squared distances it is the row closest to their mean
+def medoid(x, rows):
+    return rows[((x[rows] - x[rows].mean(axis=0)) ** 2).sum(axis=1).argmin()]
+
+# Return the clusters of the rows of x by agglomerative clustering with Ward's linkage, numbered by their first row
+def ward_labels(x, nb_clusters):
+    sizes = np.ones(len(x))
+    centers = x.copy()
+    active = np.ones(len(x), dtype=bool)
+    labels = np.arange(len(x))
+    for _ in range(len(x) - nb_clusters):
+        rows = np.flatnonzero(active)
+        # Increase of the within-cluster sum of squares when merging each pair of active clusters
+        norms = (centers[rows] ** 2).sum(axis=1)
+        diff = norms[:, None] + norms[None, :] - 2 * centers[rows] @ centers[rows].T
+        cost = diff * sizes[rows, None] * sizes[None, rows] / (sizes[rows, None] + sizes[None, rows])
+        np.fill_diagonal(cost, np.inf)
+        a, b = np.unravel_index(cost.argmin(), cost.shape)
+        a, b = sorted((rows[a], rows[b]))
+        centers[a] = (centers[a] * sizes[a] + centers[b] * sizes[b]) / (sizes[a] + sizes[b])
+        sizes[a] += sizes[b]
+        active[b] = False
+        labels[labels == b] = a
+    return np.unique(labels, return_inverse=True)[1]
+
+# Return the RTP of each hour of a day, nb_rtps chronological segments obtained by merging adjacent hours
+# Each merge joins the two neighbouring segments whose union increases the sum of squared deviations the least
+def segment_hours(day, nb_rtps):
+    segments = [[hour] for hour in range(len(day))]
+    while len(segments) > nb_rtps:
+        costs = []
+        for i in range(len(segments) - 1):
+            a, b = day[segments[i]], day[segments[i + 1]]
+            costs.append(len(a) * len(b) / (len(a) + len(b)) * ((a.mean(axis=0) - b.mean(axis=0)) ** 2).sum())
+        i = int(np.argmin(costs))
+        segments[i:i + 2] = [segments[i] + segments[i + 1]]
+    rtps = np.empty(len(day), dtype=np.int64)
+    for rtp, hours in enumerate(segments):
+        rtps[hours] = rtp
+    return rtps
+
+# Aggregate chronological profiles into nb_rds RDs of nb_rtps RTPs
+# Return the RD tables in the layout of RDs_weights_data.xlsx ({'weights': ..., 'RD1': ..., ...}) and the approximation error
+def aggregate(profiles, nb_rds, nb_rtps, method='kmedoids'):
+    nb_days = len(profiles)
+    if not 0 < nb_rtps <= day_hours:
+        raise ValueError("Cannot split a day of {} hours into {} RTPs".format(day_hours, nb_rtps))
+    # Every profile has the same influence on the clustering whatever its range
+    low, high = profiles.min(axis=(0, 1)), profiles.max(axis=(0, 1))
+    span = np.where(high > low, high - low, 1.0)
+    scaled = (profiles - low) / span
+    labels, centers = cluster_days(scaled.reshape(nb_days, -1), nb_rds, method)
+    rds = {'weights': pd.DataFrame({'RD': np.arange(1, nb_rds + 1),
+                                    'sigma_t [days]': np.bincount(labels, minlength=nb_rds) * year_days / nb_days})}
+    approx = np.empty_like(profiles)
+    for c in range(nb_rds):
+        # Centroids are averages of the scaled days, they are mapped back to the profile units
+        day = centers[c].reshape(day_hours, -1) * span + low if method == 'kmeans' else profiles[centers[c]]
+        rtps = segment_hours((day - low) / span, nb_rtps)
+        values = np.array([day[rtps == rtp].mean(axis=0) for rtp in range(nb_rtps)])
+        table = pd.DataFrame(values, columns=profile_columns)
+        table.insert(0, 'tau_th [h]', np.bincount(rtps, minlength=nb_rtps))
+        table.insert(0, 'RTP', np.arange(1, nb_rtps + 1))
+        rds['RD{}'.format(c + 1)] = table
+        approx[labels == c] = values[rtps]
+    return rds, approximation_error(profiles, approx)
+
+# Return the approximation error of each profile: RMSE and normalized RMSE of the chronological profiles,
+# RMSE of the duration curves and relative error of the total energy
+def approximation_error(profiles, approx):
+    flat, flat_approx = profiles.reshape(-1, profiles.shape[2]), approx.reshape(-1, approx.shape[2])
+    rmse = np.sqrt(((flat - flat_approx) ** 2).mean(axis=0))
+    mean = flat.mean(axis=0)
+    return pd.DataFrame({
+        'profile': profile_columns,
+        'rmse': rmse,
+        'nrmse': rmse / np.where(mean > 0, mean, 1.0),
+        'duration_curve_rmse': np.sqrt(((np.sort(flat, axis=0) - np.sort(flat_approx, axis=0)) ** 2).mean(axis=0)),
+        'energy_error': (flat_approx.sum(axis=0) - flat.sum(axis=0)) / np.where(flat.sum(axis=0) > 0, flat.sum(axis=0), 1.0),
+    })
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aggregate hourly chronological profiles into representative days")
+    parser.add_argument('profiles', help="CSV file of hourly profiles in chronological order with the columns {}".format(', '.join(profile_columns)))
+    parser.add_argument('--rds', type=int, default=10, help="Number of representative days")
+    parser.add_argument('--rtps', type=int, default=8, help="Number of RTPs of each representative day")
+    parser.add_argument('--method', choices=rd_methods, default='kmedoids', help="Clustering method of the days")
+    parser.add_argument('--output', default='../data/RDs_weights_aggregated.xlsx', help="Path of the RD workbook, in the layout of RDs_weights_data.xlsx")
+    args = parser.parse_args()
+
+    rds, error = aggregate(read_profiles(args.profiles), args.rds, args.rtps, args.method)
+    with pd.ExcelWriter(args.output) as writer:
+        for sheet_name, table in rds.items():
+            table.to_excel(writer, sheet_name=sheet_name, index=False)
+        error.to_excel(writer, sheet_name='error', index=False)
+    print(error.to_string(index=False))
+    print("{} RDs of {} RTPs written to {}".format(args.rds, args.rtps, args.output))
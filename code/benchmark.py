@@ -0,0 +1,104 @@
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark grid: every case is run with and without ESS investments at each horizon length (in years)
+bench_cases = ['rts_24', 'rts_118']
+bench_horizons = [1, 3, 5]
+# Relative increase of a timing or of the peak memory over the baseline that is reported as a regression
+regression_tol = 0.10
+# Relative change of the final bounds over the baseline that is reported as a different result
+bound_tol = 1e-4
+
+# Return the identifier of a benchmark configuration
+def bench_id(case, ess_inv, horizon):
+    return '{}_{}_{}y'.format(case, 'ess' if ess_inv else 'noess', horizon)
+
+# Directory of the solution procedure, which also reads its input data relative to it
+code_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Run the full solution procedure for one configuration in its own process and return its summary
+# The solve cache is disabled so that every configuration solves all its subproblems, whatever ran before it
+def run_benchmark(case, ess_inv, horizon):
+    env = dict(os.environ, ARO_TNEP_CASE=case, ARO_TNEP_ESS_INV='1' if ess_inv else '0', ARO_TNEP_YEARS=str(horizon), ARO_TNEP_CACHE_SOLVES='0')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        summary_file = os.path.join(tmp_dir, 'summary.json')
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, os.path.join(code_dir, 'multi_year_aro_tnep.py'), '--summary', summary_file], env=env, cwd=code_dir,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        wall_time = time.perf_counter() - start
+        # The summary is written once the loops are done, a failure after that point does not invalidate the run
+        if not os.path.exists(summary_file):
+            print("Benchmark {} failed:\n{}".format(bench_id(case, ess_inv, horizon), proc.stderr[-2000:]))
+            return {'failed': True, 'process_wall_time': wall_time}
+        with open(summary_file) as f:
+            summary = json.load(f)
+    summary['process_wall_time'] = wall_time
+    summary['failed'] = False
+    return summary
+
+# Return the number of subproblems of a run taken from the solve cache, whose timings then do not include these solves
+def cache_hits(summary):
+    return sum(summary.get('solve_cache_hits', {}).values())
+
+# Return the regressions of a run against a baseline run of the same configuration
+def compare_to_baseline(result, baseline):
+    if result['failed']:
+        return ['run failed']
+    if baseline.get('failed'):
+        return []
+    regressions = []
+    timings = [('process_wall_time', result['process_wall_time'], baseline['process_wall_time']),
+               ('peak_memory_mb', result['peak_memory_mb'], baseline['peak_memory_mb'])]
+    timings += [('subproblem_time.' + name, seconds, baseline['subproblem_time'].get(name, 0.0))
+                for name, seconds in result['subproblem_time'].items()]
+    for name, value, base in timings:
+        if base > 0 and value > base * (1 + regression_tol):
+            regressions.append('{} = {:.2f} vs {:.2f} in the baseline (+{:.1f}%)'.format(name, value, base, 100 * (value / base - 1)))
+    for bound in ['lb_o', 'ub_o']:
+        if abs(result[bound] - baseline[bound]) > bound_tol * max(abs(baseline[bound]), 1.0):
+            regressions.append('{} = {} vs {} in the baseline'.format(bound, result[bound], baseline[bound]))
+    if result['j'] != baseline['j']:
+        regressions.append('j = {} vs {} in the baseline'.format(result['j'], baseline['j']))
+    return regressions
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks of the ARO-TNEP solution procedure")
+    parser.add_argument('--cases', nargs='+', default=bench_cases, help="Cases to run")
+    parser.add_argument('--horizons', nargs='+', type=int, default=bench_horizons, help="Horizon lengths in years")
+    parser.add_argument('--ess', nargs='+', choices=['on', 'off'], default=['on', 'off'], help="Run with and/or without ESS investments")
+    parser.add_argument('--output', default='benchmark_results.json', help="Path of the JSON results file")
+    parser.add_argument('--baseline', help="Results file of a previous run to compare against")
+    args = parser.parse_args()
+
+    results = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'runs': {}}
+    for case, ess, horizon in itertools.product(args.cases, args.ess, args.horizons):
+        run_id = bench_id(case, ess == 'on', horizon)
+        print("Running benchmark {}".format(run_id))
+        results['runs'][run_id] = run_benchmark(case, ess == 'on', horizon)
+        print("Benchmark {} finished in {:.1f} s, {} solve cache hits".format(run_id, results['runs'][run_id]['process_wall_time'], cache_hits(results['runs'][run_id])))
+        # Results are rewritten after every run so that a long suite leaves partial results behind
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        nb_regressions = 0
+        for run_id, result in results['runs'].items():
+            if run_id not in baseline['runs']:
+                print("{}: not in the baseline".format(run_id))
+                continue
+            regressions = compare_to_baseline(result, baseline['runs'][run_id])
+            print("{}: {} solve cache hits vs {} in the baseline".format(run_id, cache_hits(result), cache_hits(baseline['runs'][run_id])))
+            nb_regressions += len(regressions)
+            for regression in regressions:
+                print("{}: {}".format(run_id, regression))
+            if not regressions:
+                print("{}: no regression".format(run_id))
+        sys.exit(1 if nb_regressions else 0)
@@ -0,0 +1,74 @@
+import os
+
+# Run settings of multi_year_aro_tnep.py and of its input data processing
+# The case, the ESS investments, the horizon, the RDs and the solve cache can be overridden from the environment (used by the benchmark suite)
+
+cache_dir = '../data/cache' # Columnar copies of the Excel input files, one Feather file per sheet
+
+# Representative days: the RDs of an RD workbook, or RDs aggregated from hourly chronological profiles
+rd_file = os.environ.get('ARO_TNEP_RD_FILE', '../data/RDs_weights_data.xlsx') # RD workbook, e.g. the hand-made RDs or a workbook written by aggregation.py
+profiles_file = os.environ.get('ARO_TNEP_PROFILES') # CSV of hourly chronological profiles aggregated at every run, None reads rd_file
+rd_count = int(os.environ.get('ARO_TNEP_RDS', 10)) # Number of RDs aggregated from profiles_file
+rd_rtps = 8 # Number of RTPs of each aggregated RD
+rd_method = 'kmedoids' # Clustering of the days of profiles_file: 'kmedoids', 'kmeans' or 'hierarchical'
+
+# Test case and horizon
+case = os.environ.get('ARO_TNEP_CASE', 'rts_24')
+years = int(os.environ.get('ARO_TNEP_YEARS', 1)) # Number of years of the planning horizon
+
+# Solution procedure
+ess_inv = os.environ.get('ARO_TNEP_ESS_INV', '1') == '1'
+persistent_models = True # Build each subproblem once and re-solve it with updated parameters
+parallel_years = False # Solve the inner loops of each year in its own worker process
+year_workers = 4 # Maximum number of year-loop worker processes
+decompose_ilsp = True # Solve the ILSP as one subproblem per RD when no constraint couples the RDs
+subproblem_workers = 4 # Maximum number of worker processes solving the ILSP of each RD and the Benders OLMP subproblems, 0 solves them in this process
+benders_olmp = False # Solve the OLMP by Benders decomposition with one subproblem per year, RD and outer loop iteration
+benders_max_iter = 100 # Maximum number of master solves of the Benders OLMP
+benders_cut_max_age = 10 # Consecutive master solves a Benders optimality cut may stay non-binding before it is dropped
+warm_start = True # Pass the last incumbent of each MIP subproblem to CPLEX as a MIP start
+warm_start_pair_every = 0 # Also solve every n-th warm-started MIP instance without its MIP start to measure the saving on the same instance, 0 never
+ada_max_iter = 5 # Maximum number of LP1/LP2 rounds of the ADA per inner loop iteration
+ada_basis_restart = True # Start the ADA LPs from their basis of the previous round
+ada_dual_simplex = False # Also force the dual simplex on these restarts, else CPLEX picks the LP method
+checkpointing = True # Save the container and the decomposition state at the end of every outer loop iteration
+checkpoint_solves = True # Also save them after every OLMP, ILSP and ILMP solve, as a delta holding only the records changed since the previous save
+checkpoint_dir = 'checkpoints' # Directory of the checkpoint used by --resume
+trace_file = 'solve_trace.jsonl' # JSON Lines trace with one record per solve
+solver_log_dir = 'solver_logs' # Directory of the solver log of every solve and of their parsed statistics (solver_stats.jsonl)
+profile_file = 'resource_profile.json' # Memory and CPU time of each phase of the run
+cache_solves = os.environ.get('ARO_TNEP_CACHE_SOLVES', '1') == '1' # Reuse the objective and decisions of an ILSP already solved with identical inputs, also across runs
+solve_cache_dir = os.path.join(cache_dir, 'solves') # Directory of the solve cache, one file per subproblem instance
+solve_cache_mb = 2048 # Size limit of the solve cache, the least recently used instances are evicted beyond it
+notify_sinks = ['ntfy', 'file'] # Notification sinks: 'ntfy' (ntfy.sh), 'webhook' (JSON POST to notify_webhook) and 'file' (notify_file)
+notify_topic = 'kevin_aro_tnep_job_0919' # ntfy.sh topic of the run notifications
+notify_webhook = 'http://localhost:8080/notify' # Endpoint of the webhook sink, e.g. a local stand-in for ntfy.sh
+notify_file = 'notifications.jsonl' # JSON Lines file of the file sink
+notify_timeout = 5 # Seconds an HTTP sink may take to answer, and the longest the end of the run waits for pending notifications
+notify_batch_interval = 2.0 # Seconds during which notifications are gathered into a single delivery
+results_dir = 'results' # Directory of the exported results, the bounds history and the snapshot of each outer loop iteration are written as the loops progress
+result_symbols = ['vL_ly', 'vS_sy', 'min_inv_cost_wc', 'cG_gy', 'pD_dy', 'pG_gy', 'pR_ry', 'CG_gyi', 'PD_dyi', 'PG_gyi', 'PR_ryi'] # Symbols exported to the result GDX files
+compress_results = True # Write compressed result GDX files
+cut_pool_size = 5 # Maximum number of outer loop iteration blocks kept in the OLMP after each solve
+cut_pool_max_age = 2 # Consecutive OLMP solves an iteration block may stay non-binding before it is evicted
+cut_activity_tol = 1e-6 # Relative slack of con_4c under which an iteration block counts as binding
+prune_iterations = True # Keep only the records of the active outer and inner loop iterations in the container
+spill_dir = 'spill' # Directory of the solution records of inactive iterations, reloaded when they become active again
+
+# Convergence
+tol = 0.008
+ada_tol = tol # Relative difference of the LP1 and LP2 objectives under which the ADA has converged
+adaptive_gaps = True # Solve the OLMP and ILMP with optimality gaps loosened in proportion to their loop error and with objective cutoffs from the loop bounds
+adaptive_gap_max = 0.05 # Loosest relative optimality gap of an adaptive OLMP or ILMP solve
+adaptive_gap_share = 0.25 # Share of the current loop error allowed as the optimality gap of the next OLMP or ILMP solve, never below tol
+adaptive_cutoff_margin = 0.01 # Relative margin of the objective cutoffs over the loop bounds they are derived from
+
+# Safety factor of the dual Big-M values over the economic bound on the nodal prices
+bigm_factor = 5.0
+# Smallest dual Big-M value, the economic bound is not a proven dual bound so the former constant is kept as a floor
+bigm_floor = 1000000.0
+# The economic bound can be exceeded under congestion, after each relaxed ILMP solve a dual within bigm_check_tol of its Big-M
+# has its Big-M multiplied by bigm_growth and the ILMP is solved again, at most bigm_max_enlargements times per solve
+bigm_check_tol = 0.01
+bigm_growth = 10.0
+bigm_max_enlargements = 5
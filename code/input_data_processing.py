@@ -1,96 +1,211 @@
+import hashlib
+import heapq
+import os
+import re
+import shutil
+import tempfile
 import numpy as np
 import pandas as pd
+from aggregation import aggregate, read_profiles
+import config
+from utils import logger, profiler
 
-# Read input Excel files
-weights_rd_data =  pd.read_excel('../data/RDs_weights_data.xlsx', sheet_name=None)
-rts_24_data =  pd.read_excel('../data/rts_24_data.xlsx', sheet_name=None)
-rts_118_data =  pd.read_excel('../data/rts_118_data.xlsx', sheet_name=None)
-
-# Generate dictionaries where each item is a sheet from the above Excel files
-weights_rd = {}
-rts_24 = {}
-rts_118 = {}
-for weights_sheet_name, weight_rd_df in weights_rd_data.items():
-    weights_rd.update({str(weights_sheet_name): weight_rd_df})
-for rts_24_sheet_name, rts_24_df in rts_24_data.items():
-    rts_24.update({str(rts_24_sheet_name): rts_24_df})
-for rts_118_sheet_name, rts_118_df in rts_118_data.items():
-        rts_118.update({str(rts_118_sheet_name): rts_118_df})
+# Everything done while reading and preparing the input data is attributed to the INPUT phase
+profiler.enter('INPUT')
+
+# Return the SHA-256 hash of the content of a file
+def file_hash(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+# Fill a cache directory with write_fn in a private directory that is renamed into place at once, marker being its last file
+# Concurrent runs (sweep workers, benchmark) never read a partial cache, the first run to publish the directory wins
+def publish_cache_dir(target, marker, write_fn):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(target), prefix='.partial-')
+    try:
+        write_fn(tmp_dir)
+        # A directory without its marker was left by an interrupted run of an earlier version
+        if os.path.isdir(target) and not os.path.exists(os.path.join(target, marker)):
+            shutil.rmtree(target, ignore_errors=True)
+        try:
+            os.replace(tmp_dir, target)
+        except OSError:
+            if not os.path.exists(os.path.join(target, marker)):
+                raise
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Return the given sheets of an Excel workbook (all sheets if None) from its columnar cache
+# The workbook is parsed only when its content hash has no cache yet, stale caches of the same workbook are removed
+def load_workbook(path, sheets=None):
+    workbook_dir = os.path.join(config.cache_dir, os.path.splitext(os.path.basename(path))[0])
+    hash_dir = os.path.join(workbook_dir, file_hash(path))
+    index_file = os.path.join(hash_dir, 'sheets.txt')
+    if not os.path.exists(index_file):
+        def write_sheets(directory):
+            workbook_data = pd.read_excel(path, sheet_name=None)
+            for sheet_name, sheet_df in workbook_data.items():
+                sheet_df.columns = [str(col) for col in sheet_df.columns]
+                sheet_df.reset_index(drop=True).to_feather(os.path.join(directory, '{}.feather'.format(sheet_name)))
+            with open(os.path.join(directory, 'sheets.txt'), 'w') as f:
+                f.write('\n'.join(str(sheet_name) for sheet_name in workbook_data))
+        publish_cache_dir(hash_dir, 'sheets.txt', write_sheets)
+        for name in os.listdir(workbook_dir):
+            if name != os.path.basename(hash_dir) and not name.startswith('.partial-'):
+                shutil.rmtree(os.path.join(workbook_dir, name), ignore_errors=True)
+    if sheets is None:
+        with open(index_file) as f:
+            sheets = f.read().split('\n')
+    return {str(sheet): pd.read_feather(os.path.join(hash_dir, '{}.feather'.format(sheet))) for sheet in sheets}
+
+# Input files and sheets used for each case, only the sheets of the selected case are loaded
+case_files = {'rts_24': '../data/rts_24_data.xlsx', 'rts_118': '../data/rts_118_data.xlsx'}
+case_sheets = {
+    'rts_24': {'lines': 'TL_ESS', 'buses': 'Buses', 'ESS': 'ESS_can', 'CG': 'CG', 'RES': 'RES', 'loads': 'loads', 'UB': 'UB'},
+    'rts_118': {'lines': 'TL', 'buses': 'Buses', 'ESS': 'ESS', 'CG': 'CG', 'RES': 'RES', 'loads': 'loads', 'UB': 'UB'},
+}
+
+# Return the input tables of the given case, keyed as in case_sheets
+def load_case(case):
+    sheets = load_workbook(case_files[case], list(case_sheets[case].values()))
+    return {key: sheets[sheet] for key, sheet in case_sheets[case].items()}
+
+# Read input data, the representative days are those of an RD workbook or aggregated from hourly chronological profiles
+if config.profiles_file is None:
+    weights_rd = load_workbook(config.rd_file)
+else:
+    weights_rd, rd_error = aggregate(read_profiles(config.profiles_file), config.rd_count, config.rd_rtps, config.rd_method)
+    logger.info("Aggregated {} into {} RDs of {} RTPs ({}), approximation error:\n{}".format(config.profiles_file, config.rd_count, config.rd_rtps, config.rd_method, rd_error.to_string(index=False)))
 
 weights = weights_rd['weights']
-RD1 = weights_rd['RD1']
-RD2 = weights_rd['RD2']
-RD3 = weights_rd['RD3']
-RD4 = weights_rd['RD4']
-RD5 = weights_rd['RD5']
-RD6 = weights_rd['RD6']
-RD7 = weights_rd['RD7']
-RD8 = weights_rd['RD8']
-RD9 = weights_rd['RD9']
-RD10 = weights_rd['RD10']
-
-static = False
-ess_inv = True
-lines = rts_24['TL_ESS']
-buses = rts_24['Buses']
-ESS = rts_24['ESS_can']
-CG = rts_24['CG']
-RES = rts_24['RES']
-loads = rts_24['loads']
-UB = rts_24['UB']
-
-years_data = range(1,2)
-tol = 0.008
+# Representative days, one sheet per RD named RD1, RD2, ... in the order of their number
+rd_sheet_names = sorted([name for name in weights_rd if re.fullmatch(r'RD\d+', name)], key=lambda name: int(name[2:]))
+RDs = [weights_rd[name] for name in rd_sheet_names]
+RD1 = RDs[0]
+
+case_data = load_case(config.case)
+lines = case_data['lines']
+buses = case_data['buses']
+ESS = case_data['ESS']
+CG = case_data['CG']
+RES = case_data['RES']
+loads = case_data['loads']
+UB = case_data['UB']
+
+years_data = range(1, config.years + 1)
 
 SEl_data = []
 for line, rel in zip(lines['Transmission line'], lines['From bus']):
     SEl_data.append([line, int(rel)])
 
-gamma_dyth_data = []
-for load, zone in zip(loads['Load'], loads['Zone']):
-    for y in years_data:
-        for j, RD in enumerate([RD1, RD2, RD3, RD4, RD5, RD6, RD7, RD8, RD9, RD10]):
-            for RTP, gamma_west, gamma_east in zip(RD['RTP'], RD['gammaD_dth_west'], RD['gammaD_dth_east']):
-                if zone == 'West':
-                    gammaD = gamma_west
-                elif zone == 'East':
-                    gammaD = gamma_east
-                gamma_dyth_data.append([load, y, j+1, RTP, gammaD])
-
-gamma_ryth_data = []
-for res, tech, zone in zip(RES['Generating unit'], RES['Technology'], RES['Zone']):
-    for y in years_data:
-        for j, RD in enumerate([RD1, RD2, RD3, RD4, RD5, RD6, RD7, RD8, RD9, RD10]):
-            for RTP, gammaRW_south, gammaRW_north, gammaRS_south, gammaRS_north in zip(RD['RTP'],
-                                                                                       RD['gammaRW_rth_south'],
-                                                                                       RD['gammaRW_rth_north'],
-                                                                                       RD['gammaRS_rth_south'],
-                                                                                       RD['gammaRS_rth_north']):
-                if tech == 'Wind' and zone == 'South':
-                    gammaR = gammaRW_south
-                elif tech == 'Wind' and zone == 'North':
-                    gammaR = gammaRW_north
-                elif tech == 'Solar' and zone == 'South':
-                    gammaR = gammaRS_south
-                elif tech == 'Solar' and zone == 'North':
-                    gammaR = gammaRS_north
-                gamma_ryth_data.append([res, y, j+1, RTP, gammaR])
-
-sigma_yt_data = []
-for y in years_data:
-    for RD, sigma in zip(weights['RD'], weights['sigma_t [days]']):
-        sigma_yt_data.append([y, RD, sigma])
-
-tau_yth_data = []
-for y in years_data:
-    for i, RD in enumerate([RD1, RD2, RD3, RD4, RD5, RD6, RD7, RD8, RD9, RD10]):
-        for RTP, duration in zip(RD['RTP'], RD['tau_th [h]']):
-            tau_yth_data.append([y, i+1, RTP, duration])
-
-ES_syt0_data = []
-for s, es0 in zip(ESS['Storage unit'], ESS['ES_s0 [MWh]']):
-    for y in years_data:
-        for RD in weights['RD']:
-            ES_syt0_data.append([s, y, RD, es0])
+# Signed line-bus incidence, +1 at the sending bus and -1 at the receiving bus of each line (one record per line end)
+# The flow equations and nodal balances sum over these records instead of filtering every line x bus pair
+incidence_data = pd.concat([lines[['Transmission line', 'From bus']].set_axis(['l', 'n'], axis=1).assign(A=1.0),
+                            lines[['Transmission line', 'To bus']].set_axis(['l', 'n'], axis=1).assign(A=-1.0)], ignore_index=True)
+incidence_data = incidence_data.groupby(['l', 'n'], as_index=False, sort=False)['A'].sum()
+incidence_data = incidence_data[incidence_data['A'] != 0].reset_index(drop=True)
+
+# Long table of the RTP profiles of all RDs, with the RD number of each row
+rd_profiles = pd.concat([rd_df.assign(RD=int(name[2:])) for name, rd_df in zip(rd_sheet_names, RDs)], ignore_index=True)
+years_df = pd.DataFrame({'y': np.asarray(list(years_data), dtype=np.int64)})
+
+# Profile columns of each load zone and of each renewable technology and zone
+gammaD_cols = {'gammaD_dth_west': 'West', 'gammaD_dth_east': 'East'}
+gammaR_cols = {'gammaRW_rth_south': ('Wind', 'South'), 'gammaRW_rth_north': ('Wind', 'North'),
+               'gammaRS_rth_south': ('Solar', 'South'), 'gammaRS_rth_north': ('Solar', 'North')}
+
+# Return a typed (entity, y, t, h, value) table by matching each entity to the profile column of its category
+def build_profile_table(entities, entity_col, keys, profile_cols):
+    profiles = rd_profiles.melt(id_vars=['RD', 'RTP'], value_vars=list(profile_cols), var_name='col', value_name='value')
+    keys_df = pd.DataFrame([list(np.atleast_1d(key)) for key in profile_cols.values()], columns=keys)
+    keys_df['col'] = list(profile_cols)
+    profiles = profiles.merge(keys_df, on='col')
+    table = entities[[entity_col] + keys].merge(years_df, how='cross').merge(profiles, on=keys)
+    return table[[entity_col, 'y', 'RD', 'RTP', 'value']].astype({'y': np.int64, 'RD': np.int64, 'RTP': np.int64, 'value': np.float64})
+
+gamma_dyth_data = build_profile_table(loads, 'Load', ['Zone'], gammaD_cols)
+gamma_ryth_data = build_profile_table(RES, 'Generating unit', ['Technology', 'Zone'], gammaR_cols)
+
+sigma_yt_data = years_df.merge(weights[['RD', 'sigma_t [days]']], how='cross').astype({'RD': np.int64, 'sigma_t [days]': np.float64})
+
+tau_yth_data = years_df.merge(rd_profiles[['RD', 'RTP', 'tau_th [h]']], how='cross').astype({'RTP': np.int64, 'tau_th [h]': np.float64})
+
+ES_syt0_data = ESS[['Storage unit', 'ES_s0 [MWh]']].merge(years_df, how='cross').merge(weights[['RD']], how='cross')
+ES_syt0_data = ES_syt0_data[['Storage unit', 'y', 'RD', 'ES_s0 [MWh]']].astype({'RD': np.int64, 'ES_s0 [MWh]': np.float64})
+
+# Return the bound on the angle difference between the ends of each candidate line
+# The angle difference along an existing line is at most PL_l * X_l, so the shortest path of existing lines between the
+# two ends bounds it whether or not the candidate is built; candidates without such a path keep the global constant
+def angle_difference_bounds(lines):
+    existing = lines[lines['IL_l [$]'] == 0]
+    adjacency = {}
+    for from_bus, to_bus, weight in zip(existing['From bus'], existing['To bus'], existing['PL_l'] * existing['X_l']):
+        adjacency.setdefault(from_bus, []).append((to_bus, weight))
+        adjacency.setdefault(to_bus, []).append((from_bus, weight))
+    bounds = {}
+    candidates = lines[lines['IL_l [$]'] > 0]
+    for source in candidates['From bus'].unique():
+        dist = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap:
+            dist_bus, bus = heapq.heappop(heap)
+            if dist_bus > dist[bus]:
+                continue
+            for neighbor, weight in adjacency.get(bus, []):
+                if dist_bus + weight < dist.get(neighbor, np.inf):
+                    dist[neighbor] = dist_bus + weight
+                    heapq.heappush(heap, (dist_bus + weight, neighbor))
+        bounds[source] = dist
+    return np.array([bounds[from_bus].get(to_bus, np.inf) for from_bus, to_bus in zip(candidates['From bus'], candidates['To bus'])])
+
+# Return the per-index Big-M tables of the disjunctive flow constraints (per candidate line) and of the linearized
+# products of the ILMP (per dual variable index)
+# The nodal price at (y, t, h) is bounded by bigm_factor times the weighted load-shedding plus spillage cost of that RTP,
+# the duals of the load, generation and renewable capacity limits follow from their dual constraints
+# These economic bounds are not proven bounds on the duals, so no dual Big-M value goes below bigm_floor and every relaxed
+# ILMP solve checks that no dual reaches its Big-M, see binding_bigm
+def compute_bigm():
+    candidates = lines[lines['IL_l [$]'] > 0]
+    FL_l = angle_difference_bounds(lines) / candidates['X_l'].to_numpy()
+    FL_l = np.where(np.isfinite(FL_l), FL_l, lines['PL_l'].max() * 10.5)
+    bigm = {'FL_l': pd.DataFrame({'lc': candidates['Transmission line'].to_numpy(), 'value': FL_l})}
+    max_cr = RES['CR_r [$/MWh]'].max() if 'CR_r [$/MWh]' in RES.columns else 0.0
+    weight = sigma_yt_data.merge(tau_yth_data, on=['y', 'RD'])
+    weight['w'] = weight['sigma_t [days]'] * weight['tau_th [h]']
+    weight['price'] = config.bigm_factor * weight['w'] * (loads['CLS_d [$/MWh]'].max() + max_cr)
+    keys = ['y', 'RD', 'RTP']
+    load_w = loads[['Load', 'CLS_d [$/MWh]']].merge(weight, how='cross')
+    bigm['FD_dyth'] = load_w[['Load'] + keys + ['price']].rename(columns={'price': 'value'})
+    bigm['FD_up_dyth'] = load_w[['Load'] + keys].assign(value=load_w['price'] - load_w['w'] * load_w['CLS_d [$/MWh]'])
+    gen_w = CG[['Generating unit']].merge(weight, how='cross')
+    bigm['FG_up_gyth'] = gen_w[['Generating unit'] + keys + ['price']].rename(columns={'price': 'value'})
+    res_w = RES[['Generating unit']].assign(cr=RES['CR_r [$/MWh]'] if 'CR_r [$/MWh]' in RES.columns else 0.0).merge(weight, how='cross')
+    bigm['FR_up_ryth'] = res_w[['Generating unit'] + keys].assign(value=res_w['price'] + res_w['w'] * res_w['cr'])
+    for name in ['FD_dyth', 'FD_up_dyth', 'FG_up_gyth', 'FR_up_ryth']:
+        bigm[name]['value'] = bigm[name]['value'].clip(lower=config.bigm_floor)
+    return bigm
+
+# Return the Big-M tables of the case from the cache, which is keyed by the content of every input they depend on
+def load_bigm():
+    key = hashlib.sha256()
+    for table in [lines, loads, CG, RES, sigma_yt_data, tau_yth_data]:
+        key.update(pd.util.hash_pandas_object(table, index=False).to_numpy().tobytes())
+    key.update(str((config.bigm_factor, config.bigm_floor)).encode())
+    bigm_dir = os.path.join(config.cache_dir, 'bigm', config.case, key.hexdigest())
+    names = ['FL_l', 'FD_dyth', 'FD_up_dyth', 'FG_up_gyth', 'FR_up_ryth']
+    if not os.path.exists(os.path.join(bigm_dir, 'done')):
+        def write_bigm(directory):
+            for name, table in compute_bigm().items():
+                table.reset_index(drop=True).to_feather(os.path.join(directory, '{}.feather'.format(name)))
+            open(os.path.join(directory, 'done'), 'w').close()
+        publish_cache_dir(bigm_dir, 'done', write_bigm)
+    return {name: pd.read_feather(os.path.join(bigm_dir, '{}.feather'.format(name))) for name in names}
+
+bigm_data = load_bigm()
 
+profiler.exit()
 print("Input Data Processed")
\ No newline at end of file
@@ -1,20 +1,31 @@
 from pandas.compat.numpy.function import validate_round
 from pandas.core.dtypes.inference import is_re
 
-from input_data_processing import (weights, RD1, lines, buses, ESS, CG, RES, loads, years_data, sigma_yt_data,
-                                   tau_yth_data, gamma_dyth_data, gamma_ryth_data, ES_syt0_data, tol, static, ess_inv)
-from gamspy import Alias, Container, Domain, Equation, Model, Options, Ord, Card, Parameter, Set, Smax, Sum, Variable
+from input_data_processing import (weights, RD1, lines, buses, ESS, CG, RES, loads, years_data, sigma_yt_data, tau_yth_data, incidence_data,
+                                   gamma_dyth_data, gamma_ryth_data, ES_syt0_data, bigm_data)
+import config
+from gamspy import Alias, Container, Domain, Equation, FreezeOptions, Model, Options, Ord, Card, Parameter, Set, Sum, Variable
 from gamspy.math import power, Max
-from utils import logger, notify_mobile, setup_ntfy_exception_handler, MemoryTracker
+from utils import logger, notify_mobile, notifier, notification_sinks, setup_ntfy_exception_handler, profiler, SolveTrace, SolveCache, SolverLogs, ResultWriter, parse_mip_start
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import argparse
+import gamspy
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import re
+import shutil
+import time
+import weakref
 import pandas as pd
-import sys
 
-# Start tracking peak RAM usage
-mem_tracker = MemoryTracker()
-mem_tracker.start()
-
-# Setup automatic ntfy alert on runtime crash
-setup_ntfy_exception_handler(topic="kevin_aro_tnep_job_0919", script_name="multi_year_aro_tnep.py")
+# Year-loop worker processes re-import this module to build their own container, only the main process tracks and alerts
+if __name__ == '__main__':
+    notifier.configure(notification_sinks(config.notify_sinks, config.notify_topic, config.notify_webhook, config.notify_file, config.notify_timeout), config.notify_batch_interval, config.notify_timeout)
+    # Setup automatic ntfy alert on runtime crash
+    setup_ntfy_exception_handler(topic=config.notify_topic, script_name="multi_year_aro_tnep.py")
 
 # Optimization problem definition
 m = Container()
@@ -43,14 +54,15 @@ d_n = Set(m, name="d_n", domain=[d, n], records=loads[['Load', 'Bus']], descript
 g_n = Set(m, name="g_n", domain=[g, n], records=CG[['Generating unit', 'Bus']], description="Set of conventional units connected to bus n")
 r_n = Set(m, name="r_n", domain=[r, n], records=RES[['Generating unit', 'Bus']], description="Set of renewable units connected to bus n")
 s_n = Set(m, name="s_n", domain=[s, n], records=ESS[['Storage unit', 'Bus']], description="Set of storage units connected to bus n")
-rel_n = Set(m, name="rel_n", domain=[l, n], records=lines[['Transmission line', 'To bus']], description="Receiving bus of transmission line l")
-sel_n = Set(m, name="sel_n", domain=[l, n], records=lines[['Transmission line', 'From bus']], description="Sending bus of transmission line l")
+l_n = Set(m, name="l_n", domain=[l, n], records=incidence_data[['l', 'n']], description="Sending and receiving buses of transmission line l")
 # Sets of indices for the outer and inner loop problems
 j = Set(m, name="j", description="Iteration of the outer loop")
 ir = Set(m, name="ir", domain=[j], description="Iteration of the outer loop (relaxed)")
 k = Set(m, name="k", description="Iteration of the inner loop")
 va = Set(m, name="va", domain=[k], description="Iteration of the inner loop (ADA)")
 vr = Set(m, name="vr", domain=[k], description="Iteration of the inner loop (Relaxed)")
+# RDs of the inner-loop subproblem, all of them unless the ILSP is solved per RD
+tr = Set(m, name="tr", domain=[t], records=weights['RD'], description="RDs of the inner-loop subproblem")
 
 # ALIAS #
 yp = Alias(m, name="yp", alias_with=y)
@@ -66,22 +78,15 @@ GammaRS = Parameter(m, name="GammaRS", records=4, description="Uncertainty budge
 GammaRW = Parameter(m, name="GammaRW", records=4, description="Uncertainty budget for decreased wind capacity")
 kappa = Parameter(m, name="kappa", records=0.1, description="Discount rate")
 IT = Parameter(m, name="IT", records=1500000000, description="Investment budget")
-nb_H = Parameter(m, name="nb_H", records=8, description="Number of RTPs of each RD")
-# Systematically computed Big-M parameters for tight linearizations
-max_cls = loads['CLS_d [$/MWh]'].max()
-max_cr = RES['CR_r [$/MWh]'].max() if 'CR_r [$/MWh]' in RES.columns else 0.0
-max_sigma_tau = weights['sigma_t [days]'].max() * RD1['tau_th [h]'].max()
-# Tight flow Big-M based on maximum line rating
-FL_val = lines['PL_l'].max() * 10.5
-# Dynamically calculated tight dual Big-M bound based on maximum load-shedding cost and time weights
-FD_val = max(1000000.0, max_sigma_tau * (max_cls + max_cr) * 5.0)
-logger.info('FL_val = {}'.format(FL_val))
-logger.info('FD_val = {}'.format(FD_val))
-FL = Parameter(m, name="FL", records=FL_val, description="Large constant for disjunctive linearization")
-FD = Parameter(m, name="FD", records=FD_val, description="Large constant for exact linearization")
-FD_up = Parameter(m, name="FD_up", records=FD_val, description="Large constant for exact linearization")
-FG_up = Parameter(m, name="FG_up", records=FD_val, description="Large constant for exact linearization")
-FR_up = Parameter(m, name="FR_up", records=FD_val, description="Large constant for exact linearization")
+nb_H = Parameter(m, name="nb_H", records=len(RD1), description="Number of RTPs of each RD")
+# Big-M parameters of the linearizations, computed per candidate line and per dual variable index by the input preprocessing
+FL_l = Parameter(m, name="FL_l", domain=[lc], records=bigm_data['FL_l'], description="Large constant for the disjunctive linearization of the flow through candidate line l")
+FD_dyth = Parameter(m, name="FD_dyth", domain=[d, y, t, h], records=bigm_data['FD_dyth'], description="Large constant for the exact linearization of zD_dy*lambdaN_nyth")
+FD_up_dyth = Parameter(m, name="FD_up_dyth", domain=[d, y, t, h], records=bigm_data['FD_up_dyth'], description="Large constant for the exact linearization of zD_dy*muD_dyth_up")
+FG_up_gyth = Parameter(m, name="FG_up_gyth", domain=[g, y, t, h], records=bigm_data['FG_up_gyth'], description="Large constant for the exact linearization of zGP_gy*muG_gyth_up")
+FR_up_ryth = Parameter(m, name="FR_up_ryth", domain=[r, y, t, h], records=bigm_data['FR_up_ryth'], description="Large constant for the exact linearization of zR_ry*muR_ryth_up")
+logger.info('FL_l between {:.1f} and {:.1f}, FD_dyth between {:.1f} and {:.1f}'.format(bigm_data['FL_l']['value'].min(), bigm_data['FL_l']['value'].max(),
+            bigm_data['FD_dyth']['value'].min(), bigm_data['FD_dyth']['value'].max()))
 
 gammaD_dyth = Parameter(m, name="gammaD_dyth", domain=[d, y, t, h], records=gamma_dyth_data, description="Demand factor of load d")
 gammaR_ryth = Parameter(m, name="gammaR_ryth", domain=[r, y, t, h], records=gamma_ryth_data, description="Capacity factor of renewable unit r")
@@ -119,6 +124,39 @@ PSD_s = Parameter(m, name="PSD_s", domain=[s], records=ESS[['Storage unit', 'PSD
 RGD_g = Parameter(m, name="RGD_g", domain=[g], records=CG[['Generating unit', 'RGD_g [MW]']], description="Ramp-down limit of conventional unit g")
 RGU_g = Parameter(m, name="RGU_g", domain=[g], records=CG[['Generating unit', 'RGU_g [MW]']], description="Ramp-up limit of conventional unit")
 X_l = Parameter(m, name="X_l", domain=[l], records=lines[['Transmission line', 'X_l']], description="Reactance of transmission line l")
+A_ln = Parameter(m, name="A_ln", domain=[l, n], records=incidence_data, description="Signed incidence of transmission line l at bus n (+1 sending, -1 receiving)")
+
+# Year-evolved coefficients shared by all the subproblems, materialized by set_year_coefficients
+CG_gy_fc = Parameter(m, name="CG_gy_fc", domain=[g, y], description="Forecast marginal production cost of conventional unit g in year y")
+CG_gy_max = Parameter(m, name="CG_gy_max", domain=[g, y], description="Maximum deviation from the forecast marginal production cost of conventional unit g in year y")
+PD_dy_fc = Parameter(m, name="PD_dy_fc", domain=[d, y], description="Forecast peak power consumption of load d in year y")
+PD_dy_max = Parameter(m, name="PD_dy_max", domain=[d, y], description="Maximum deviation from the forecast peak power consumption of load d in year y")
+PG_gy_fc = Parameter(m, name="PG_gy_fc", domain=[g, y], description="Forecast capacity of conventional unit g in year y")
+PG_gy_fc_dec = Parameter(m, name="PG_gy_fc_dec", domain=[g, y], description="Forecast capacity of conventional unit g in year y evolved at the rate -zetaGP_g_fc (ILMP dual objective and LP2)")
+PG_gy_max = Parameter(m, name="PG_gy_max", domain=[g, y], description="Maximum deviation from the forecast capacity of conventional unit g in year y")
+PR_ry_fc = Parameter(m, name="PR_ry_fc", domain=[r, y], description="Forecast capacity of renewable unit r in year y")
+PR_ry_max = Parameter(m, name="PR_ry_max", domain=[r, y], description="Maximum deviation from the forecast capacity of renewable unit r in year y")
+delta_y = Parameter(m, name="delta_y", domain=[y], description="Discount factor of year y")
+
+# Evolve the year-1 forecasts and maximum deviations to every year of the horizon and compute the discount factor of each year
+# Called once when the model is defined and again whenever a scenario changes kappa
+def set_year_coefficients():
+    CG_gy_fc[g, y] = CG_g_fc[g] * power(1 + zetaGC_g_fc[g], y.val - 1)
+    CG_gy_max[g, y] = CG_g_max[g] * power(1 + zetaGC_g_max[g], y.val - 1)
+    PD_dy_fc[d, y] = PD_d_fc[d] * power(1 + zetaD_d_fc[d], y.val - 1)
+    PD_dy_max[d, y] = PD_d_max[d] * power(1 + zetaD_d_max[d], y.val - 1)
+    PG_gy_fc[g, y] = PG_g_fc[g] * power(1 + zetaGP_g_fc[g], y.val - 1)
+    PG_gy_fc_dec[g, y] = PG_g_fc[g] * power(1 - zetaGP_g_fc[g], y.val - 1)
+    PG_gy_max[g, y] = PG_g_max[g] * power(1 + zetaGP_g_max[g], y.val - 1)
+    PR_ry_fc[r, y] = PR_r_fc[r] * power(1 + zetaR_r_fc[r], y.val - 1)
+    PR_ry_max[r, y] = PR_r_max[r] * power(1 + zetaR_r_max[r], y.val - 1)
+    delta_y[y] = 1.0 / power(1.0 + kappa, y.val - 1)
+
+# Return the discount factor of each year, keyed by the year as an int
+def discount_factors():
+    return {int(year): value for year, value in zip(delta_y.records['y'], delta_y.records['value'])}
+
+set_year_coefficients()
 
 # Parameters used to represent given results for certain variables
 CG_gyi = Parameter(m, name='CG_gyi', domain=[g, y, j], description="Worst-case realization of the marginal production cost of conventional generating unit g for relaxed outer loop iteration i")
@@ -283,90 +321,117 @@ con_4t = Equation(m, name="con_4t", domain=[y, t, h, j]) # N == ref bus
 
 con_4q_ess = Equation(m, name="con_4q_ess", domain=[n])
 
-def build_olmp_eqns(ess_inv, i_range):
-    imin = min(i_range)
-    imax = max(i_range)
-    jr = (Ord(j) >= imin) & (Ord(j) <= imax)
-    hmax = int(nb_H.toValue())
-
+# Benders decomposition of the OLMP, the operational block of each (y, t, j) becomes a subproblem that generates cuts on the investments
+yb = Set(m, name="yb", domain=[y], description="Year of the Benders subproblem")
+tb = Set(m, name="tb", domain=[t], description="RD of the Benders subproblem")
+jb = Set(m, name="jb", domain=[j], description="Outer loop iteration of the Benders subproblem")
+bc = Set(m, name="bc", description="Benders cuts of the OLMP")
+cut_ytj = Set(m, name="cut_ytj", domain=[bc, y, t, j], description="Block (y, t, j) bounded by Benders cut bc")
+cut_theta = Parameter(m, name="cut_theta", domain=[bc], description="Coefficient of the block operating cost in Benders cut bc, 0 for a feasibility cut")
+cut_const = Parameter(m, name="cut_const", domain=[bc], description="Constant term of Benders cut bc")
+cut_vL = Parameter(m, name="cut_vL", domain=[bc, lc], description="Coefficient of candidate line l built by the year of the block in Benders cut bc")
+cut_vS = Parameter(m, name="cut_vS", domain=[bc, s], description="Coefficient of storage s in operation in the year of the block in Benders cut bc")
+theta_ytj = Variable(m, type='positive', name="theta_ytj", domain=[y, t, j], description="Operating cost of the block (y, t, j) in the Benders master")
+con_bd_rho = Equation(m, name="con_bd_rho", domain=[y, j])
+con_bd_cut = Equation(m, name="con_bd_cut", domain=[bc, y, t, j])
+OF_olsp = Equation(m, name="OF_olsp", type="regular")
+
+# Define the investment part of the OLMP and return its equations
+def define_olmp_investment(ess_inv):
     # Original objective function and limit on investment costs
-    OF_olmp[...] = min_inv_cost_wc == Sum(y, (1.0 / power(1.0 + kappa, y.val - 1)) * ((rho_y[y] / (1.0 + kappa)) + \
+    OF_olmp[...] = min_inv_cost_wc == Sum(y, delta_y[y] * ((rho_y[y] / (1.0 + kappa)) + \
                      Sum(lc, IL_l[lc] * vL_ly[lc, y])))
-    con_1c[...] = Sum(lc, Sum(y, (1.0 / power(1.0 + kappa, y.val - 1)) * IL_l[lc] * vL_ly[lc, y])) <= IT
+    con_1c[...] = Sum(lc, Sum(y, delta_y[y] * IL_l[lc] * vL_ly[lc, y])) <= IT
 
     # Modified objective function with ESS investment costs
-    OF_olmp_ess[...] = min_inv_cost_wc == Sum(y, (1.0 / power(1.0 + kappa, y.val - 1)) * (((rho_y[y]+Sum(sc, vS_sy_prev[sc,y]*sigma_s[sc]*IS_s[sc])) / (1.0 + kappa)) + \
+    OF_olmp_ess[...] = min_inv_cost_wc == Sum(y, delta_y[y] * (((rho_y[y]+Sum(sc, vS_sy_prev[sc,y]*sigma_s[sc]*IS_s[sc])) / (1.0 + kappa)) + \
                     Sum(lc, IL_l[lc] * vL_ly[lc, y]) + Sum(sc, IS_s[sc] * vS_sy[sc, y])))
-    con_1c_ess[...] = Sum(y, (1.0 / power(1.0 + kappa, y.val - 1)) * (Sum(lc, IL_l[lc] * vL_ly[lc, y]) + Sum(sc, IS_s[sc] * vS_sy[sc, y]))) <= IT
+    con_1c_ess[...] = Sum(y, delta_y[y] * (Sum(lc, IL_l[lc] * vL_ly[lc, y]) + Sum(sc, IS_s[sc] * vS_sy[sc, y]))) <= IT
 
     con_1d[lc] = Sum(y, vL_ly[lc, y]) <= 1
     con_1e[lc, y] = vL_ly_prev[lc, y] == Sum(yp.where[yp.val <= y.val], vL_ly[lc, yp])
 
-    con_4c[y, j].where[jr] = rho_y[y] >= Sum(t, sigma_yt[y, t] * Sum(h, tau_yth[y, t, h] * (Sum(g, CG_gyi[g,y,j] * pG_gythi[g, y, t, h, j]) \
-    + Sum(r, CR_r[r] * (gammaR_ryth[r, y, t, h] * PR_ryi[r,y,j] - pR_rythi[r, y, t, h, j])) \
-    + Sum(d, CLS_d[d] * pLS_dythi[d, y, t, h, j]))))
-    con_4d[n, y, t, h, j].where[jr] = Sum(g.where[g_n[g, n]], pG_gythi[g, y, t, h, j]) + Sum(r.where[r_n[r, n]], pR_rythi[r, y, t, h, j]) \
-    + Sum(l.where[rel_n[l, n]], pL_lythi[l, y, t, h, j]) - Sum(l.where[sel_n[l, n]], pL_lythi[l, y, t, h, j]) \
-    + Sum(s.where[s_n[s, n]], pSD_sythi[s, y, t, h, j] - pSC_sythi[s, y, t, h, j]) \
-    == Sum(d.where[d_n[d, n]], gammaD_dyth[d, y, t, h] * PD_dyi[d,y,j] - pLS_dythi[d, y, t, h, j])
-    con_4e[le, y, t, h, j].where[jr] = pL_lythi[le, y, t, h, j] == (1.0 / X_l[le]) * (Sum(n.where[sel_n[le, n]], theta_nythi[n, y, t, h, j]) \
-    - Sum(n.where[rel_n[le, n]], theta_nythi[n, y, t, h, j]))
-    con_4f_lin1[lc, y, t, h, j].where[jr] = pL_lythi[lc, y, t, h, j] - (1 / X_l[lc]) * (Sum(n.where[sel_n[lc, n]], theta_nythi[n, y, t, h, j]) \
-    - Sum(n.where[rel_n[lc, n]], theta_nythi[n, y, t, h, j])) <= (1 - vL_ly_prev[lc, y]) * FL
-    con_4f_lin2[lc, y, t, h, j].where[jr] = pL_lythi[lc, y, t, h, j] - (1 / X_l[lc]) * (Sum(n.where[sel_n[lc, n]], theta_nythi[n, y, t, h, j]) \
-    - Sum(n.where[rel_n[lc, n]], theta_nythi[n, y, t, h, j])) >= -(1 - vL_ly_prev[lc, y]) * FL
-    con_4g_exist_lin1[le, y, t, h, j].where[jr] = pL_lythi[le, y, t, h, j] <= PL_l[le]
-    con_4g_exist_lin2[le, y, t, h, j].where[jr] = pL_lythi[le, y, t, h, j] >= -PL_l[le]
-    con_4g_can_lin1[lc, y, t, h, j].where[jr] = pL_lythi[lc, y, t, h, j] <= vL_ly_prev[lc, y] * PL_l[lc]
-    con_4g_can_lin2[lc, y, t, h, j].where[jr] = pL_lythi[lc, y, t, h, j] >= -vL_ly_prev[lc, y] * PL_l[lc]
-    con_4h[se, y, t, j].where[jr] = eS_sythi[se, y, t, 1, j] == ES_syt0[se,y,t] + (pSC_sythi[se, y, t, 1, j] * etaSC_s[se] \
+    # Each candidate ESS is built at most once
+    con_4v1[sc] = Sum(y, vS_sy[sc, y]) <= 1
+    con_4v2[sc, y] = vS_sy_prev[sc, y] == Sum(yp.where[yp.val <= y.val], vS_sy[sc, yp])
+    # Only one candidate ESS may be built per bus
+    con_4q_ess[n] = Sum(y, Sum(s_n[sc, n], vS_sy[sc,y])) <= 1
+
+    olmp_eqns = [OF_olmp, con_1c, con_1d, con_1e]
+    olmp_ess_eqns = [OF_olmp_ess, con_1c_ess, con_1d, con_1e, con_4v1, con_4v2, con_4q_ess]
+    return olmp_ess_eqns if ess_inv else olmp_eqns
+
+# Define the operational blocks of the OLMP for the iterations in jr and return their equations
+# year_rd further restricts them to some years and RDs, the Benders subproblems generate a single (y, t, j) block with it
+def define_olmp_blocks(ess_inv, jr, year_rd=None):
+    block = jr if year_rd is None else jr & year_rd
+    hmax = int(nb_H.toValue())
+
+    con_4d[n, y, t, h, j].where[block] = Sum(g_n[g, n], pG_gythi[g, y, t, h, j]) + Sum(r_n[r, n], pR_rythi[r, y, t, h, j]) \
+    - Sum(l_n[l, n], A_ln[l, n] * pL_lythi[l, y, t, h, j]) \
+    + Sum(s_n[s, n], pSD_sythi[s, y, t, h, j] - pSC_sythi[s, y, t, h, j]) \
+    == Sum(d_n[d, n], gammaD_dyth[d, y, t, h] * PD_dyi[d,y,j] - pLS_dythi[d, y, t, h, j])
+    con_4e[le, y, t, h, j].where[block] = pL_lythi[le, y, t, h, j] == (1.0 / X_l[le]) * Sum(l_n[le, n], A_ln[le, n] * theta_nythi[n, y, t, h, j])
+    con_4f_lin1[lc, y, t, h, j].where[block] = pL_lythi[lc, y, t, h, j] - (1 / X_l[lc]) * Sum(l_n[lc, n], A_ln[lc, n] * theta_nythi[n, y, t, h, j]) <= (1 - vL_ly_prev[lc, y]) * FL_l[lc]
+    con_4f_lin2[lc, y, t, h, j].where[block] = pL_lythi[lc, y, t, h, j] - (1 / X_l[lc]) * Sum(l_n[lc, n], A_ln[lc, n] * theta_nythi[n, y, t, h, j]) >= -(1 - vL_ly_prev[lc, y]) * FL_l[lc]
+    con_4g_exist_lin1[le, y, t, h, j].where[block] = pL_lythi[le, y, t, h, j] <= PL_l[le]
+    con_4g_exist_lin2[le, y, t, h, j].where[block] = pL_lythi[le, y, t, h, j] >= -PL_l[le]
+    con_4g_can_lin1[lc, y, t, h, j].where[block] = pL_lythi[lc, y, t, h, j] <= vL_ly_prev[lc, y] * PL_l[lc]
+    con_4g_can_lin2[lc, y, t, h, j].where[block] = pL_lythi[lc, y, t, h, j] >= -vL_ly_prev[lc, y] * PL_l[lc]
+    con_4h[se, y, t, j].where[block] = eS_sythi[se, y, t, 1, j] == ES_syt0[se,y,t] + (pSC_sythi[se, y, t, 1, j] * etaSC_s[se] \
     - (pSD_sythi[se, y, t, 1, j] / etaSD_s[se])) * tau_yth[y, t, 1]
-    con_4h_ess[sc,y,t,j].where[jr] = eS_sythi[sc, y, t, 1, j] == eS_syt0_ess[sc,y,t] + (pSC_sythi[sc, y, t, 1, j] * etaSC_s[sc] \
+    con_4h_ess[sc,y,t,j].where[block] = eS_sythi[sc, y, t, 1, j] == eS_syt0_ess[sc,y,t] + (pSC_sythi[sc, y, t, 1, j] * etaSC_s[sc] \
     - (pSD_sythi[sc, y, t, 1, j] / etaSD_s[sc])) * tau_yth[y, t, 1]
-    con_4h_ess0[sc,y,t] = eS_syt0_ess[sc,y,t] == vS_sy_prev[sc,y]*ES_syt0[sc,y,t]
-    con_4i[se, y, t, h, j].where[jr & (Ord(h) > 1)] = eS_sythi[se, y, t, h, j] == eS_sythi[se, y, t, h.lag(1), j] \
+    if year_rd is None:
+        con_4h_ess0[sc,y,t] = eS_syt0_ess[sc,y,t] == vS_sy_prev[sc,y]*ES_syt0[sc,y,t]
+    else:
+        con_4h_ess0[sc,y,t].where[year_rd] = eS_syt0_ess[sc,y,t] == vS_sy_prev[sc,y]*ES_syt0[sc,y,t]
+    con_4i[se, y, t, h, j].where[block & (Ord(h) > 1)] = eS_sythi[se, y, t, h, j] == eS_sythi[se, y, t, h.lag(1), j] \
     + (pSC_sythi[se, y, t, h, j] * etaSC_s[se] - (pSD_sythi[se, y, t, h, j] / etaSD_s[se])) * tau_yth[y, t, h]
-    con_4i_ess[sc, y, t, h, j].where[jr & (Ord(h) > 1)] = eS_sythi[sc, y, t, h, j] == eS_sythi[sc, y, t, h.lag(1), j] \
+    con_4i_ess[sc, y, t, h, j].where[block & (Ord(h) > 1)] = eS_sythi[sc, y, t, h, j] == eS_sythi[sc, y, t, h.lag(1), j] \
     + (pSC_sythi[sc, y, t, h, j] * etaSC_s[sc] - (pSD_sythi[sc, y, t, h, j] / etaSD_s[sc])) * tau_yth[y, t, h]
 
-    con_4j[se, y, t, j].where[jr] =  eS_sythi[se, y, t, hmax, j] >= ES_syt0[se, y, t]
-    con_4k1[se, y, t, h, j].where[jr] = eS_sythi[se, y, t, h, j] <= ES_s_max[se]
-    con_4k2[se, y, t, h, j].where[jr] = eS_sythi[se, y, t, h, j] >= ES_s_min[se]
-    con_4j_ess[sc, y, t, j].where[jr] = eS_sythi[sc, y, t, hmax, j] >= vS_sy_prev[sc,y] * ES_syt0[sc, y, t]
-    con_4k1_ess[sc, y, t, h, j].where[jr] = eS_sythi[sc, y, t, h, j] <= vS_sy_prev[sc,y] * ES_s_max[sc]
-    con_4k2_ess[sc, y, t, h, j].where[jr] = eS_sythi[sc, y, t, h, j] >= vS_sy_prev[sc,y] * ES_s_min[sc]
+    con_4j[se, y, t, j].where[block] =  eS_sythi[se, y, t, hmax, j] >= ES_syt0[se, y, t]
+    con_4k1[se, y, t, h, j].where[block] = eS_sythi[se, y, t, h, j] <= ES_s_max[se]
+    con_4k2[se, y, t, h, j].where[block] = eS_sythi[se, y, t, h, j] >= ES_s_min[se]
+    con_4j_ess[sc, y, t, j].where[block] = eS_sythi[sc, y, t, hmax, j] >= vS_sy_prev[sc,y] * ES_syt0[sc, y, t]
+    con_4k1_ess[sc, y, t, h, j].where[block] = eS_sythi[sc, y, t, h, j] <= vS_sy_prev[sc,y] * ES_s_max[sc]
+    con_4k2_ess[sc, y, t, h, j].where[block] = eS_sythi[sc, y, t, h, j] >= vS_sy_prev[sc,y] * ES_s_min[sc]
     # Original constraints for avoiding simultaneous charging and discharging, max and min charging/discharging power
-    con_4m[s, y, t, h, j].where[jr] = pSC_sythi[s, y, t, h, j] <= uS_sythi[s, y, t, h, j] * PSC_s[s]
-    con_4n[s, y, t, h, j].where[jr] = pSD_sythi[s, y, t, h, j] <= (1 - uS_sythi[s, y, t, h, j]) * PSD_s[s]
+    con_4m[s, y, t, h, j].where[block] = pSC_sythi[s, y, t, h, j] <= uS_sythi[s, y, t, h, j] * PSC_s[s]
+    con_4n[s, y, t, h, j].where[block] = pSD_sythi[s, y, t, h, j] <= (1 - uS_sythi[s, y, t, h, j]) * PSD_s[s]
 
     # Modified constraints for avoiding simultaneous charging and discharging, max and min charging/discharging power
-    con_4v1[sc] = Sum(y, vS_sy[sc, y]) <= 1
-    con_4v2[sc, y] = vS_sy_prev[sc, y] == Sum(yp.where[yp.val <= y.val], vS_sy[sc, yp])
-    con_4ess_lin1[s, y, t, h, j].where[jr] = alphaS_sythi[s, y, t, h, j] <= vS_sy_prev[s, y]
-    con_4ess_lin2[s, y, t, h, j].where[jr] = alphaS_sythi[s, y, t, h, j] <= uS_sythi[s, y, t, h, j]
-    con_4ess_lin3[s, y, t, h, j].where[jr] = alphaS_sythi[s, y, t, h, j] >= vS_sy_prev[s, y] + uS_sythi[s, y, t, h, j] - 1
-    con_4m_ess[s, y, t, h, j].where[jr] = pSC_sythi[s, y, t, h, j] <= alphaS_sythi[s,y,t,h,j] * PSC_s[s]
-    con_4n_ess[s, y, t, h, j].where[jr] = pSD_sythi[s, y, t, h, j] <= (vS_sy_prev[s,y] - alphaS_sythi[s,y,t,h,j]) * PSD_s[s]
-
-    con_4o[d, y, t, h, j].where[jr] = pLS_dythi[d, y, t, h, j] <= gammaD_dyth[d, y, t, h] * PD_dyi[d,y,j]  # pD_dy[D,Y]
-    con_4q1[g, y, t, h, j].where[jr] = pG_gythi[g, y, t, h, j] <= uG_gythi[g, y, t, h, j] * PG_gyi[g,y,j]  # pG_gy[G,Y]
-    con_4q2[g, y, t, h, j].where[jr] = pG_gythi[g, y, t, h, j] >= uG_gythi[g, y, t, h, j] * PG_g_min[g]
-    con_4r1[g, y, t, h, j].where[jr & (Ord(h) > 1)] = pG_gythi[g, y, t, h, j] - pG_gythi[g, y, t, h.lag(1), j] <= RGU_g[g]
-    con_4r2[g, y, t, h, j].where[jr & (Ord(h) > 1)] = pG_gythi[g, y, t, h, j] - pG_gythi[g, y, t, h.lag(1), j] >= -RGD_g[g]
-    con_4s[r, y, t, h, j].where[jr] = pR_rythi[r, y, t, h, j] <= gammaR_ryth[r, y, t, h] * PR_ryi[r,y,j]  # pR_ry[R,Y]
-    con_4t[y, t, h, j].where[jr] = theta_nythi[1, y, t, h, j] == 0
+    con_4ess_lin1[s, y, t, h, j].where[block] = alphaS_sythi[s, y, t, h, j] <= vS_sy_prev[s, y]
+    con_4ess_lin2[s, y, t, h, j].where[block] = alphaS_sythi[s, y, t, h, j] <= uS_sythi[s, y, t, h, j]
+    con_4ess_lin3[s, y, t, h, j].where[block] = alphaS_sythi[s, y, t, h, j] >= vS_sy_prev[s, y] + uS_sythi[s, y, t, h, j] - 1
+    con_4m_ess[s, y, t, h, j].where[block] = pSC_sythi[s, y, t, h, j] <= alphaS_sythi[s,y,t,h,j] * PSC_s[s]
+    con_4n_ess[s, y, t, h, j].where[block] = pSD_sythi[s, y, t, h, j] <= (vS_sy_prev[s,y] - alphaS_sythi[s,y,t,h,j]) * PSD_s[s]
+
+    con_4o[d, y, t, h, j].where[block] = pLS_dythi[d, y, t, h, j] <= gammaD_dyth[d, y, t, h] * PD_dyi[d,y,j]  # pD_dy[D,Y]
+    con_4q1[g, y, t, h, j].where[block] = pG_gythi[g, y, t, h, j] <= uG_gythi[g, y, t, h, j] * PG_gyi[g,y,j]  # pG_gy[G,Y]
+    con_4q2[g, y, t, h, j].where[block] = pG_gythi[g, y, t, h, j] >= uG_gythi[g, y, t, h, j] * PG_g_min[g]
+    con_4r1[g, y, t, h, j].where[block & (Ord(h) > 1)] = pG_gythi[g, y, t, h, j] - pG_gythi[g, y, t, h.lag(1), j] <= RGU_g[g]
+    con_4r2[g, y, t, h, j].where[block & (Ord(h) > 1)] = pG_gythi[g, y, t, h, j] - pG_gythi[g, y, t, h.lag(1), j] >= -RGD_g[g]
+    con_4s[r, y, t, h, j].where[block] = pR_rythi[r, y, t, h, j] <= gammaR_ryth[r, y, t, h] * PR_ryi[r,y,j]  # pR_ry[R,Y]
+    con_4t[y, t, h, j].where[block] = theta_nythi[1, y, t, h, j] == 0
+
+    olmp_eqns = [con_4d, con_4e, con_4f_lin1, con_4f_lin2, con_4g_exist_lin1, con_4g_exist_lin2, con_4g_can_lin1, con_4g_can_lin2,
+             con_4h, con_4i, con_4j, con_4k1, con_4k2, con_4m, con_4n, con_4o, con_4q1, con_4q2, con_4r1, con_4r2, con_4s, con_4t]
+    olmp_ess_eqns = [con_4d, con_4e, con_4f_lin1, con_4f_lin2, con_4g_exist_lin1, con_4g_exist_lin2, con_4g_can_lin1, con_4g_can_lin2,
+                 con_4h, con_4h_ess, con_4h_ess0, con_4i, con_4i_ess, con_4j, con_4k1, con_4k2, con_4j_ess, con_4k1_ess, con_4k2_ess,
+                 con_4m, con_4n, con_4m_ess, con_4n_ess, con_4o, con_4q1, con_4q2, con_4r1, con_4r2, con_4s, con_4t,
+                 con_4ess_lin1, con_4ess_lin2, con_4ess_lin3]
+    return olmp_ess_eqns if ess_inv else olmp_eqns
+
+# The operational block of each outer loop iteration is only generated for the iterations in ir
+def build_olmp_eqns(ess_inv):
+    jr = ir[j]
+    con_4c[y, j].where[jr] = rho_y[y] >= Sum(t, sigma_yt[y, t] * Sum(h, tau_yth[y, t, h] * (Sum(g, CG_gyi[g,y,j] * pG_gythi[g, y, t, h, j]) \
+    + Sum(r, CR_r[r] * (gammaR_ryth[r, y, t, h] * PR_ryi[r,y,j] - pR_rythi[r, y, t, h, j])) \
+    + Sum(d, CLS_d[d] * pLS_dythi[d, y, t, h, j]))))
 
-    # Only one candidate ESS may be built per bus
-    con_4q_ess[n] = Sum(y, Sum(sc.where[s_n[sc,n]], vS_sy[sc,y])) <= 1
-
-    olmp_eqns = [OF_olmp, con_1c, con_1d, con_1e, con_4c, con_4d, con_4e, con_4f_lin1, con_4f_lin2, con_4g_exist_lin1,
-             con_4g_exist_lin2, con_4g_can_lin1, con_4g_can_lin2, con_4h, con_4i, con_4j, con_4k1, con_4k2, con_4m,
-             con_4n, con_4o, con_4q1, con_4q2, con_4r1, con_4r2, con_4s, con_4t]
-    olmp_ess_eqns = [OF_olmp_ess, con_1c_ess, con_1d, con_1e, con_4c, con_4d, con_4e, con_4f_lin1, con_4f_lin2, con_4g_exist_lin1,
-                 con_4g_exist_lin2, con_4g_can_lin1, con_4g_can_lin2, con_4h, con_4h_ess, con_4h_ess0, con_4i, con_4i_ess,
-                 con_4j, con_4k1, con_4k2, con_4j_ess, con_4k1_ess, con_4k2_ess, con_4m, con_4n, con_4m_ess,
-                 con_4n_ess, con_4o, con_4q1, con_4q2, con_4r1, con_4r2, con_4s, con_4t, con_4v1, con_4v2, con_4q_ess, con_4ess_lin1, con_4ess_lin2, con_4ess_lin3]
-    eqns = olmp_ess_eqns if ess_inv else olmp_eqns
+    eqns = define_olmp_investment(ess_inv) + [con_4c] + define_olmp_blocks(ess_inv, jr)
     OLMP_model = Model(
         m,
         name="OLMP",
@@ -378,6 +443,45 @@ def build_olmp_eqns(ess_inv, i_range):
     )
     return OLMP_model
 
+# Benders master of the OLMP: the investments and one operating cost per (y, t, j) block, bounded by the cuts of the active iterations
+def build_olmp_master_eqns(ess_inv):
+    jr = ir[j]
+    con_bd_rho[y, j].where[jr] = rho_y[y] >= Sum(t, theta_ytj[y, t, j])
+    con_bd_cut[bc, y, t, j].where[cut_ytj[bc, y, t, j] & jr] = cut_theta[bc] * theta_ytj[y, t, j] >= cut_const[bc] \
+    + Sum(lc, cut_vL[bc, lc] * vL_ly_prev[lc, y]) + Sum(s, cut_vS[bc, s] * vS_sy_prev[s, y])
+
+    eqns = define_olmp_investment(ess_inv) + [con_bd_rho, con_bd_cut]
+    OLMP_model = Model(
+        m,
+        name="OLMP_master",
+        description="Benders master of the outer-loop master problem",
+        equations=eqns,
+        problem='MIP',
+        sense='min',
+        objective=min_inv_cost_wc,
+    )
+    return OLMP_model
+
+# Benders subproblem of the OLMP: the operating cost of the block (y, t, j) in yb, tb and jb at fixed investments
+# problem is 'MIP' for the cost of the block and 'RMIP' for the LP relaxation giving the subgradient
+def build_olsp_eqns(ess_inv, problem):
+    year_rd = yb[y] & tb[t]
+    OF_olsp[...] = min_op_cost_y == Sum(Domain(y, t, j).where[jb[j] & year_rd], sigma_yt[y, t] * Sum(h, tau_yth[y, t, h] * (Sum(g, CG_gyi[g,y,j] * pG_gythi[g, y, t, h, j]) \
+    + Sum(r, CR_r[r] * (gammaR_ryth[r, y, t, h] * PR_ryi[r,y,j] - pR_rythi[r, y, t, h, j])) \
+    + Sum(d, CLS_d[d] * pLS_dythi[d, y, t, h, j]))))
+
+    eqns = [OF_olsp] + define_olmp_blocks(ess_inv, jb[j], year_rd)
+    OLSP_model = Model(
+        m,
+        name="OLSP" if problem == 'MIP' else "OLSP_LP",
+        description="Benders subproblem of the outer-loop master problem",
+        equations=eqns,
+        problem=problem,
+        sense='min',
+        objective=min_op_cost_y,
+    )
+    return OLSP_model
+
 ## Outer-loop subproblem
 # Inner-loop master problem OF and constraints
 # OF_ilmp = Equation(m, name="OF_ilmp", type="regular")
@@ -393,7 +497,7 @@ con_2m = Equation(m, name="con_2m")
 con_2n = Equation(m, name="con_2n")
 
 # con_5c = Equation(m, name="con_5c")
-# con_5c[...] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * pD_dy[d,yi] * Sum(n.where[d_n[d,n]], lambdaN_nyth[n,yi,t,h])) - \
+# con_5c[...] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * pD_dy[d,yi] * Sum(d_n[d, n], lambdaN_nyth[n,yi,t,h])) - \
 #                           Sum(l, PL_l[l] * (muL_lyth_lo[l,yi,t,h] + muL_lyth_up[l,yi,t,h])) - \
 con_5c_lin_a = Equation(m, name="con_5c_lin_a", domain=[k])
 con_5c_lin_a_ess = Equation(m, name="con_5c_lin_a_ess", domain=[k])
@@ -436,10 +540,10 @@ def build_ilmp_eqns(yi, v_range, ess_inv):
     kr = (Ord(k) >= vmin) & (Ord(k) <= vmax)
     hmax = int(nb_H.toValue())
 
-    con_2b[g] = cG_gy[g, yi] == CG_g_fc[g] * power(1 + zetaGC_g_fc[g], yi - 1) + CG_g_max[g] * power(1 + zetaGC_g_max[g], yi - 1) * zGC_gy[g, yi]
-    con_2c[d] = pD_dy[d, yi] == PD_d_fc[d] * power(1 + zetaD_d_fc[d], yi - 1) + PD_d_max[d] * power(1 + zetaD_d_max[d], yi - 1) * zD_dy[d, yi]
-    con_2d[g] = pG_gy[g, yi] == PG_g_fc[g] * power(1 + zetaGP_g_fc[g], yi - 1) - PG_g_max[g] * power(1 + zetaGP_g_max[g], yi - 1) * zGP_gy[g, yi]
-    con_2e[r] = pR_ry[r, yi] == PR_r_fc[r] * power(1 + zetaR_r_fc[r], yi - 1) - PR_r_max[r] * power(1 + zetaR_r_max[r], yi - 1) * zR_ry[r, yi]
+    con_2b[g] = cG_gy[g, yi] == CG_gy_fc[g, yi] + CG_gy_max[g, yi] * zGC_gy[g, yi]
+    con_2c[d] = pD_dy[d, yi] == PD_dy_fc[d, yi] + PD_dy_max[d, yi] * zD_dy[d, yi]
+    con_2d[g] = pG_gy[g, yi] == PG_gy_fc[g, yi] - PG_gy_max[g, yi] * zGP_gy[g, yi]
+    con_2e[r] = pR_ry[r, yi] == PR_ry_fc[r, yi] - PR_ry_max[r, yi] * zR_ry[r, yi]
     con_2j[...] = Sum(g, zGC_gy[g, yi]) <= GammaGC
     con_2k[...] = Sum(d, zD_dy[d, yi]) <= GammaD
     con_2l[...] = Sum(g, zGP_gy[g, yi]) <= GammaGP
@@ -447,73 +551,69 @@ def build_ilmp_eqns(yi, v_range, ess_inv):
     con_2n[...] = Sum(rw, zR_ry[rw, yi]) <= GammaRW
 
     ilmp_obj_var[...] = xi == xi_y[yi]
-    con_5c_lin_a[k].where[kr] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * (PD_d_fc[d] * power(1+zetaD_d_fc[d], yi-1) \
-    * Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,k]) + PD_d_max[d] * power(1+zetaD_d_max[d], yi-1) * alphaD_dythv[d,yi,t,h,k])) \
+    con_5c_lin_a[k].where[kr] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * (PD_dy_fc[d,yi] \
+    * Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,k]) + PD_dy_max[d,yi] * alphaD_dythv[d,yi,t,h,k])) \
     - Sum(l, PL_l[l]*(muL_lythv_lo[l,yi,t,h,k] + muL_lythv_up[l,yi,t,h,k])) \
     - Sum(s, US_sythv[s,yi,t,h,k]*PSC_s[s]*muSC_sythv_up[s,yi,t,h,k] + (1-US_sythv[s,yi,t,h,k])*PSD_s[s]*muSD_sythv_up[s,yi,t,h,k] - ES_s_min[s]*muS_sythv_lo[s,yi,t,h,k] + ES_s_max[s]*muS_sythv_up[s,yi,t,h,k]) \
-    + Sum(g, UG_gythv[g,yi,t,h,k] * (PG_g_min[g] * muG_gythv_lo[g,yi,t,h,k] - (PG_g_fc[g] * power(1-zetaGP_g_fc[g], yi-1) * muG_gythv_up[g,yi,t,h,k] - PG_g_max[g] * power(1+zetaGP_g_max[g], yi-1) * alphaGP_gythv_up[g,yi,t,h,k]))) \
-    - Sum(r, gammaR_ryth[r,yi,t,h] * (PR_r_fc[r] * power(1+zetaR_r_fc[r], yi-1) * muR_rythv_up[r,yi,t,h,k] - PR_r_max[r] * power(1+zetaR_r_max[r], yi-1) * alphaR_rythv_up[r,yi,t,h,k])) \
-    + Sum(r, sigma_yt[yi,t]*tau_yth[yi,t,h]*CR_r[r]*gammaR_ryth[r,yi,t,h]*(PR_r_fc[r]*power(1+zetaR_r_fc[r], yi-1) - PR_r_max[r]*power(1+zetaR_r_max[r], yi-1) * zR_ry[r,yi])) \
-    - Sum(d, gammaD_dyth[d,yi,t,h] * (PD_d_fc[d] * power(1+zetaD_d_fc[d], yi-1) * muD_dythv_up[d,yi,t,h,k] + PD_d_max[d] * power(1+zetaD_d_max[d], yi-1) * alphaD_dythv_up[d,yi,t,h,k]))) \
+    + Sum(g, UG_gythv[g,yi,t,h,k] * (PG_g_min[g] * muG_gythv_lo[g,yi,t,h,k] - (PG_gy_fc_dec[g,yi] * muG_gythv_up[g,yi,t,h,k] - PG_gy_max[g,yi] * alphaGP_gythv_up[g,yi,t,h,k]))) \
+    - Sum(r, gammaR_ryth[r,yi,t,h] * (PR_ry_fc[r,yi] * muR_rythv_up[r,yi,t,h,k] - PR_ry_max[r,yi] * alphaR_rythv_up[r,yi,t,h,k])) \
+    + Sum(r, sigma_yt[yi,t]*tau_yth[yi,t,h]*CR_r[r]*gammaR_ryth[r,yi,t,h]*(PR_ry_fc[r,yi] - PR_ry_max[r,yi] * zR_ry[r,yi])) \
+    - Sum(d, gammaD_dyth[d,yi,t,h] * (PD_dy_fc[d,yi] * muD_dythv_up[d,yi,t,h,k] + PD_dy_max[d,yi] * alphaD_dythv_up[d,yi,t,h,k]))) \
     + Sum(s, ES_syt0[s,yi,t]*(PhiS_sytv[s,yi,t,k] + PhiS_sytv_lo[s,yi,t,k])) \
     - Sum(h.where[Ord(h) > 1], Sum(g, RGD_g[g]*muGD_gythv[g,yi,t,h,k] + RGU_g[g]*muGU_gythv[g,yi,t,h,k])))
-    con_5c_lin_a_ess[k].where[kr] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * (PD_d_fc[d] * power(1+zetaD_d_fc[d], yi-1) \
-    * Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,k]) + PD_d_max[d] * power(1+zetaD_d_max[d], yi-1) * alphaD_dythv[d,yi,t,h,k])) \
+    con_5c_lin_a_ess[k].where[kr] = xi_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h] * (PD_dy_fc[d,yi] \
+    * Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,k]) + PD_dy_max[d,yi] * alphaD_dythv[d,yi,t,h,k])) \
     - Sum(l, PL_l[l]*(muL_lythv_lo[l,yi,t,h,k] + muL_lythv_up[l,yi,t,h,k])) \
     - Sum(s, VS_syj_prev[s,yi]*(US_sythv[s,yi,t,h,k]*PSC_s[s]*muSC_sythv_up[s,yi,t,h,k] + (1-US_sythv[s,yi,t,h,k])*PSD_s[s]*muSD_sythv_up[s,yi,t,h,k] - ES_s_min[s]*muS_sythv_lo[s,yi,t,h,k] + ES_s_max[s]*muS_sythv_up[s,yi,t,h,k])) \
-    + Sum(g, UG_gythv[g,yi,t,h,k] * (PG_g_min[g] * muG_gythv_lo[g,yi,t,h,k] - (PG_g_fc[g] * power(1-zetaGP_g_fc[g], yi-1) * muG_gythv_up[g,yi,t,h,k] - PG_g_max[g] * power(1+zetaGP_g_max[g], yi-1) * alphaGP_gythv_up[g,yi,t,h,k]))) \
-    - Sum(r, gammaR_ryth[r,yi,t,h] * (PR_r_fc[r] * power(1+zetaR_r_fc[r], yi-1) * muR_rythv_up[r,yi,t,h,k] - PR_r_max[r] * power(1+zetaR_r_max[r], yi-1) * alphaR_rythv_up[r,yi,t,h,k])) \
-    + Sum(r, sigma_yt[yi,t]*tau_yth[yi,t,h]*CR_r[r]*gammaR_ryth[r,yi,t,h]*(PR_r_fc[r]*power(1+zetaR_r_fc[r], yi-1) - PR_r_max[r]*power(1+zetaR_r_max[r], yi-1) * zR_ry[r,yi])) \
-    - Sum(d, gammaD_dyth[d,yi,t,h] * (PD_d_fc[d] * power(1+zetaD_d_fc[d], yi-1) * muD_dythv_up[d,yi,t,h,k] + PD_d_max[d] * power(1+zetaD_d_max[d], yi-1) * alphaD_dythv_up[d,yi,t,h,k]))) \
+    + Sum(g, UG_gythv[g,yi,t,h,k] * (PG_g_min[g] * muG_gythv_lo[g,yi,t,h,k] - (PG_gy_fc_dec[g,yi] * muG_gythv_up[g,yi,t,h,k] - PG_gy_max[g,yi] * alphaGP_gythv_up[g,yi,t,h,k]))) \
+    - Sum(r, gammaR_ryth[r,yi,t,h] * (PR_ry_fc[r,yi] * muR_rythv_up[r,yi,t,h,k] - PR_ry_max[r,yi] * alphaR_rythv_up[r,yi,t,h,k])) \
+    + Sum(r, sigma_yt[yi,t]*tau_yth[yi,t,h]*CR_r[r]*gammaR_ryth[r,yi,t,h]*(PR_ry_fc[r,yi] - PR_ry_max[r,yi] * zR_ry[r,yi])) \
+    - Sum(d, gammaD_dyth[d,yi,t,h] * (PD_dy_fc[d,yi] * muD_dythv_up[d,yi,t,h,k] + PD_dy_max[d,yi] * alphaD_dythv_up[d,yi,t,h,k]))) \
     + Sum(s, VS_syj_prev[s,yi]*ES_syt0[s,yi,t]*(PhiS_syt0v[s,yi,t,k] + PhiS_sytv_lo[s,yi,t,k])) \
     - Sum(h.where[Ord(h) > 1], Sum(g, RGD_g[g]*muGD_gythv[g,yi,t,h,k] + RGU_g[g]*muGU_gythv[g,yi,t,h,k])))
-    con_5c_lin_b1[d, t, h, k].where[kr] = alphaD_dythv[d, yi, t, h, k] <= zD_dy[d, yi] * FD
-    con_5c_lin_b2[d, t, h, k].where[kr] = alphaD_dythv[d, yi, t, h, k] >= -zD_dy[d, yi] * FD
-    con_5c_lin_c1[d,t,h,k].where[kr] = Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,k]) - alphaD_dythv[d,yi,t,h,k] <= (1 - zD_dy[d,yi]) * FD
-    con_5c_lin_c2[d,t,h,k].where[kr] = Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,k]) - alphaD_dythv[d,yi,t,h,k] >= -(1 - zD_dy[d,yi]) * FD
-    con_5c_lin_d[d, t, h, k].where[kr] = alphaD_dythv_up[d, yi, t, h, k] <= zD_dy[d, yi] * FD_up
-    con_5c_lin_e1[d, t, h, k].where[kr] = muD_dythv_up[d, yi, t, h, k] - alphaD_dythv_up[d, yi, t, h, k] <= (1 - zD_dy[d, yi]) * FD_up
+    con_5c_lin_b1[d, t, h, k].where[kr] = alphaD_dythv[d, yi, t, h, k] <= zD_dy[d, yi] * FD_dyth[d, yi, t, h]
+    con_5c_lin_b2[d, t, h, k].where[kr] = alphaD_dythv[d, yi, t, h, k] >= -zD_dy[d, yi] * FD_dyth[d, yi, t, h]
+    con_5c_lin_c1[d,t,h,k].where[kr] = Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,k]) - alphaD_dythv[d,yi,t,h,k] <= (1 - zD_dy[d,yi]) * FD_dyth[d, yi, t, h]
+    con_5c_lin_c2[d,t,h,k].where[kr] = Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,k]) - alphaD_dythv[d,yi,t,h,k] >= -(1 - zD_dy[d,yi]) * FD_dyth[d, yi, t, h]
+    con_5c_lin_d[d, t, h, k].where[kr] = alphaD_dythv_up[d, yi, t, h, k] <= zD_dy[d, yi] * FD_up_dyth[d, yi, t, h]
+    con_5c_lin_e1[d, t, h, k].where[kr] = muD_dythv_up[d, yi, t, h, k] - alphaD_dythv_up[d, yi, t, h, k] <= (1 - zD_dy[d, yi]) * FD_up_dyth[d, yi, t, h]
     con_5c_lin_e2[d, t, h, k].where[kr] = muD_dythv_up[d, yi, t, h, k] - alphaD_dythv_up[d, yi, t, h, k] >= 0
-    con_5c_lin_f[g, t, h, k].where[kr] = alphaGP_gythv_up[g, yi, t, h, k] <= zGP_gy[g, yi] * FG_up
-    con_5c_lin_g1[g,t,h,k].where[kr] = muG_gythv_up[g,yi,t,h,k] - alphaGP_gythv_up[g,yi,t,h,k] <= (1 - zGP_gy[g,yi]) * FG_up
+    con_5c_lin_f[g, t, h, k].where[kr] = alphaGP_gythv_up[g, yi, t, h, k] <= zGP_gy[g, yi] * FG_up_gyth[g, yi, t, h]
+    con_5c_lin_g1[g,t,h,k].where[kr] = muG_gythv_up[g,yi,t,h,k] - alphaGP_gythv_up[g,yi,t,h,k] <= (1 - zGP_gy[g,yi]) * FG_up_gyth[g, yi, t, h]
     con_5c_lin_g2[g,t,h,k].where[kr] = muG_gythv_up[g,yi,t,h,k] - alphaGP_gythv_up[g,yi,t,h,k] >= 0
-    con_5c_lin_h[r, t, h, k].where[kr] = alphaR_rythv_up[r, yi, t, h, k] <= zR_ry[r, yi] * FR_up
-    con_5c_lin_i1[r,t,h,k].where[kr] = muR_rythv_up[r,yi,t,h,k] - alphaR_rythv_up[r,yi,t,h,k] <= (1 - zR_ry[r,yi]) * FR_up
+    con_5c_lin_h[r, t, h, k].where[kr] = alphaR_rythv_up[r, yi, t, h, k] <= zR_ry[r, yi] * FR_up_ryth[r, yi, t, h]
+    con_5c_lin_i1[r,t,h,k].where[kr] = muR_rythv_up[r,yi,t,h,k] - alphaR_rythv_up[r,yi,t,h,k] <= (1 - zR_ry[r,yi]) * FR_up_ryth[r, yi, t, h]
     con_5c_lin_i2[r,t,h,k].where[kr] = muR_rythv_up[r,yi,t,h,k] - alphaR_rythv_up[r,yi,t,h,k] >= 0
 
-    con_5d[g,t,k].where[kr] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,1,k]) + muG_gythv_lo[g,yi,t,1,k]\
+    con_5d[g,t,k].where[kr] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,1,k]) + muG_gythv_lo[g,yi,t,1,k]\
     - muG_gythv_up[g,yi,t,1,k] - muGD_gythv[g,yi,t,2,k] + muGU_gythv[g,yi,t,2,k]\
     == sigma_yt[yi,t] * tau_yth[yi, t, 1] * cG_gy[g, yi]
-    con_5e[g,t,h,k].where[kr & (Ord(h)!=1) & (Ord(h)!=Card(h))] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,h,k])\
+    con_5e[g,t,h,k].where[kr & (Ord(h)!=1) & (Ord(h)!=Card(h))] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,h,k])\
     + muG_gythv_lo[g,yi,t,h,k] - muG_gythv_up[g,yi,t,h,k] + muGD_gythv[g,yi,t,h,k] - muGD_gythv[g,yi,t,h.lead(1),k]\
     - muGU_gythv[g,yi,t,h,k] + muGU_gythv[g,yi,t,h.lead(1),k] == sigma_yt[yi,t]*tau_yth[yi,t,h]*cG_gy[g, yi]
-    con_5f[g,t,k].where[kr] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,hmax,k]) +  muG_gythv_lo[g,yi,t,hmax,k]\
+    con_5f[g,t,k].where[kr] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,hmax,k]) +  muG_gythv_lo[g,yi,t,hmax,k]\
     - muG_gythv_up[g,yi,t,hmax,k] + muGD_gythv[g,yi,t,hmax,k] - muGU_gythv[g, yi, t, hmax, k]\
     == sigma_yt[yi, t] * tau_yth[yi, t, hmax] * cG_gy[g, yi]
-    con_5g[d,t,h,k].where[kr] = Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,k])-muD_dythv_up[d, yi, t, h, k]\
+    con_5g[d,t,h,k].where[kr] = Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,k])-muD_dythv_up[d, yi, t, h, k]\
     <= sigma_yt[yi, t] * tau_yth[yi, t, h] * CLS_d[d]
-    con_5h[r,t,h,k].where[kr] = Sum(n.where[r_n[r,n]], lambdaN_nythv[n,yi,t,h,k]) - muR_rythv_up[r,yi,t,h,k]\
+    con_5h[r,t,h,k].where[kr] = Sum(r_n[r, n], lambdaN_nythv[n,yi,t,h,k]) - muR_rythv_up[r,yi,t,h,k]\
     <= -sigma_yt[yi, t] * tau_yth[yi, t, h] * CR_r[r]
-    con_5i[le,t,h,k].where[kr] = Sum(n.where[rel_n[le,n]], lambdaN_nythv[n,yi,t,h,k]) - Sum(n.where[sel_n[le,n]], lambdaN_nythv[n,yi,t,h,k]) \
+    con_5i[le,t,h,k].where[kr] = -Sum(l_n[le,n], A_ln[le,n] * lambdaN_nythv[n,yi,t,h,k]) \
     + muL_lythv_exist[le, yi, t, h, k] + muL_lythv_lo[le, yi, t, h, k] - muL_lythv_up[le, yi, t, h, k] == 0
-    con_5j[lc,t,h,k].where[kr] = Sum(n.where[rel_n[lc,n]], lambdaN_nythv[n,yi,t,h,k]) - Sum(n.where[sel_n[lc,n]], lambdaN_nythv[n,yi,t,h,k]) \
+    con_5j[lc,t,h,k].where[kr] = -Sum(l_n[lc,n], A_ln[lc,n] * lambdaN_nythv[n,yi,t,h,k]) \
     + muL_lythv_can[lc,yi,t,h,k] + muL_lythv_lo[lc,yi,t,h,k] - muL_lythv_up[lc,yi,t,h,k] == 0
-    con_5k[s,t,k].where[kr] = Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,1,k])\
+    con_5k[s,t,k].where[kr] = Sum(s_n[s, n], lambdaN_nythv[n,yi,t,1,k])\
     + (tau_yth[yi,t,1]/etaSD_s[s])*PhiS_sytv[s,yi,t,k] - muSD_sythv_up[s,yi,t,1,k] <= 0
-    con_5l[s,t,h,k].where[kr & (Ord(h)>1)] = Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,h,k])\
+    con_5l[s,t,h,k].where[kr & (Ord(h)>1)] = Sum(s_n[s, n], lambdaN_nythv[n,yi,t,h,k])\
     + (tau_yth[yi,t,h]/etaSD_s[s])*muS_sythv[s,yi,t,h,k] - muSD_sythv_up[s,yi,t,h,k] <= 0
-    con_5m[s,t,k].where[kr] = -Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,1,k])\
+    con_5m[s,t,k].where[kr] = -Sum(s_n[s, n], lambdaN_nythv[n,yi,t,1,k])\
     - etaSC_s[s]*tau_yth[yi,t,1]*PhiS_sytv[s,yi,t,k] - muSC_sythv_up[s,yi,t,1,k] <= 0
-    con_5n[s,t,h,k].where[kr & (Ord(h)>1)] = -Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,h,k])\
+    con_5n[s,t,h,k].where[kr & (Ord(h)>1)] = -Sum(s_n[s, n], lambdaN_nythv[n,yi,t,h,k])\
     - etaSC_s[s]*tau_yth[yi,t,h]*muS_sythv[s,yi,t,h,k] - muSC_sythv_up[s,yi,t,h,k] <= 0
-    con_5o[n, t, h, k].where[kr & (Ord(n) > 1)] = -Sum(le.where[sel_n[le, n]], muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
-    + Sum(le.where[rel_n[le, n]], muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
-    - Sum(lc.where[sel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k])\
-    + Sum(lc.where[rel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k]) == 0
-    con_5p[n, t, h, k].where[kr & (Ord(n) == 1)] = -Sum(le.where[sel_n[le, n]], muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
-    + Sum(le.where[rel_n[le, n]], muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
-    - Sum(lc.where[sel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k])\
-    + Sum(lc.where[rel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k])\
+    con_5o[n, t, h, k].where[kr & (Ord(n) > 1)] = -Sum(l_n[le, n], A_ln[le, n] * muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
+    - Sum(l_n[lc, n], A_ln[lc, n] * (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k]) == 0
+    con_5p[n, t, h, k].where[kr & (Ord(n) == 1)] = -Sum(l_n[le, n], A_ln[le, n] * muL_lythv_exist[le, yi, t, h, k] / X_l[le])\
+    - Sum(l_n[lc, n], A_ln[lc, n] * (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, k])\
     + phiN_nythv[n, yi, t, h, k] == 0
     con_5q[s,t,k].where[kr] = PhiS_sytv[s,yi,t,k] - muS_sythv[s,yi,t,2,k] + muS_sythv_lo[s,yi,t,1,k] - muS_sythv_up[s,yi,t,1,k] == 0
     con_5r[s,t,h,k].where[kr & (Ord(h)!=1) & (Ord(h)!=Card(h))] = muS_sythv[s,yi,t,h,k] - muS_sythv[s,yi,t,h.lead(1),k] + muS_sythv_lo[s,yi,t,h,k] - muS_sythv_up[s,yi,t,h,k] == 0
@@ -576,44 +676,41 @@ con_3r = Equation(m, name="con_3r", domain=[y, t, h]) # n == ref bus
 def build_ilsp_eqns(ess_inv, yi, ji):
     hmax = int(nb_H.toValue())
 
-    OF_ilsp[...] = min_op_cost_y == Sum(t, sigma_yt[yi, t] * Sum(h, tau_yth[yi, t, h] * (Sum(g, CG_gyk[g, yi] * pG_gythi[g, yi, t, h, ji])\
+    OF_ilsp[...] = min_op_cost_y == Sum(t.where[tr[t]], sigma_yt[yi, t] * Sum(h, tau_yth[yi, t, h] * (Sum(g, CG_gyk[g, yi] * pG_gythi[g, yi, t, h, ji])\
     + Sum(r, CR_r[r] * (gammaR_ryth[r, yi, t, h] * PR_ryk[r, yi] - pR_rythi[r, yi, t, h, ji]))\
     + Sum(d, CLS_d[d] * pLS_dythi[d, yi, t, h, ji]))))
 
-    con_6b[n, t, h] = Sum(g.where[g_n[g,n]], pG_gythi[g, yi, t, h, ji]) + Sum(r.where[r_n[r,n]], pR_rythi[r, yi, t, h, ji])\
-    + Sum(l.where[rel_n[l, n]], pL_lythi[l, yi, t, h, ji])\
-    - Sum(l.where[sel_n[l, n]], pL_lythi[l, yi, t, h, ji])\
-    + Sum(s.where[s_n[s,n]], pSD_sythi[s, yi, t, h, ji] - pSC_sythi[s, yi, t, h, ji])\
-    ==Sum(d.where[d_n[d,n]], gammaD_dyth[d, yi, t, h] * PD_dyk[d, yi] - pLS_dythi[d, yi, t, h, ji])
-    con_6c[lc, t, h] = pL_lythi[lc, yi, t, h, ji] == (VL_lyj_prev[lc, yi] / X_l[lc]) * (Sum(n.where[sel_n[lc, n]], theta_nythi[n, yi, t, h, ji])\
-    - Sum(n.where[rel_n[lc, n]], theta_nythi[n, yi, t, h, ji]))
-    con_6d[d, t, h] = pLS_dythi[d, yi, t, h, ji] <= gammaD_dyth[d, yi, t, h] * PD_dyk[d, yi]
-    con_6e1[g, t, h] = pG_gythi[g, yi, t, h, ji] <= uG_gythi[g, yi, t, h, ji] * PG_gyk[g, yi]
-    con_6e2[g, t, h] = pG_gythi[g, yi, t, h, ji] >= uG_gythi[g, yi, t, h, ji] * PG_g_min[g]
-    con_6f[r, t, h] = pR_rythi[r, yi, t, h, ji] <= gammaR_ryth[r, yi, t, h] * PR_ryk[r, yi]
-
-    con_3c[le, yi, t, h] = pL_lythi[le, yi, t, h, ji] == (1.0 / X_l[le]) * (Sum(n.where[sel_n[le, n]], theta_nythi[n, yi, t, h, ji])\
-    - Sum(n.where[rel_n[le, n]], theta_nythi[n, yi, t, h, ji]))
-    con_3e1[l, yi, t, h] = pL_lythi[l, yi, t, h, ji] <= PL_l[l]
-    con_3e2[l, yi, t, h] = pL_lythi[l, yi, t, h, ji] >= -PL_l[l]
-    con_3f[se, yi, t] = eS_sythi[se, yi, t, 1, ji] == ES_syt0[se, yi, t] + (pSC_sythi[se, yi, t, 1, ji] * etaSC_s[se] - (pSD_sythi[se, yi, t, 1, ji] / etaSD_s[se])) * tau_yth[yi, t, 1]
-    con_3g[se, yi, t, h].where[Ord(h) > 1] = eS_sythi[se, yi, t, h, ji] == eS_sythi[se, yi, t, h.lag(1), ji] + (pSC_sythi[se, yi, t, h, ji] * etaSC_s[se] - (pSD_sythi[se, yi, t, h, ji] / etaSD_s[se])) * tau_yth[yi, t, h]
-    con_3f_ess[sc, yi, t] = eS_sythi[sc, yi, t, 1, ji] == (eS_syt0_ess[sc, yi, t] + (pSC_sythi[sc, yi, t, 1, ji] * etaSC_s[sc] - (pSD_sythi[sc, yi, t, 1, ji] / etaSD_s[sc])) * tau_yth[yi, t, 1])
-    con_3f_ess0[sc, yi, t] = eS_syt0_ess[sc, yi, t] == VS_syj_prev[sc, yi] * ES_syt0[sc, yi, t]
-    con_3g_ess[sc, yi, t, h].where[Ord(h) > 1] = eS_sythi[sc, yi, t, h, ji] == (eS_sythi[sc, yi, t, h.lag(1), ji] + (pSC_sythi[sc, yi, t, h, ji] * etaSC_s[sc] - (pSD_sythi[sc, yi, t, h, ji] / etaSD_s[sc])) * tau_yth[yi, t, h])
-    con_3h[se, yi, t] = eS_sythi[se, yi, t, hmax, ji] >= ES_syt0[se, yi, t]
-    con_3h_ess[sc, yi, t] = eS_sythi[sc, yi, t, hmax, ji] >= VS_syj_prev[sc,yi] * ES_syt0[sc, yi, t]
-    con_3i1[se, yi, t, h] = eS_sythi[se, yi, t, h, ji] <= ES_s_max[se]
-    con_3i2[se, yi, t, h] = eS_sythi[se, yi, t, h, ji] >= ES_s_min[se]
-    con_3i1_ess[sc, yi, t, h] = eS_sythi[sc, yi, t, h, ji] <= VS_syj_prev[sc,yi] * ES_s_max[sc]
-    con_3i2_ess[sc, yi, t, h] = eS_sythi[sc, yi, t, h, ji] >= VS_syj_prev[sc,yi] * ES_s_min[sc]
-    con_3k[se, yi, t, h] = pSC_sythi[se, yi, t, h, ji] <= uS_sythi[se, yi, t, h, ji] * PSC_s[se]
-    con_3l[se, yi, t, h] = pSD_sythi[se, yi, t, h, ji] <= (1 - uS_sythi[se, yi, t, h, ji]) * PSD_s[se]
-    con_3k_ess[sc, yi, t, h] = pSC_sythi[sc, yi, t, h, ji] <= uS_sythi[sc, yi, t, h, ji] * PSC_s[sc] * VS_syj_prev[sc,yi]
-    con_3l_ess[sc, yi, t, h] = pSD_sythi[sc, yi, t, h, ji] <= (1 - uS_sythi[sc, yi, t, h, ji]) * PSD_s[sc] * VS_syj_prev[sc,yi]
-    con_3p1[g, yi, t, h].where[Ord(h)>1] = pG_gythi[g, yi, t, h, ji] - pG_gythi[g, yi, t, h.lag(1), ji] <= RGU_g[g]
-    con_3p2[g, yi, t, h].where[Ord(h)>1] = pG_gythi[g, yi, t, h, ji] - pG_gythi[g, yi, t, h.lag(1), ji] >= -RGD_g[g]
-    con_3r[yi, t, h] = theta_nythi[1, yi, t, h, ji] == 0
+    con_6b[n, t, h].where[tr[t]] = Sum(g_n[g, n], pG_gythi[g, yi, t, h, ji]) + Sum(r_n[r, n], pR_rythi[r, yi, t, h, ji])\
+    - Sum(l_n[l, n], A_ln[l, n] * pL_lythi[l, yi, t, h, ji])\
+    + Sum(s_n[s, n], pSD_sythi[s, yi, t, h, ji] - pSC_sythi[s, yi, t, h, ji])\
+    ==Sum(d_n[d, n], gammaD_dyth[d, yi, t, h] * PD_dyk[d, yi] - pLS_dythi[d, yi, t, h, ji])
+    con_6c[lc, t, h].where[tr[t]] = pL_lythi[lc, yi, t, h, ji] == (VL_lyj_prev[lc, yi] / X_l[lc]) * Sum(l_n[lc, n], A_ln[lc, n] * theta_nythi[n, yi, t, h, ji])
+    con_6d[d, t, h].where[tr[t]] = pLS_dythi[d, yi, t, h, ji] <= gammaD_dyth[d, yi, t, h] * PD_dyk[d, yi]
+    con_6e1[g, t, h].where[tr[t]] = pG_gythi[g, yi, t, h, ji] <= uG_gythi[g, yi, t, h, ji] * PG_gyk[g, yi]
+    con_6e2[g, t, h].where[tr[t]] = pG_gythi[g, yi, t, h, ji] >= uG_gythi[g, yi, t, h, ji] * PG_g_min[g]
+    con_6f[r, t, h].where[tr[t]] = pR_rythi[r, yi, t, h, ji] <= gammaR_ryth[r, yi, t, h] * PR_ryk[r, yi]
+
+    con_3c[le, yi, t, h].where[tr[t]] = pL_lythi[le, yi, t, h, ji] == (1.0 / X_l[le]) * Sum(l_n[le, n], A_ln[le, n] * theta_nythi[n, yi, t, h, ji])
+    con_3e1[l, yi, t, h].where[tr[t]] = pL_lythi[l, yi, t, h, ji] <= PL_l[l]
+    con_3e2[l, yi, t, h].where[tr[t]] = pL_lythi[l, yi, t, h, ji] >= -PL_l[l]
+    con_3f[se, yi, t].where[tr[t]] = eS_sythi[se, yi, t, 1, ji] == ES_syt0[se, yi, t] + (pSC_sythi[se, yi, t, 1, ji] * etaSC_s[se] - (pSD_sythi[se, yi, t, 1, ji] / etaSD_s[se])) * tau_yth[yi, t, 1]
+    con_3g[se, yi, t, h].where[(Ord(h) > 1) & tr[t]] = eS_sythi[se, yi, t, h, ji] == eS_sythi[se, yi, t, h.lag(1), ji] + (pSC_sythi[se, yi, t, h, ji] * etaSC_s[se] - (pSD_sythi[se, yi, t, h, ji] / etaSD_s[se])) * tau_yth[yi, t, h]
+    con_3f_ess[sc, yi, t].where[tr[t]] = eS_sythi[sc, yi, t, 1, ji] == (eS_syt0_ess[sc, yi, t] + (pSC_sythi[sc, yi, t, 1, ji] * etaSC_s[sc] - (pSD_sythi[sc, yi, t, 1, ji] / etaSD_s[sc])) * tau_yth[yi, t, 1])
+    con_3f_ess0[sc, yi, t].where[tr[t]] = eS_syt0_ess[sc, yi, t] == VS_syj_prev[sc, yi] * ES_syt0[sc, yi, t]
+    con_3g_ess[sc, yi, t, h].where[(Ord(h) > 1) & tr[t]] = eS_sythi[sc, yi, t, h, ji] == (eS_sythi[sc, yi, t, h.lag(1), ji] + (pSC_sythi[sc, yi, t, h, ji] * etaSC_s[sc] - (pSD_sythi[sc, yi, t, h, ji] / etaSD_s[sc])) * tau_yth[yi, t, h])
+    con_3h[se, yi, t].where[tr[t]] = eS_sythi[se, yi, t, hmax, ji] >= ES_syt0[se, yi, t]
+    con_3h_ess[sc, yi, t].where[tr[t]] = eS_sythi[sc, yi, t, hmax, ji] >= VS_syj_prev[sc,yi] * ES_syt0[sc, yi, t]
+    con_3i1[se, yi, t, h].where[tr[t]] = eS_sythi[se, yi, t, h, ji] <= ES_s_max[se]
+    con_3i2[se, yi, t, h].where[tr[t]] = eS_sythi[se, yi, t, h, ji] >= ES_s_min[se]
+    con_3i1_ess[sc, yi, t, h].where[tr[t]] = eS_sythi[sc, yi, t, h, ji] <= VS_syj_prev[sc,yi] * ES_s_max[sc]
+    con_3i2_ess[sc, yi, t, h].where[tr[t]] = eS_sythi[sc, yi, t, h, ji] >= VS_syj_prev[sc,yi] * ES_s_min[sc]
+    con_3k[se, yi, t, h].where[tr[t]] = pSC_sythi[se, yi, t, h, ji] <= uS_sythi[se, yi, t, h, ji] * PSC_s[se]
+    con_3l[se, yi, t, h].where[tr[t]] = pSD_sythi[se, yi, t, h, ji] <= (1 - uS_sythi[se, yi, t, h, ji]) * PSD_s[se]
+    con_3k_ess[sc, yi, t, h].where[tr[t]] = pSC_sythi[sc, yi, t, h, ji] <= uS_sythi[sc, yi, t, h, ji] * PSC_s[sc] * VS_syj_prev[sc,yi]
+    con_3l_ess[sc, yi, t, h].where[tr[t]] = pSD_sythi[sc, yi, t, h, ji] <= (1 - uS_sythi[sc, yi, t, h, ji]) * PSD_s[sc] * VS_syj_prev[sc,yi]
+    con_3p1[g, yi, t, h].where[(Ord(h)>1) & tr[t]] = pG_gythi[g, yi, t, h, ji] - pG_gythi[g, yi, t, h.lag(1), ji] <= RGU_g[g]
+    con_3p2[g, yi, t, h].where[(Ord(h)>1) & tr[t]] = pG_gythi[g, yi, t, h, ji] - pG_gythi[g, yi, t, h.lag(1), ji] >= -RGD_g[g]
+    con_3r[yi, t, h].where[tr[t]] = theta_nythi[1, yi, t, h, ji] == 0
 
     ilsp_eqns = [OF_ilsp, con_6b, con_6c, con_6d, con_6e1, con_6e2, con_6f, con_3c, con_3e1, con_3e2, con_3f, con_3g, con_3h,
              con_3i1, con_3i2, con_3k, con_3l, con_3p1, con_3p2, con_3r]
@@ -666,11 +763,11 @@ def build_lp1_eqns(yi, v_range, ess_inv):
     hmax = int(nb_H.toValue())
 
     lp1_obj_var[...] = xiP == xiP_y[yi]
-    con_7b[g] = cG_gy[g, yi] == CG_g_fc[g] * (1 + zetaGC_g_fc)**(yi - 1) + (CG_g_max[g] * (1 + zetaGC_g_max)**(yi - 1)) * aGC_gy[g, yi]
+    con_7b[g] = cG_gy[g, yi] == CG_gy_fc[g, yi] + CG_gy_max[g, yi] * aGC_gy[g, yi]
     con_7c[g] = aGC_gy[g, yi] <= 1
     con_7d[...] = Sum(g, aGC_gy[g, yi]) <= GammaGC
 
-    con_7e[va] = xiP_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h]*PD_dyo[d,yi]*Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,va])) \
+    con_7e[va] = xiP_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h]*PD_dyo[d,yi]*Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,va])) \
     - Sum(l, PL_l[l]*(muL_lythv_lo[l,yi,t,h,va] + muL_lythv_up[l,yi,t,h,va])) \
     - Sum(s, US_sythv[s,yi,t,h,va]*PSC_s[s]*muSC_sythv_up[s,yi,t,h,va] + (1-US_sythv[s,yi,t,h,va])*PSD_s[s]*muSD_sythv_up[s,yi,t,h,va] - ES_s_min[s]*muS_sythv_lo[s,yi,t,h,va] + ES_s_max[s]*muS_sythv_up[s,yi,t,h,va])\
     + Sum(g, UG_gythv[g,yi,t,h,va]*(PG_g_min[g]*muG_gythv_lo[g,yi,t,h,va] - PG_gyo[g,yi] * muG_gythv_up[g,yi,t,h,va])) \
@@ -678,7 +775,7 @@ def build_lp1_eqns(yi, v_range, ess_inv):
     - Sum(d, gammaD_dyth[d,yi,t,h]*PD_dyo[d,yi]*muD_dythv_up[d,yi,t,h,va]))\
     + Sum(s, ES_syt0[s,yi,t]*(PhiS_sytv[s,yi,t,va] + PhiS_sytv_lo[s,yi,t,va])) \
     - Sum(h.where[Ord(h)>1], Sum(g, RGD_g[g]*muGD_gythv[g,yi,t,h,va] + RGU_g[g]*muGU_gythv[g,yi,t,h,va])))
-    con_7e_ess[va] = xiP_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h]*PD_dyo[d,yi]*Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,va])) \
+    con_7e_ess[va] = xiP_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d,yi,t,h]*PD_dyo[d,yi]*Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,va])) \
     - Sum(l, PL_l[l]*(muL_lythv_lo[l,yi,t,h,va] + muL_lythv_up[l,yi,t,h,va])) \
     - Sum(s, VS_syj_prev[s,yi]*(US_sythv[s,yi,t,h,va]*PSC_s[s]*muSC_sythv_up[s,yi,t,h,va] + (1-US_sythv[s,yi,t,h,va])*PSD_s[s]*muSD_sythv_up[s,yi,t,h,va] - ES_s_min[s]*muS_sythv_lo[s,yi,t,h,va] + ES_s_max[s]*muS_sythv_up[s,yi,t,h,va]))\
     + Sum(g, UG_gythv[g,yi,t,h,va]*(PG_g_min[g]*muG_gythv_lo[g,yi,t,h,va] - PG_gyo[g,yi] * muG_gythv_up[g,yi,t,h,va])) \
@@ -687,39 +784,35 @@ def build_lp1_eqns(yi, v_range, ess_inv):
     + Sum(s, VS_syj_prev[s,yi]*ES_syt0[s,yi,t]*(PhiS_syt0v[s,yi,t,va] + PhiS_sytv_lo[s,yi,t,va])) \
     - Sum(h.where[Ord(h)>1], Sum(g, RGD_g[g]*muGD_gythv[g,yi,t,h,va] + RGU_g[g]*muGU_gythv[g,yi,t,h,va])))
 
-    con_5di[g,t,va] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,1,va]) + muG_gythv_lo[g,yi,t,1,va]\
+    con_5di[g,t,va] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,1,va]) + muG_gythv_lo[g,yi,t,1,va]\
     - muG_gythv_up[g,yi,t,1,va] - muGD_gythv[g,yi,t,2,va] + muGU_gythv[g,yi,t,2,va]\
     == sigma_yt[yi,t] * tau_yth[yi, t, 1] * cG_gy[g, yi]
-    con_5ei[g,t,h,va].where[(Ord(h)!=1) & (Ord(h)!=Card(h))] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,h,va])\
+    con_5ei[g,t,h,va].where[(Ord(h)!=1) & (Ord(h)!=Card(h))] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,h,va])\
     + muG_gythv_lo[g,yi,t,h,va] - muG_gythv_up[g,yi,t,h,va] + muGD_gythv[g,yi,t,h,va] - muGD_gythv[g,yi,t,h.lead(1),va]\
     - muGU_gythv[g,yi,t,h,va] + muGU_gythv[g,yi,t,h.lead(1),va] == sigma_yt[yi,t]*tau_yth[yi,t,h]*cG_gy[g, yi]
-    con_5fi[g,t,va] = Sum(n.where[g_n[g,n]], lambdaN_nythv[n,yi,t,hmax,va]) +  muG_gythv_lo[g,yi,t,hmax,va]\
+    con_5fi[g,t,va] = Sum(g_n[g, n], lambdaN_nythv[n,yi,t,hmax,va]) +  muG_gythv_lo[g,yi,t,hmax,va]\
     - muG_gythv_up[g,yi,t,hmax,va] + muGD_gythv[g,yi,t,hmax,va] - muGU_gythv[g, yi, t, hmax, va]\
     == sigma_yt[yi, t] * tau_yth[yi, t, hmax] * cG_gy[g, yi]
-    con_5gi[d,t,h,va] = Sum(n.where[d_n[d,n]], lambdaN_nythv[n,yi,t,h,va])-muD_dythv_up[d, yi, t, h, va]\
+    con_5gi[d,t,h,va] = Sum(d_n[d, n], lambdaN_nythv[n,yi,t,h,va])-muD_dythv_up[d, yi, t, h, va]\
     <= sigma_yt[yi, t] * tau_yth[yi, t, h] * CLS_d[d]
-    con_5hi[r,t,h,va] = Sum(n.where[r_n[r,n]], lambdaN_nythv[n,yi,t,h,va]) - muR_rythv_up[r,yi,t,h,va]\
+    con_5hi[r,t,h,va] = Sum(r_n[r, n], lambdaN_nythv[n,yi,t,h,va]) - muR_rythv_up[r,yi,t,h,va]\
     <= -sigma_yt[yi, t] * tau_yth[yi, t, h] * CR_r[r]
-    con_5ii[le,t,h,va] = Sum(n.where[rel_n[le,n]], lambdaN_nythv[n,yi,t,h,va]) - Sum(n.where[sel_n[le,n]], lambdaN_nythv[n,yi,t,h,va]) \
+    con_5ii[le,t,h,va] = -Sum(l_n[le,n], A_ln[le,n] * lambdaN_nythv[n,yi,t,h,va]) \
     + muL_lythv_exist[le, yi, t, h, va] + muL_lythv_lo[le, yi, t, h, va] - muL_lythv_up[le, yi, t, h, va] == 0
-    con_5ji[lc,t,h,va] = Sum(n.where[rel_n[lc,n]], lambdaN_nythv[n,yi,t,h,va]) - Sum(n.where[sel_n[lc,n]], lambdaN_nythv[n,yi,t,h,va]) \
+    con_5ji[lc,t,h,va] = -Sum(l_n[lc,n], A_ln[lc,n] * lambdaN_nythv[n,yi,t,h,va]) \
     + muL_lythv_can[lc,yi,t,h,va] + muL_lythv_lo[lc,yi,t,h,va] - muL_lythv_up[lc,yi,t,h,va] == 0
-    con_5ki[s,t,va] = Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,1,va])\
+    con_5ki[s,t,va] = Sum(s_n[s, n], lambdaN_nythv[n,yi,t,1,va])\
     + (tau_yth[yi,t,1]/etaSD_s[s])*PhiS_sytv[s,yi,t,va] - muSD_sythv_up[s,yi,t,1,va] <= 0
-    con_5li[s,t,h,va].where[Ord(h)>1] = Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,h,va])\
+    con_5li[s,t,h,va].where[Ord(h)>1] = Sum(s_n[s, n], lambdaN_nythv[n,yi,t,h,va])\
     + (tau_yth[yi,t,h]/etaSD_s[s])*muS_sythv[s,yi,t,h,va] - muSD_sythv_up[s,yi,t,h,va] <= 0
-    con_5mi[s,t,va] = -Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,1,va])\
+    con_5mi[s,t,va] = -Sum(s_n[s, n], lambdaN_nythv[n,yi,t,1,va])\
     - etaSC_s[s]*tau_yth[yi,t,1]*PhiS_sytv[s,yi,t,va] - muSC_sythv_up[s,yi,t,1,va] <= 0
-    con_5ni[s,t,h,va].where[Ord(h)>1] = -Sum(n.where[s_n[s,n]], lambdaN_nythv[n,yi,t,h,va])\
+    con_5ni[s,t,h,va].where[Ord(h)>1] = -Sum(s_n[s, n], lambdaN_nythv[n,yi,t,h,va])\
     - etaSC_s[s]*tau_yth[yi,t,h]*muS_sythv[s,yi,t,h,va] - muSC_sythv_up[s,yi,t,h,va] <= 0
-    con_5oi[n, t, h, va].where[Ord(n) > 1] = -Sum(le.where[sel_n[le, n]], muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
-    + Sum(le.where[rel_n[le, n]], muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
-    - Sum(lc.where[sel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va])\
-    + Sum(lc.where[rel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va]) == 0
-    con_5pi[n, t, h, va].where[Ord(n) == 1] = -Sum(le.where[sel_n[le, n]], muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
-    + Sum(le.where[rel_n[le, n]], muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
-    - Sum(lc.where[sel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va])\
-    + Sum(lc.where[rel_n[lc, n]], (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va])\
+    con_5oi[n, t, h, va].where[Ord(n) > 1] = -Sum(l_n[le, n], A_ln[le, n] * muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
+    - Sum(l_n[lc, n], A_ln[lc, n] * (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va]) == 0
+    con_5pi[n, t, h, va].where[Ord(n) == 1] = -Sum(l_n[le, n], A_ln[le, n] * muL_lythv_exist[le, yi, t, h, va] / X_l[le])\
+    - Sum(l_n[lc, n], A_ln[lc, n] * (VL_lyj_prev[lc, yi] / X_l[lc]) * muL_lythv_can[lc, yi, t, h, va])\
     + phiN_nythv[n, yi, t, h, va] == 0
     con_5qi[s,t,va] = PhiS_sytv[s,yi,t,va] - muS_sythv[s,yi,t,2,va] + muS_sythv_lo[s,yi,t,1,va] - muS_sythv_up[s,yi,t,1,va] == 0
     con_5ri[s,t,h,va].where[(Ord(h)!=1) & (Ord(h)!=Card(h))] = muS_sythv[s,yi,t,h,va] - muS_sythv[s,yi,t,h.lead(1),va] + muS_sythv_lo[s,yi,t,h,va] - muS_sythv_up[s,yi,t,h,va] == 0
@@ -765,9 +858,9 @@ def build_lp2_eqns(yi, v_range, ess_inv):
     kr = (k.val >= vmin) & (k.val <= vmax)
 
     lp2_obj_var[...] = xiQ == xiQ_y[yi]
-    con_8b[d] = pD_dy[d, yi] == PD_d_fc[d] * (1 + zetaD_d_fc[d])**(yi - 1) + (PD_d_max[d] * (1 + zetaD_d_max[d])**(yi - 1)) * aD_dy[d, yi]
-    con_8c[g] = pG_gy[g, yi] == PG_g_fc[g] * (1 - zetaGP_g_fc[g])**(yi - 1) - (PG_g_max[g] * (1 + zetaGP_g_max[g])**(yi - 1)) * aGP_gy[g, yi]
-    con_8d[r] = pR_ry[r, yi] == PR_r_fc[r] * (1 + zetaR_r_fc[r])**(yi - 1) - (PR_r_max[r] * (1 + zetaR_r_max[r])**(yi - 1)) * aR_ry[r, yi]
+    con_8b[d] = pD_dy[d, yi] == PD_dy_fc[d, yi] + PD_dy_max[d, yi] * aD_dy[d, yi]
+    con_8c[g] = pG_gy[g, yi] == PG_gy_fc_dec[g, yi] - PG_gy_max[g, yi] * aGP_gy[g, yi]
+    con_8d[r] = pR_ry[r, yi] == PR_ry_fc[r, yi] - PR_ry_max[r, yi] * aR_ry[r, yi]
     con_8e[d] = aD_dy[d, yi] <= 1
     con_8f[g] = aGP_gy[g, yi] <= 1
     con_8g[r] = aR_ry[r, yi] <= 1
@@ -775,14 +868,14 @@ def build_lp2_eqns(yi, v_range, ess_inv):
     con_8i[...] = Sum(g, aGP_gy[g, yi]) <= GammaGP
     con_8j[...] = Sum(rs, aR_ry[rs, yi]) <= GammaRS
     con_8k[...] = Sum(rw, aR_ry[rw, yi]) <= GammaRW
-    con_8l[va] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(n.where[d_n[d, n]], LambdaN_nythvo[n, yi, t, h, va]))\
+    con_8l[va] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(d_n[d, n], LambdaN_nythvo[n, yi, t, h, va]))\
         - Sum(l, PL_l[l] * (muL_lythvo_lo[l, yi, t, h, va] + muL_lythvo_up[l, yi, t, h, va])) - Sum(s, US_sythv[s, yi, t, h, va] * PSC_s[s] * muSC_sythvo_up[s, yi, t, h, va]\
         + (1 - US_sythv[s, yi, t, h, va]) * PSD_s[s] * muSD_sythvo_up[s, yi, t, h, va] - ES_s_min[s] * muS_sythvo_lo[s, yi, t, h, va]\
         + ES_s_max[s] * muS_sythvo_up[s, yi, t, h, va]) + Sum(g, UG_gythv[g, yi, t, h, va] * (PG_g_min[g] * muG_gythvo_lo[g, yi, t, h, va] - pG_gy[g, yi] * muG_gythvo_up[g, yi, t, h, va]))\
         - Sum(r, gammaR_ryth[r, yi, t, h] * pR_ry[r, yi] * (muR_rythvo_up[r, yi, t, h, va] - sigma_yt[yi, t] * tau_yth[yi, t, h] * CR_r[r]))\
         - Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * muD_dythvo_up[d, yi, t, h, va])) + Sum(s, ES_syt0[s, yi, t] * (PhiS_sytvo[s, yi, t, va] + PhiS_sytvo_lo[s, yi, t, va]))\
         - Sum(h.where[Ord(h) > 1], Sum(g, RGD_g[g] * muGD_gythvo[g, yi, t, h, va] + RGU_g[g] * muGU_gythvo[g, yi, t, h, va])))
-    con_8l_ess[va] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(n.where[d_n[d, n]], LambdaN_nythvo[n, yi, t, h, va]))\
+    con_8l_ess[va] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(d_n[d, n], LambdaN_nythvo[n, yi, t, h, va]))\
         - Sum(l, PL_l[l] * (muL_lythvo_lo[l, yi, t, h, va] + muL_lythvo_up[l, yi, t, h, va])) - Sum(s, VS_syj_prev[s,yi]*(US_sythv[s, yi, t, h, va] * PSC_s[s] * muSC_sythvo_up[s, yi, t, h, va]\
         + (1 - US_sythv[s, yi, t, h, va]) * PSD_s[s] * muSD_sythvo_up[s, yi, t, h, va] - ES_s_min[s] * muS_sythvo_lo[s, yi, t, h, va]\
         + ES_s_max[s] * muS_sythvo_up[s, yi, t, h, va])) + Sum(g, UG_gythv[g, yi, t, h, va] * (PG_g_min[g] * muG_gythvo_lo[g, yi, t, h, va] - pG_gy[g, yi] * muG_gythvo_up[g, yi, t, h, va]))\
@@ -790,7 +883,7 @@ def build_lp2_eqns(yi, v_range, ess_inv):
         - Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * muD_dythvo_up[d, yi, t, h, va])) + Sum(s, VS_syj_prev[s,yi]*ES_syt0[s, yi, t] * (PhiS_syt0vo[s, yi, t, va] + PhiS_sytvo_lo[s, yi, t, va]))\
         - Sum(h.where[Ord(h) > 1], Sum(g, RGD_g[g] * muGD_gythvo[g, yi, t, h, va] + RGU_g[g] * muGU_gythvo[g, yi, t, h, va])))
 
-    # con_8l[k].where[kr] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(n.where[d_n[d, n]], LambdaN_nythvo[n, yi, t, h, k]))\
+    # con_8l[k].where[kr] = xiQ_y[yi] <= Sum(t, Sum(h, Sum(d, gammaD_dyth[d, yi, t, h] * pD_dy[d, yi] * Sum(d_n[d, n], LambdaN_nythvo[n, yi, t, h, k]))\
     #     - Sum(l, PL_l[l] * (muL_lythvo_lo[l, yi, t, h, k] + muL_lythvo_up[l, yi, t, h, k])) - Sum(s, US_sythv[s, yi, t, h, k] * PSC_s[s] * muSC_sythvo_up[s, yi, t, h, k]\
     #     + (1 - US_sythv[s, yi, t, h, k]) * PSD_s[s] * muSD_sythvo_up[s, yi, t, h, k] - ES_s_min[s] * muS_sythvo_lo[s, yi, t, h, k]\
     #     + ES_s_max[s] * muS_sythvo_up[s, yi, t, h, k]) + Sum(g, UG_gythv[g, yi, t, h, k] * (PG_g_min[g] * muG_gythvo_lo[g, yi, t, h, k] - pG_gy[g, yi] * muG_gythvo_up[g, yi, t, h, k]))\
@@ -812,6 +905,410 @@ def build_lp2_eqns(yi, v_range, ess_inv):
     )
     return LP2_model
 
+# Return the symbols among the given names that are indexed by an iteration set
+def iteration_symbols(iter_set, names):
+    return [m[name] for name in names if iter_set.name in m[name].domain_names]
+
+# Variables and equations of the OLMP blocks (j) and of the inner loop cuts (k), only kept for the active iterations
+olmp_block_symbols = iteration_symbols(j, m.listVariables() + m.listEquations())
+inner_loop_symbols = iteration_symbols(k, m.listVariables() + m.listEquations())
+# Parameters holding the results of previous inner loop iterations, only kept for the year being solved
+inner_loop_params = iteration_symbols(k, m.listParameters())
+
+# Directory of the spilled records of this process, the main process keys it to the run id saved in its checkpoints
+# so that a resumed run reloads them, worker processes spill under their pid and remove the directory at exit
+spill_context = {'dir': os.path.join(config.spill_dir, 'pid{}'.format(os.getpid())), 'resumable': False, 'reloaded': []}
+
+# Spill to the directory of a run, its reloaded files are only removed once a checkpoint holds their records
+def set_spill_run(run_id):
+    spill_context.update(dir=os.path.join(config.spill_dir, run_id), resumable=config.checkpointing, reloaded=[])
+
+# Remove the spill directory of this process, kept at exit while a checkpoint of an unfinished run may resume from it
+def remove_spills(at_exit=False):
+    if at_exit and spill_context['resumable']:
+        return
+    if os.path.isdir(spill_context['dir']):
+        shutil.rmtree(spill_context['dir'], ignore_errors=True)
+    spill_context['reloaded'] = []
+
+multiprocessing.util.Finalize(None, remove_spills, kwargs={'at_exit': True}, exitpriority=5)
+
+# Remove a spill file whose records are back in the container, a resumable run defers it to the next checkpoint
+def discard_spill(path):
+    if spill_context['resumable']:
+        if path not in spill_context['reloaded']:
+            spill_context['reloaded'].append(path)
+    else:
+        os.remove(path)
+
+# Remove the spill files reloaded since the last checkpoint, called once the checkpoint holding their records is written
+def flush_reloaded_spills():
+    for path in spill_context['reloaded']:
+        if os.path.exists(path):
+            os.remove(path)
+    spill_context['reloaded'] = []
+
+# Return the file holding the spilled records of a symbol at one iteration
+def spill_file(symbol, iter_col, iter_val, tag):
+    return os.path.join(spill_context['dir'], '{}_{}{}{}.feather'.format(symbol.name, tag, iter_col, iter_val))
+
+# Keep the records of the symbols only for the iterations in window, with default rows dropped
+# Variable levels of the other iterations are spilled to disk and reloaded once their iteration is back in the window,
+# equation records are dropped since every solve regenerates them
+# A spill file is newer than the records of its iteration in a container resumed from an earlier checkpoint, so it replaces them
+def set_iteration_window(symbols, iter_col, window, tag=''):
+    window = {str(i) for i in window}
+    for symbol in symbols:
+        records = symbol.records
+        parts = [] if records is None else [records]
+        reloaded = []
+        for i in window:
+            path = spill_file(symbol, iter_col, i, tag)
+            if os.path.exists(path) and path not in spill_context['reloaded']:
+                parts.append(pd.read_feather(path))
+                reloaded.append(i)
+                discard_spill(path)
+        if not parts:
+            continue
+        if reloaded and records is not None:
+            parts[0] = records[~records[iter_col].astype(str).isin(reloaded)]
+        records = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        active = records[iter_col].astype(str).isin(window)
+        if isinstance(symbol, Variable):
+            for i, spilled in records[~active].groupby(records[iter_col].astype(str), observed=True):
+                path = spill_file(symbol, iter_col, i, tag)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                spilled.reset_index(drop=True).to_feather(path)
+                if path in spill_context['reloaded']:
+                    spill_context['reloaded'].remove(path)
+        if len(parts) > 1 or not active.all():
+            symbol.setRecords(records[active].reset_index(drop=True))
+        symbol.dropDefaults()
+
+# Drop the inner loop records of a finished year, they are rebuilt from k = 1 at the next outer loop iteration
+def drop_year_records(y_iter):
+    for symbol in inner_loop_symbols + inner_loop_params:
+        if symbol.records is None or symbol.records.empty:
+            continue
+        if 'y' in symbol.domain_names:
+            symbol.setRecords(symbol.records[symbol.records['y'].astype(str) != str(y_iter)].reset_index(drop=True))
+        else:
+            symbol.setRecords(symbol.records.iloc[0:0])
+    if os.path.isdir(spill_context['dir']):
+        for name in os.listdir(spill_context['dir']):
+            if '_y{}_'.format(y_iter) in name:
+                discard_spill(os.path.join(spill_context['dir'], name))
+
+# Frozen subproblem models, keyed by subproblem name and the indices that fix their structure
+frozen_models = {}
+
+# Python-side generation time of the models built since their last solve, reported in the solve trace
+pending_build_time = {}
+# Loop indices and bounds of the enclosing loop at the current solve, updated by the loops and copied into each trace record
+trace_context = {'j': None, 'y': None, 'k': None, 'o': None, 'lb': None, 'ub': None}
+solve_trace = SolveTrace(config.trace_file)
+solve_cache = SolveCache(config.solve_cache_dir, config.solve_cache_mb)
+# Parameters and sets referenced by the equations of each cached subproblem
+cache_inputs = {}
+# Salt of the solve cache keys: the source of this module, which builds the equations, and the GAMSPy version,
+# so that the results of an earlier version of the models are never taken from the cache
+solve_cache_salt = hashlib.sha256(open(__file__, 'rb').read() + gamspy.__version__.encode()).hexdigest()
+
+# Return the solve cache key of a subproblem: a hash of the code version, of its identifiers, of the solver tolerance and of
+# the records of every parameter and set its equations reference, so that any change of the data or of the iterates gives a new key
+def solve_cache_key(identifiers, model):
+    if identifiers not in cache_inputs:
+        names = set()
+        for eqn in model.equations:
+            names.update(re.findall(r'\b[A-Za-z_]\w*\b', eqn.getDefinition()))
+        cache_inputs[identifiers] = sorted(name for name in names if name in m and isinstance(m[name], (Parameter, Set, Alias)))
+    sha = hashlib.sha256(repr((solve_cache_salt, identifiers, config.tol)).encode())
+    for name in cache_inputs[identifiers]:
+        sha.update(name.encode())
+        if m[name].records is not None:
+            sha.update(pd.util.hash_pandas_object(m[name].records, index=False).to_numpy().tobytes())
+    return sha.hexdigest()
+solver_logs = SolverLogs(config.solver_log_dir)
+result_writer = ResultWriter(config.results_dir, config.result_symbols, config.compress_results)
+
+# Wall time and number of solves of each subproblem type and iteration counts of the loops, reported in the run summary
+run_stats = {'time': {}, 'solves': {}, 'cache_hits': {}, 'k': [], 'o': []}
+
+# Add wall time spent on a subproblem type
+def record_time(name, seconds):
+    run_stats['time'][name] = run_stats['time'].get(name, 0.0) + seconds
+
+# Build a model and record the time spent defining its equations
+def build_model(name, build_fn, build_args):
+    start = time.perf_counter()
+    with profiler.phase(name):
+        model = build_fn(*build_args)
+    build_time = time.perf_counter() - start
+    record_time(name, build_time)
+    pending_build_time[model.name] = build_time
+    return model
+
+# Return the model for the given key, building and freezing it only the first time it is requested
+# Only the modifiables its equations refer to are passed to the frozen instance, which rejects the others
+def get_model(key, build_fn, build_args, modifiables):
+    if not config.persistent_models:
+        return build_model(key[0], build_fn, build_args), False
+    if key not in frozen_models:
+        model = build_model(key[0], build_fn, build_args)
+        definitions = ' '.join(eqn.getDefinition() for eqn in model.equations)
+        used = [param for param in modifiables if re.search(r'\b{}\b'.format(param.name.split('.')[0]), definitions)]
+        model.freeze(modifiables=used)
+        frozen_models[key] = model
+        logger.info("Froze persistent model {}".format(key))
+    return frozen_models[key], True
+
+# The modifiables keep records for every year and inner loop iteration while a frozen instance covers one year and one window of k,
+# the records without a match in the instance are skipped instead of failing the solve
+frozen_solve_options = FreezeOptions(no_match_limit=2 ** 31 - 1)
+
+# Release the frozen ILSP models generated on the variables of previous outer loop iterations
+def release_persistent_models(j_iter):
+    for key in [key for key in frozen_models if key[0] == 'ILSP' and key[2] != j_iter]:
+        frozen_models.pop(key).unfreeze()
+
+# Variables holding the incumbent of each MIP subproblem, passed back to CPLEX as a MIP start on the next solve
+warm_start_vars = {'OLMP': [vL_ly, vS_sy, uG_gythi, uS_sythi], 'OLMP_master': [vL_ly, vS_sy], 'OLSP': [uG_gythi, uS_sythi],
+                   'ILMP': [zD_dy, zGC_gy, zGP_gy, zR_ry], 'ILSP': [uG_gythi, uS_sythi]}
+# Statistics of each MIP solve, split by subproblem and by cold start, warm start and paired warm and cold solves of one instance
+warm_start_stats = {}
+
+# Solve a model with the common solver settings
+# With basis, an LP starts from the basis of the levels and marginals of its last solve, with the dual simplex if ada_dual_simplex
+# The solver log is captured in memory and written to its own file by the solver_logs thread, the console only gets a summary line
+# A cutoff derived from the loop bounds cuts off the optimum when these bounds are inexact, the model is then solved again without it
+# within the same call, so the time, solve count, trace record and warm-start statistics cover both attempts as one solve
+def solve_model(model, problem, frozen=False, basis=False, gap=None, cutoff=None):
+    gap = config.tol if gap is None else gap
+    # The levels left in the container by the last solve are the incumbent, CPLEX only reads them as a MIP start with mipstart
+    warm = config.warm_start and problem == "mip" and any(var.records is not None and not var.records.empty for var in warm_start_vars.get(model.name, []))
+    solver_options = {"mipstart": 1} if warm else {}
+    if basis:
+        solver_options.update({"advind": 1, "lpmethod": 2} if config.ada_dual_simplex else {"advind": 1})
+    log = solver_logs.capture(model.name.upper(), {'subproblem': model.name.upper(), **trace_context})
+    cutoff_retry = False
+    solver_time, nodes = 0.0, 0
+    start = time.perf_counter()
+    try:
+        with profiler.phase(model.name.upper()):
+            for attempt_cutoff in [cutoff, None] if cutoff else [None]:
+                attempt_options = {**solver_options, **attempt_cutoff} if attempt_cutoff else solver_options
+                if frozen:
+                    # Frozen instances only take the solver and its options, the GAMS options are fixed at freeze time
+                    model.solve(solver="CPLEX", solver_options={"epgap": gap, **attempt_options}, freeze_options=frozen_solve_options, output=log)
+                else:
+                    # A zero bratio makes GAMS always pass the basis to the solver instead of deciding from its size
+                    options = {"basis_detection_threshold": 0} if basis else {}
+                    model.solve(options=Options(relative_optimality_gap=gap, savepoint=1, **{problem: "CPLEX"}, **options),
+                                solver_options=attempt_options or None, output=log)
+                if problem == "mip":
+                    solver_time += model.solve_model_time or 0.0
+                    nodes += model.num_nodes_used or 0
+                if not attempt_cutoff or model.status is None or model.status.name not in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+                    break
+                logger.warning("{} is {} under the objective cutoff {} --> Solve again without it".format(model.name.upper(), model.status.name, attempt_cutoff))
+                cutoff_retry = True
+    finally:
+        solver_logs.submit(log)
+    solve_time = time.perf_counter() - start
+    record_time(model.name.upper(), solve_time)
+    run_stats['solves'][model.name.upper()] = run_stats['solves'].get(model.name.upper(), 0) + 1
+    trace_solve(model, problem, frozen, warm, solve_time, log.path, gap if problem == "mip" else None, cutoff_retry)
+    logger.info("{} ({}): {}, objective = {}{} in {:.2f} s, log in {}".format(
+        model.name.upper(), ', '.join('{} = {}'.format(key, trace_context[key]) for key in ['j', 'y', 'k', 'o'] if trace_context.get(key) is not None),
+        model.status.name if model.status is not None else None, model.objective_value,
+        ' (gap {:.2%}, best bound = {})'.format(gap, model.objective_estimation) if problem == "mip" and gap > config.tol else '', solve_time, log.path))
+    if problem == "mip":
+        stats = warm_start_stats.setdefault(model.name, {'cold': [], 'warm': [], 'paired': []})
+        record = {'solver_time': solver_time, 'nodes': nodes, 'objective': model.objective_value, **parse_mip_start(''.join(log.lines))}
+        stats['warm' if warm else 'cold'].append(record)
+        if warm and config.warm_start_pair_every and len(stats['warm']) % config.warm_start_pair_every == 0:
+            stats['paired'].append({'warm': record, 'cold': solve_cold_pair(model, frozen, gap, attempt_options)})
+
+# Solve a warm-started MIP instance again without its MIP start and return the statistics of this cold solve
+# The run continues from the cold solution, which is an equally valid solution of the same instance at the same gap
+def solve_cold_pair(model, frozen, gap, solver_options):
+    solver_options = {key: value for key, value in solver_options.items() if key != 'mipstart'}
+    log = solver_logs.capture(model.name.upper(), {'subproblem': model.name.upper(), 'paired_cold': True, **trace_context})
+    start = time.perf_counter()
+    try:
+        with profiler.phase(model.name.upper()):
+            if frozen:
+                model.solve(solver="CPLEX", solver_options={"epgap": gap, **solver_options}, freeze_options=frozen_solve_options, output=log)
+            else:
+                model.solve(options=Options(relative_optimality_gap=gap, savepoint=1, mip="CPLEX"), solver_options=solver_options or None, output=log)
+    finally:
+        solver_logs.submit(log)
+    # Kept apart from the subproblem time, the paired solves only measure the MIP starts
+    record_time(model.name.upper() + '_PAIRED_COLD', time.perf_counter() - start)
+    return {'solver_time': model.solve_model_time or 0.0, 'nodes': model.num_nodes_used or 0, 'objective': model.objective_value,
+            **parse_mip_start(''.join(log.lines))}
+
+# Return the relative optimality gap of the next OLMP or ILMP solve for the current error of its loop
+# Early iterations get a loose gap, which tightens back to tol as the loop error closes
+def adaptive_gap(loop_error):
+    if not config.adaptive_gaps:
+        return config.tol
+    return min(config.adaptive_gap_max, max(config.tol, config.adaptive_gap_share * loop_error))
+
+# Return the CPLEX objective cutoff of an adaptive solve derived from a loop bound, loosened by adaptive_cutoff_margin
+# 'cutup' for the OLMP, a minimization whose optimum cannot exceed UBO, and 'cutlo' for the ILMP, a maximization whose optimum cannot fall below LBI
+def objective_cutoff(option, bound):
+    if not config.adaptive_gaps or bound is None or abs(bound) >= 999999999999:
+        return None
+    bound = float(bound)
+    margin = config.adaptive_cutoff_margin * abs(bound)
+    return {option: bound + margin if option == 'cutup' else bound - margin}
+
+# Return the loop bound given by a MIP solved at the given gap: its objective at the gap tol, else its best bound
+# The best bound stays a valid bound of the loop when the incumbent is not proven optimal
+def mip_bound(model, gap):
+    if gap <= config.tol or model.objective_estimation is None or pd.isna(model.objective_estimation):
+        return model.objective_value
+    return model.objective_estimation
+
+# Return the relative gap between the objective and the best bound of the last solve of a MIP, 0 when it has no best bound
+def proven_gap(model):
+    objective, best_bound = model.objective_value, model.objective_estimation
+    if objective is None or best_bound is None or pd.isna(best_bound):
+        return 0.0
+    return abs(objective - best_bound) / max(abs(objective), 1e-10)
+
+# Append the trace record of the last solve of a model
+# cutoff_retry marks a solve whose first attempt was infeasible under its objective cutoff, its total time includes both attempts
+def trace_solve(model, problem, frozen, warm, solve_time, log_path, target_gap=None, cutoff_retry=False):
+    objective = model.objective_value
+    best_bound = model.objective_estimation if problem == "mip" else objective
+    gap = abs(objective - best_bound) / max(abs(objective), 1e-10) if objective is not None and best_bound is not None else None
+    solve_trace.write({
+        'time': time.time(),
+        'subproblem': model.name.upper(),
+        **trace_context,
+        'frozen': frozen,
+        'warm_start': warm,
+        'log': log_path,
+        'rows': int(model.num_equations),
+        'columns': int(model.num_variables),
+        'nonzeros': int(model.num_nonzeros),
+        'binaries': int(model.num_discrete_variables),
+        'python_generation_time': pending_build_time.pop(model.name, 0.0),
+        'gams_generation_time': model.model_generation_time,
+        'solver_time': model.solve_model_time,
+        'total_time': solve_time,
+        'status': model.status.name if model.status is not None else None,
+        'solve_status': model.solve_status.name if model.solve_status is not None else None,
+        'objective': objective,
+        'best_bound': best_bound,
+        'gap': gap,
+        'target_gap': target_gap,
+        'cutoff_retry': cutoff_retry,
+        'nodes': int(model.num_nodes_used) if problem == "mip" else None,
+    })
+
+# Return the mean of a statistic over the solves that report it, None without any
+def mean_stat(solves, key):
+    values = [sol[key] for sol in solves if sol.get(key) is not None]
+    return sum(values) / len(values) if values else None
+
+# Log for each MIP subproblem how much the MIP starts shortened its solves
+# An accepted start is the incumbent at 0 s, its saving on the time to the first incumbent is compared with the cold solves, and its
+# distance to the final objective tells how much of the solve it made unnecessary. The paired solves of warm_start_pair_every solve
+# the same instance with and without the start, their solver times give the measured saving
+def report_warm_starts(stats_by_name):
+    for name, stats in stats_by_name.items():
+        cold, warm, paired = stats.get('cold', []), stats.get('warm', []), stats.get('paired', [])
+        if cold:
+            logger.info("{} cold starts: {} solve(s), mean time to the first incumbent = {}, mean solver time = {:.2f} s".format(
+                name, len(cold), '{:.2f} s'.format(mean_stat(cold, 'first_incumbent_time')) if mean_stat(cold, 'first_incumbent_time') is not None else 'n/a',
+                mean_stat(cold, 'solver_time')))
+        if warm:
+            accepted = [sol for sol in warm if sol.get('mip_start_accepted')]
+            start_gaps = [abs(sol['mip_start_objective'] - sol['objective']) / max(abs(sol['objective']), 1e-10)
+                          for sol in accepted if sol.get('mip_start_objective') is not None and sol.get('objective') is not None]
+            logger.info("{} warm starts: {} solve(s), {} MIP start(s) accepted{}, mean solver time = {:.2f} s".format(
+                name, len(warm), len(accepted),
+                ' within {:.2%} of the final objective on average'.format(sum(start_gaps) / len(start_gaps)) if start_gaps else '',
+                mean_stat(warm, 'solver_time')))
+            if accepted and mean_stat(cold, 'first_incumbent_time') is not None:
+                logger.info("{} accepted MIP starts saved {:.2f} s to the first incumbent per solve against the cold solves".format(
+                    name, mean_stat(cold, 'first_incumbent_time')))
+        if paired:
+            warm_time = sum(pair['warm']['solver_time'] for pair in paired)
+            cold_time = sum(pair['cold']['solver_time'] for pair in paired)
+            logger.info("{} paired solves: {} instance(s), solver time {:.2f} s warm vs {:.2f} s cold, nodes {:.0f} vs {:.0f}{}".format(
+                name, len(paired), warm_time, cold_time, sum(pair['warm']['nodes'] for pair in paired), sum(pair['cold']['nodes'] for pair in paired),
+                ', the MIP starts saved {:.1%} of the solver time'.format(1 - warm_time / cold_time) if cold_time > 0 else ''))
+
+# Merge the solve statistics returned by a year-loop worker
+def merge_warm_start_stats(worker_stats):
+    for name, stats in worker_stats.items():
+        merged = warm_start_stats.setdefault(name, {'cold': [], 'warm': [], 'paired': []})
+        for start, solves in stats.items():
+            merged.setdefault(start, []).extend(solves)
+
+# Merge the run statistics returned by a year-loop worker
+def merge_run_stats(worker_run_stats):
+    for name, seconds in worker_run_stats['time'].items():
+        record_time(name, seconds)
+    for stats in ['solves', 'cache_hits']:
+        for name, count in worker_run_stats[stats].items():
+            run_stats[stats][name] = run_stats[stats].get(name, 0) + count
+    run_stats['k'].extend(worker_run_stats['k'])
+    run_stats['o'].extend(worker_run_stats['o'])
+
+# Pool of the worker processes solving the ILSP of each RD and the Benders subproblems, only created by the main process
+subproblem_executor = None
+
+# Clear the statistics of a worker process before a task so that it only returns those of the task
+def reset_worker_stats():
+    warm_start_stats.clear()
+    for stats in run_stats.values():
+        stats.clear()
+    profiler.reset()
+
+# Load the records passed to a worker process into its container, a symbol passed without records is reset to its defaults
+def set_worker_inputs(inputs):
+    for name, records in inputs.items():
+        if records is not None:
+            m[name].setRecords(records)
+        elif m[name].records is not None:
+            m[name].setRecords(m[name].records.iloc[0:0])
+
+# Seed the operational block of a new outer loop iteration with the commitment of the previous one
+def set_olmp_start(j_iter):
+    if config.warm_start and j_iter > 1:
+        uG_gythi.l[g, y, t, h, j_iter] = uG_gythi.l[g, y, t, h, j_iter - 1]
+        uS_sythi.l[s, y, t, h, j_iter] = uS_sythi.l[s, y, t, h, j_iter - 1]
+
+# Copy the levels of (parameter, variable) pairs into the parameters in a single synchronization with GAMS
+# source selects a slice of the variables, e.g. {'j': 2}, and target is the slice of the parameters it replaces, e.g. {'k': 3}
+# The rest of each parameter is kept, zero levels are left out so that the parameters stay sparse
+def copy_levels(pairs, source=None, target=None):
+    source = source or {}
+    target = target or {}
+    records = {}
+    for param, var in pairs:
+        var_columns = [name for name in var.domain_names if name not in source]
+        param_columns = [name for name in param.domain_names if name not in target]
+        rec = var.records if var.records is not None else pd.DataFrame(columns=var.domain_names + ['level'])
+        mask = rec['level'].to_numpy() != 0
+        for column, label in source.items():
+            mask &= (rec[column].astype(str) == str(label)).to_numpy()
+        columns = {name: rec[column].to_numpy()[mask] for name, column in zip(param_columns, var_columns)}
+        columns.update({column: str(label) for column, label in target.items()})
+        values = pd.DataFrame({**{name: columns[name] for name in param.domain_names}, 'value': rec['level'].to_numpy()[mask]})
+        if target and param.records is not None:
+            kept = pd.Series(False, index=param.records.index)
+            for column, label in target.items():
+                kept |= param.records[column].astype(str) != str(label)
+            values = pd.concat([param.records[kept], values], ignore_index=True)
+        records[param] = values
+    m.setRecords(records)
+
 # Set values of the uncertain parameters for the given outer loop iteration
 def set_uncertain_params_olmp(j_iter):
     # At the first iteration, uncertain parameters equal their forecast values
@@ -821,10 +1318,7 @@ def set_uncertain_params_olmp(j_iter):
         PG_gyi[g,y,j_iter] = PG_g_fc[g]
         PR_ryi[r,y,j_iter] = PR_r_fc[r]
     else:
-        CG_gyi[g, y, j_iter] = cG_gy.l[g,y]
-        PD_dyi[d, y, j_iter] = pD_dy.l[d,y]
-        PG_gyi[g, y, j_iter] = pG_gy.l[g,y]
-        PR_ryi[r, y, j_iter] = pR_ry.l[r,y]
+        copy_levels([(CG_gyi, cG_gy), (PD_dyi, pD_dy), (PG_gyi, pG_gy), (PR_ryi, pR_ry)], target={'j': j_iter})
 
 # Set values of the uncertain parameters for the given inner loop iteration
 def set_uncertain_params_ilsp(k_iter, is_ada):
@@ -835,115 +1329,549 @@ def set_uncertain_params_ilsp(k_iter, is_ada):
         PG_gyk[g,y] = PG_g_fc[g]
         PR_ryk[r,y] = PR_r_fc[r]
     else:
-        CG_gyk[g,y] = cG_gy.l[g,y]
-        PD_dyk[d,y] = pD_dy.l[d,y]
-        PG_gyk[g,y] = pG_gy.l[g,y]
-        PR_ryk[r,y] = pR_ry.l[r,y]
-
-# Solve the relaxed outer-loop master problem
-def solve_olmp_relaxed(j_iter, lb_o, ess_inv):
-    ro = 1 # Initialize relaxed iteration counter
+        copy_levels([(CG_gyk, cG_gy), (PD_dyk, pD_dy), (PG_gyk, pG_gy), (PR_ryk, pR_ry)])
+
+# Return an empty pool of the OLMP operational blocks, one block per outer loop iteration
+# Active blocks are generated in the OLMP, evicted ones keep their parameters in the container and can be restored
+# The Benders cuts of all blocks are kept with it, those of evicted blocks are left out of the Benders master
+def new_cut_pool():
+    return {'active': [], 'evicted': [], 'idle': {}, 'last_binding': {}, 'solves': 0, 'benders_cuts': []}
+
+# Return the blocks of the last OLMP solve whose cost cut con_4c is binding for at least one year
+# Rows left out of the records are at their default level, which is binding
+def binding_blocks(i_range):
+    binding = set()
+    rec = con_4c.records
+    if rec is not None:
+        rec = rec.merge(rho_y.records[['y', 'level']].rename(columns={'level': 'rho'}), on='y')
+        rec['j'] = rec['j'].astype(str).astype(int)
+        rec['slack'] = (rec['level'] - rec['lower']) / rec['rho'].abs().clip(lower=1.0)
+    for i in i_range:
+        rows = rec[rec['j'] == i] if rec is not None else []
+        if len(rows) < len(years_data) or (rows['slack'] <= config.cut_activity_tol).any():
+            binding.add(i)
+    return binding
+
+# Return the blocks whose operating cost at the investments of the Benders OLMP attains rho_y for at least one year
+def benders_binding_blocks(i_range, block_cost):
+    binding = set()
+    for y_iter in years_data:
+        rho = max(block_cost[y_iter, i] for i in i_range)
+        binding.update(i for i in i_range if (rho - block_cost[y_iter, i]) / max(abs(rho), 1.0) <= config.cut_activity_tol)
+    return binding
+
+# Record which active blocks were binding in the last OLMP solve
+def update_cut_activity(pool, binding):
+    pool['solves'] += 1
+    for i in pool['active']:
+        if i in binding:
+            pool['idle'][i] = 0
+            pool['last_binding'][i] = pool['solves']
+        else:
+            pool['idle'][i] += 1
+
+# Evict the blocks that stayed non-binding for too long, then the least recently binding ones above the size cap
+# The block of the current iteration is never evicted
+def trim_cut_pool(pool, j_iter):
+    candidates = [i for i in pool['active'] if i != j_iter]
+    evicted = [i for i in candidates if pool['idle'][i] >= config.cut_pool_max_age]
+    candidates = sorted([i for i in candidates if i not in evicted], key=lambda i: (pool['last_binding'][i], i))
+    evicted += candidates[:max(0, len(pool['active']) - len(evicted) - config.cut_pool_size)]
+    for i in evicted:
+        pool['active'].remove(i)
+        pool['evicted'].append(i)
+    if evicted:
+        logger.info("Evicted OLMP block(s) {} from the cut pool, active blocks = {}".format(sorted(evicted), pool['active']))
+
+# Move the most recently binding evicted block back into the OLMP
+def restore_cut(pool):
+    i = max(pool['evicted'], key=lambda i: (pool['last_binding'][i], i))
+    pool['evicted'].remove(i)
+    pool['active'].append(i)
+    pool['idle'][i] = 0
+    logger.info("Restored OLMP block {} from the cut pool".format(i))
+
+# Symbols read by the Benders subproblems that change between their solves, passed to the worker processes
+olsp_inputs = [CG_gyi, PD_dyi, PG_gyi, PR_ryi, vL_ly_prev, vS_sy_prev]
+# Modifiables of the frozen Benders subproblems, the investments are fixed variables
+olsp_modifiables = [CG_gyi, PD_dyi, PG_gyi, PR_ryi, vL_ly_prev.fx, vS_sy_prev.fx]
+
+# Return the levels of an investment variable of the Benders master by (candidate, year), rounded to the binary values
+def investment_levels(var, candidates):
+    levels = {(candidate, str(y_iter)): 0 for candidate in candidates for y_iter in years_data}
+    if var.records is not None:
+        levels.update({(candidate, str(y_iter)): round(level) for candidate, y_iter, level in zip(var.records.iloc[:, 0], var.records['y'], var.records['level'])})
+    return levels
+
+# Return the marginals of an investment variable in the given year by candidate
+def year_marginals(var, y_iter):
+    rec = slice_records(var, y=y_iter)
+    if rec is None:
+        return {}
+    return dict(zip(rec.iloc[:, 0], rec['marginal']))
+
+# Solve the Benders subproblem of the block (y, t, j) at the investments held in the levels of vL_ly_prev and vS_sy_prev
+# Return the operating cost of the block and its best bound, the cost of its LP relaxation and the subgradient of the latter, costs are None if infeasible
+# Both subproblems of a block are built once, later Benders iterations only change the investments they are solved at
+def solve_olsp_block(ess_inv, y_iter, t_iter, j_iter):
+    yb.setRecords([y_iter])
+    tb.setRecords([t_iter])
+    jb.setRecords([j_iter])
+    # A frozen solve leaves only the investments of its year in the records, those of every year are put back afterwards
+    investments = {var: var.records.copy() for var in [vL_ly_prev, vS_sy_prev] if var.records is not None}
+    # The investments are fixed variables so that their marginals in the LP relaxation are the subgradient of its cost
+    vL_ly_prev.fx[lc, y] = vL_ly_prev.l[lc, y]
+    vS_sy_prev.fx[s, y] = vS_sy_prev.l[s, y]
+    result = {'cost': None, 'bound': None, 'lp_cost': None, 'vL': {}, 'vS': {}}
+    OLSP_LP_model, frozen = get_model(('OLSP_LP', y_iter, t_iter, j_iter), build_olsp_eqns, (ess_inv, 'RMIP'), olsp_modifiables)
+    solve_model(OLSP_LP_model, "rmip", frozen)
+    if OLSP_LP_model.status.name not in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+        result['lp_cost'] = OLSP_LP_model.objective_value
+        result['vL'] = year_marginals(vL_ly_prev, y_iter)
+        if ess_inv:
+            result['vS'] = year_marginals(vS_sy_prev, y_iter)
+        OLSP_model, frozen = get_model(('OLSP', y_iter, t_iter, j_iter), build_olsp_eqns, (ess_inv, 'MIP'), olsp_modifiables)
+        solve_model(OLSP_model, "mip", frozen)
+        if OLSP_model.status.name not in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+            result['cost'] = OLSP_model.objective_value
+            # The incumbent is only optimal within the gap, the best bound is a valid lower bound of the cost
+            best_bound = OLSP_model.objective_estimation
+            result['bound'] = result['cost'] if best_bound is None or pd.isna(best_bound) else min(best_bound, result['cost'])
+    for var, records in investments.items():
+        var.setRecords(records)
+    vL_ly_prev.lo[lc, y] = 0
+    vL_ly_prev.up[lc, y] = 1
+    vS_sy_prev.lo[s, y] = 0
+    vS_sy_prev.up[s, y] = 1
+    return result
+
+# Worker process entry point of the Benders OLMP: the uncertain parameters and the investments are passed in explicitly
+def solve_olsp_worker(ess_inv, y_iter, t_iter, j_iter, inputs):
+    trace_context.update(j=j_iter, y=y_iter, k=None, o=None)
+    reset_worker_stats()
+    set_worker_inputs(inputs)
+    result = solve_olsp_block(ess_inv, y_iter, t_iter, j_iter)
+    return (y_iter, t_iter, j_iter), result, warm_start_stats, run_stats, profiler.collect()
+
+# Solve the Benders subproblems of the given blocks, in the worker pool when there is one, and return their results by block
+def solve_olsp_blocks(ess_inv, blocks):
+    if subproblem_executor is None:
+        return {block: solve_olsp_block(ess_inv, *block) for block in blocks}
+    inputs = {symbol.name: symbol.records for symbol in olsp_inputs}
+    futures = [subproblem_executor.submit(solve_olsp_worker, ess_inv, *block, inputs) for block in blocks]
+    profiler.rescan()
+    results = {}
+    for future in as_completed(futures):
+        block, results[block], worker_stats, worker_run_stats, worker_phases = future.result()
+        merge_warm_start_stats(worker_stats)
+        merge_run_stats(worker_run_stats)
+        profiler.merge(worker_phases, 'Benders workers')
+    return results
+
+# Return the cut theta_coef * theta >= scale * E(x) of a block, where E(x) is 1 at the investments x_hat of its year and at most 0 elsewhere
+def indicator_cut(block, x_L, x_S, theta_coef, scale):
+    year = str(block[0])
+    bits = {('vL', candidate): level for (candidate, y_iter), level in x_L.items() if y_iter == year}
+    bits.update({('vS', candidate): level for (candidate, y_iter), level in x_S.items() if y_iter == year})
+    cut = {'block': block, 'theta': theta_coef, 'const': -scale * (sum(bits.values()) - 1), 'vL': {}, 'vS': {}}
+    for (kind, candidate), level in bits.items():
+        cut[kind][candidate] = scale if level == 1 else -scale
+    return cut
+
+# Return the Benders cuts of a block from the result of its subproblem at the investments x_hat
+# The LP cut supports the cost of the LP relaxation, which is convex in the investments, and the integer L-shaped cut gives the
+# best bound of the block cost at x_hat, the incumbent of a MIP solved at a gap may exceed the optimal cost
+# The operating costs are non-negative, so 0 is the lower bound of the integer L-shaped cut
+def block_cuts(block, result, x_L, x_S):
+    if result['cost'] is None:
+        # No operation of the block is feasible with these investments, exclude them
+        return [indicator_cut(block, x_L, x_S, 0, 1)]
+    year = str(block[0])
+    lp_cut = {'block': block, 'theta': 1, 'vL': result['vL'], 'vS': result['vS'],
+              'const': result['lp_cost'] - sum(result['vL'].get(candidate, 0.0) * level for (candidate, y_iter), level in x_L.items() if y_iter == year)
+                       - sum(result['vS'].get(candidate, 0.0) * level for (candidate, y_iter), level in x_S.items() if y_iter == year)}
+    return [lp_cut, indicator_cut(block, x_L, x_S, 1, result['bound'])]
+
+# Return the identity of a Benders cut, cuts with the same identity are the same constraint
+def cut_key(cut):
+    return (cut['block'], cut['theta'], round(cut['const'], 6), tuple(sorted((candidate, round(coef, 9)) for candidate, coef in cut['vL'].items() if coef != 0)),
+            tuple(sorted((candidate, round(coef, 9)) for candidate, coef in cut['vS'].items() if coef != 0)))
+
+# Add the new cuts that are not in the list yet
+def add_benders_cuts(cuts, new_cuts):
+    keys = {cut_key(cut) for cut in cuts}
+    for cut in new_cuts:
+        if cut_key(cut) not in keys:
+            keys.add(cut_key(cut))
+            cuts.append({**cut, 'idle': 0})
+
+# Age the optimality cuts of the blocks in i_range by their slack at the last master solution and drop those that stayed
+# non-binding for benders_cut_max_age solves, the cuts of the other blocks are not in the master and keep their age
+# Feasibility cuts are always kept, dropping them would let the master return to investments already proven infeasible
+def prune_benders_cuts(cuts, i_range):
+    rec = con_bd_cut.records
+    slack = {}
+    if rec is not None:
+        slack = dict(zip(rec['bc'].astype(str), (rec['level'] - rec['lower']) / rec['lower'].abs().clip(lower=1.0)))
+    kept = []
+    for label, cut in zip([str(c) for c in range(1, len(cuts) + 1)], cuts):
+        if cut['theta'] != 0 and cut['block'][2] in i_range:
+            # Rows left out of the records are at their default level, which is binding
+            cut['idle'] = 0 if slack.get(label, 0.0) <= config.cut_activity_tol else cut.get('idle', 0) + 1
+            if cut['idle'] >= config.benders_cut_max_age:
+                continue
+        kept.append(cut)
+    if len(kept) < len(cuts):
+        logger.info("Dropped {} Benders cut(s) non-binding for {} master solves, {} left".format(len(cuts) - len(kept), config.benders_cut_max_age, len(kept)))
+    cuts[:] = kept
+
+# Load the Benders cuts into the parameters of the master
+def set_benders_cuts(cuts):
+    labels = [str(c) for c in range(1, len(cuts) + 1)]
+    bc.setRecords(labels)
+    cut_ytj.setRecords(pd.DataFrame([(c,) + tuple(str(i) for i in cut['block']) for c, cut in zip(labels, cuts)], columns=['bc', 'y', 't', 'j']))
+    cut_theta.setRecords(pd.DataFrame([(c, cut['theta']) for c, cut in zip(labels, cuts)], columns=['bc', 'value']))
+    cut_const.setRecords(pd.DataFrame([(c, cut['const']) for c, cut in zip(labels, cuts)], columns=['bc', 'value']))
+    cut_vL.setRecords(pd.DataFrame([(c, candidate, coef) for c, cut in zip(labels, cuts) for candidate, coef in cut['vL'].items() if coef != 0],
+                                   columns=['bc', 'lc', 'value']))
+    cut_vS.setRecords(pd.DataFrame([(c, candidate, coef) for c, cut in zip(labels, cuts) for candidate, coef in cut['vS'].items() if coef != 0],
+                                   columns=['bc', 's', 'value']))
+
+# Solve the OLMP over the blocks of the iterations in i_range by Benders decomposition, the cuts are added to and pruned from the given list
+# Return the status of the master, the objective of the best investments found, which are left in the levels, and the cost of each (y, j) block at them
+def solve_olmp_benders(ess_inv, i_range, cuts):
+    rds = t.toList()
+    blocks = [(y_iter, t_iter, i) for i in i_range for y_iter in years_data for t_iter in rds]
+    discount = {y_iter: factor / (1.0 + kappa.toValue()) for y_iter, factor in discount_factors().items()}
+    lb, ub, best = -999999999999, 999999999999, None
+    for iteration in range(1, config.benders_max_iter + 1):
+        set_benders_cuts(cuts)
+        OLMP_model = build_model('OLMP_master', build_olmp_master_eqns, (ess_inv,))
+        solve_model(OLMP_model, "mip")
+        if OLMP_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+            return OLMP_model.status.name, None, None
+        lb = OLMP_model.objective_value
+        x_L = investment_levels(vL_ly_prev, lc.toList())
+        x_S = investment_levels(vS_sy_prev, s.toList()) if ess_inv else {}
+        rho_master = dict(zip(rho_y.records['y'].astype(str), rho_y.records['level'])) if rho_y.records is not None else {}
+        prune_benders_cuts(cuts, i_range)
+        results = solve_olsp_blocks(ess_inv, blocks)
+        for block in blocks:
+            add_benders_cuts(cuts, block_cuts(block, results[block], x_L, x_S))
+        if all(result['cost'] is not None for result in results.values()):
+            block_cost = {(y_iter, i): sum(results[y_iter, t_iter, i]['cost'] for t_iter in rds) for y_iter in years_data for i in i_range}
+            rho = {y_iter: max(block_cost[y_iter, i] for i in i_range) for y_iter in years_data}
+            # The master objective with rho_y replaced by the worst-case operating cost of the blocks at its investments
+            value = lb + sum(discount[y_iter] * (rho[y_iter] - rho_master.get(str(y_iter), 0.0)) for y_iter in years_data)
+            if value < ub:
+                ub = value
+                best = {var.name: var.records.copy() for var in [vL_ly, vS_sy, vL_ly_prev, vS_sy_prev] if var.records is not None}, rho, block_cost
+        logger.info("Benders OLMP iteration {} over blocks {}: LB = {} and UB = {}".format(iteration, i_range, lb, ub))
+        if best is not None and ub - lb <= config.tol * max(abs(ub), 1.0):
+            break
+    else:
+        logger.warning("Benders OLMP stopped after {} iterations with LB = {} and UB = {}, the LB is kept as the OLMP bound".format(config.benders_max_iter, lb, ub))
+    if best is None:
+        return 'InfeasibleNoSolution', None, None
+    records, rho, block_cost = best
+    for name, rec in records.items():
+        m[name].setRecords(rec)
+    rho_y.setRecords(pd.DataFrame({'y': [str(y_iter) for y_iter in years_data], 'level': [rho[y_iter] for y_iter in years_data]}))
+    objective = ub if ub - lb <= config.tol * max(abs(ub), 1.0) else lb
+    min_inv_cost_wc.l[...] = objective
+    return OLMP_model.status.name, objective, block_cost
+
+# Solve the relaxed outer-loop master problem over the active blocks of the cut pool, at the given gap and with UBO as objective cutoff
+# Return the LBO it gives and the proven gap of its last solve
+def solve_olmp_relaxed(j_iter, lb_o, ess_inv, pool, gap=config.tol, ub_o=None):
+    if j_iter not in pool['active']:
+        pool['active'].append(j_iter)
+        pool['idle'][j_iter] = 0
+        pool['last_binding'][j_iter] = pool['solves']
+        trim_cut_pool(pool, j_iter)
     olmp_ov = 0
+    olmp_gap = 0.0
     last_valid_VL = None
-    # Solve at least once, until ro == j
-    while ro <= j_iter:
-        # Determine the subset i as a function of j and ro
-        i_range = list(range(j_iter - ro + 1, j_iter + 1))
+    # Solve at least once, restoring evicted blocks while the bound does not improve, even above the size cap
+    while True:
+        i_range = sorted(pool['active'])
         ir.setRecords(i_range)
-        # Solve the outer-loop master problem
-        OLMP_model = build_olmp_eqns(ess_inv, i_range) # Rebuild the olmp equations to account for the change in set i
-        OLMP_model.solve(options=Options(relative_optimality_gap=tol, mip="CPLEX", savepoint=1, log_file="log_olmp.txt"),output=sys.stdout)
-        if OLMP_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
-            if ro > 1 and last_valid_VL is not None:
-                logger.warning("Relaxed OLMP at ro = {} (i_range = {}) is {}; falling back to valid ro = {} bound ({:.2f}).".format(ro, i_range, OLMP_model.status.name, ro - 1, olmp_ov))
+        if config.prune_iterations:
+            set_iteration_window(olmp_block_symbols, 'j', i_range)
+        # Solve the outer-loop master problem, as one MIP or by Benders decomposition
+        if config.benders_olmp:
+            status, objective, block_cost = solve_olmp_benders(ess_inv, i_range, pool['benders_cuts'])
+        else:
+            OLMP_model = build_model('OLMP', build_olmp_eqns, (ess_inv,)) # Rebuild the olmp equations to account for the change in set i
+            solve_model(OLMP_model, "mip", gap=gap, cutoff=objective_cutoff('cutup', ub_o))
+            status, objective = OLMP_model.status.name, mip_bound(OLMP_model, gap)
+            olmp_gap = proven_gap(OLMP_model)
+        if status in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+            if last_valid_VL is not None:
+                logger.warning("Relaxed OLMP over blocks {} is {}; falling back to the previous bound ({:.2f}).".format(i_range, status, olmp_ov))
                 vL_ly.setRecords(last_valid_VL)
                 break
             else:
                 raise RuntimeError('OLMP is infeasible at j = {}'.format(j_iter))
+        update_cut_activity(pool, benders_binding_blocks(i_range, block_cost) if config.benders_olmp else binding_blocks(i_range))
         VL_lyj[lc,y] = vL_ly.l[lc,y]
         VL_lyj_prev[lc,y] = vL_ly_prev.l[lc,y]
         VS_syj_prev[sc,y] = vS_sy_prev.l[sc,y]
-        olmp_ov = OLMP_model.objective_value
+        olmp_ov = objective
         if vL_ly.l.records is not None:
             last_valid_VL = vL_ly.l.records.copy()
-        # Exit if ro == j or if optimal value exceeds lb_o, else increment ro and iterate again
-        if ro == j_iter or olmp_ov > lb_o:
-            logger.info("Relaxed OLMP iteration (ro = {}) equals outer-loop iteration (j = {}) or LBO has increased --> Exit OLMP".format(ro, j_iter))
+        # Exit if no block is left out or if optimal value exceeds lb_o, else restore an evicted block and iterate again
+        if not pool['evicted'] or olmp_ov > lb_o:
+            logger.info("Relaxed OLMP over blocks {} (j = {}) includes every block or LBO has increased --> Exit OLMP".format(i_range, j_iter))
             break
-        else:
-            ro += 1
-
-    return olmp_ov
-
-# Solve the inner-loop subproblem
-def solve_ilsp(ess_inv, y_iter, j_iter, k_iter):
-    ILSP_model = build_ilsp_eqns(ess_inv, y_iter, j_iter) # Rebuild the ilsp equations for the given year and outer loop iteration j
-    ILSP_model.solve(options=Options(relative_optimality_gap=tol, mip="CPLEX", savepoint=1, log_file="log_ilsp.txt"),output=sys.stdout)
+        restore_cut(pool)
+    trim_cut_pool(pool, j_iter)
+
+    return olmp_ov, olmp_gap
+
+# Parameters read by the ILSP that change between its solves, passed to the ILSP worker processes
+ilsp_inputs = [CG_gyk, PD_dyk, PG_gyk, PR_ryk, VL_lyj_prev, VS_syj_prev]
+# Whether the RDs of the ILSP are independent subproblems, keyed by ess_inv and checked on the first ILSP built
+ilsp_separable = {}
+
+# Return whether the RDs of the ILSP are independent: every constraint is indexed by the RD and none refers to another RD
+# Storage starts from ES_syt0 and ramping is limited within each RD, so only the objective sums over the RDs
+def ilsp_rds_separable(ess_inv, y_iter, j_iter):
+    if ess_inv not in ilsp_separable:
+        ILSP_model = build_model('ILSP', build_ilsp_eqns, (ess_inv, y_iter, j_iter))
+        coupling = [eqn.name for eqn in ILSP_model.equations if eqn.name != 'OF_ilsp'
+                    and ('t' not in eqn.domain_names or re.search(r'\bt\s*[-+]', eqn.getDefinition()))]
+        if coupling:
+            logger.info("ILSP solved over all RDs at once, the RDs are coupled by {}".format(coupling))
+        ilsp_separable[ess_inv] = not coupling
+    return ilsp_separable[ess_inv]
+
+# Return the records of a symbol at the given labels of its domain, e.g. y=1, t=2
+def slice_records(symbol, **labels):
+    if symbol.records is None:
+        return None
+    mask = pd.Series(True, index=symbol.records.index)
+    for column, label in labels.items():
+        mask &= symbol.records[column].astype(str) == str(label)
+    return symbol.records[mask].copy()
+
+# Replace the records of a variable at the given year and outer loop iteration
+def replace_records(var, y_iter, j_iter, parts):
+    kept = [] if var.records is None else [var.records[(var.records['y'].astype(str) != str(y_iter)) | (var.records['j'].astype(str) != str(j_iter))]]
+    parts = [part for part in kept + parts if not part.empty]
+    if parts:
+        var.setRecords(pd.concat(parts, ignore_index=True))
+
+# Replace the levels of the ILSP decisions at the given year, outer loop iteration and RDs by levels stored in the solve cache
+def restore_levels(levels, y_iter, j_iter, rds):
+    records = {}
+    for var in warm_start_vars['ILSP']:
+        parts = [] if levels[var.name] is None else [levels[var.name].assign(j=str(j_iter))]
+        if var.records is not None:
+            rec = var.records
+            kept = (rec['y'].astype(str) != str(y_iter)) | (rec['j'].astype(str) != str(j_iter)) | ~rec['t'].astype(str).isin([str(t_iter) for t_iter in rds])
+            parts.insert(0, rec[kept])
+        # A variable without records and without cached levels has nothing to restore
+        if parts:
+            records[var] = pd.concat(parts, ignore_index=True)
+    if records:
+        m.setRecords(records)
+
+# Solve the ILSP restricted to the given RDs in this process and return its objective value
+# An instance with the same inputs as a cached one, e.g. for an investment plan of a previous outer iteration, is not solved again
+def solve_ilsp_rds(ess_inv, y_iter, j_iter, k_iter, rds):
+    tr.setRecords(rds)
+    # The ilsp equations only depend on the year, outer loop iteration j and RDs, the uncertain parameters are updated in place
+    ILSP_model, frozen = get_model(('ILSP', y_iter, j_iter, tuple(rds)), build_ilsp_eqns, (ess_inv, y_iter, j_iter), ilsp_inputs)
+    key = solve_cache_key(('ILSP', ess_inv, y_iter, tuple(rds)), ILSP_model) if config.cache_solves else None
+    cached = solve_cache.get(key) if key is not None else None
+    if cached is not None:
+        restore_levels(cached['levels'], y_iter, j_iter, rds)
+        run_stats['cache_hits']['ILSP'] = run_stats['cache_hits'].get('ILSP', 0) + 1
+        logger.info("ILSP (y = {}, j = {}, k = {}, t = {}) taken from the solve cache, objective = {}".format(y_iter, j_iter, k_iter, rds, cached['objective']))
+        return cached['objective']
+    solve_model(ILSP_model, "mip", frozen)
     if ILSP_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
-        raise RuntimeError('ILSP is infeasible at y = {}, j = {}, k = {}'.format(y_iter, j_iter, k_iter))
-    UG_gythv[g,y,t,h,k_iter] = uG_gythi.l[g,y,t,h,j_iter]
-    US_sythv[s,y,t,h,k_iter] = uS_sythi.l[s,y,t,h,j_iter]
-    ilsp_ov = ILSP_model.objective_value
+        raise RuntimeError('ILSP is infeasible at y = {}, j = {}, k = {}, t = {}'.format(y_iter, j_iter, k_iter, rds))
+    if key is not None:
+        levels = {}
+        for var in warm_start_vars['ILSP']:
+            rec = slice_records(var, y=y_iter, j=j_iter)
+            levels[var.name] = rec[rec['t'].astype(str).isin([str(t_iter) for t_iter in rds])] if rec is not None else None
+        solve_cache.put(key, {'objective': ILSP_model.objective_value, 'levels': levels})
+    return ILSP_model.objective_value
+
+# Worker process entry point of the decomposed ILSP: the parameters and the MIP start of the RD are passed in explicitly
+def solve_ilsp_rd_worker(ess_inv, y_iter, j_iter, k_iter, t_iter, inputs):
+    trace_context.update(j=j_iter, y=y_iter, k=k_iter, o=None)
+    release_persistent_models(j_iter)
+    reset_worker_stats()
+    set_worker_inputs(inputs)
+    ilsp_ov = solve_ilsp_rds(ess_inv, y_iter, j_iter, k_iter, [t_iter])
+    levels = {var.name: slice_records(var, y=y_iter, t=t_iter, j=j_iter) for var in warm_start_vars['ILSP']}
+    return t_iter, ilsp_ov, levels, warm_start_stats, run_stats, profiler.collect()
+
+# Solve the ILSP of each RD in the worker pool and assemble the decisions of all RDs in the container
+def solve_ilsp_parallel(executor, ess_inv, y_iter, j_iter, k_iter, rds):
+    inputs = {symbol.name: symbol.records for symbol in ilsp_inputs}
+    futures = [executor.submit(solve_ilsp_rd_worker, ess_inv, y_iter, j_iter, k_iter, t_iter,
+                               {**inputs, **{var.name: slice_records(var, y=y_iter, t=t_iter, j=j_iter) for var in warm_start_vars['ILSP']}})
+               for t_iter in rds]
+    profiler.rescan()
+    rd_ov = {}
+    parts = {var.name: [] for var in warm_start_vars['ILSP']}
+    for future in as_completed(futures):
+        t_iter, rd_ov[t_iter], levels, worker_stats, worker_run_stats, worker_phases = future.result()
+        merge_warm_start_stats(worker_stats)
+        merge_run_stats(worker_run_stats)
+        profiler.merge(worker_phases, 'RD workers')
+        for name, records in levels.items():
+            if records is not None:
+                parts[name].append(records)
+    for var in warm_start_vars['ILSP']:
+        replace_records(var, y_iter, j_iter, parts[var.name])
+    return sum(rd_ov[t_iter] for t_iter in rds)
+
+# Solve the ILSP of each RD in this process one after the other and assemble the decisions of all RDs in the container
+# A frozen solve replaces the levels of every RD by those of its own RD, so the levels of each RD are collected right after its solve
+def solve_ilsp_sequential(ess_inv, y_iter, j_iter, k_iter, rds):
+    rd_ov = {}
+    parts = {var.name: [] for var in warm_start_vars['ILSP']}
+    for t_iter in rds:
+        rd_ov[t_iter] = solve_ilsp_rds(ess_inv, y_iter, j_iter, k_iter, [t_iter])
+        for var in warm_start_vars['ILSP']:
+            records = slice_records(var, y=y_iter, t=t_iter, j=j_iter)
+            if records is not None:
+                parts[var.name].append(records)
+    for var in warm_start_vars['ILSP']:
+        replace_records(var, y_iter, j_iter, parts[var.name])
+    return sum(rd_ov[t_iter] for t_iter in rds)
+
+# Solve the inner-loop subproblem, as one subproblem per RD when the RDs are independent
+def solve_ilsp(ess_inv, y_iter, j_iter, k_iter):
+    rds = t.toList()
+    if config.decompose_ilsp and len(rds) > 1 and ilsp_rds_separable(ess_inv, y_iter, j_iter):
+        # The objective of each RD is already weighted by sigma_yt, the ILSP objective is their sum
+        if subproblem_executor is not None:
+            ilsp_ov = solve_ilsp_parallel(subproblem_executor, ess_inv, y_iter, j_iter, k_iter, rds)
+        else:
+            ilsp_ov = solve_ilsp_sequential(ess_inv, y_iter, j_iter, k_iter, rds)
+    else:
+        ilsp_ov = solve_ilsp_rds(ess_inv, y_iter, j_iter, k_iter, rds)
+    copy_levels([(UG_gythv, uG_gythi), (US_sythv, uS_sythi)], source={'j': j_iter}, target={'k': k_iter})
 
     return ilsp_ov
 
+# Dual variables of LP1 and the parameters of LP2 their levels are copied to after every LP1 solve
+lp1_duals = [(LambdaN_nythvo, lambdaN_nythv), (muD_dythvo_up, muD_dythv_up), (muG_gythvo_lo, muG_gythv_lo), (muG_gythvo_up, muG_gythv_up),
+             (muGD_gythvo, muGD_gythv), (muGU_gythvo, muGU_gythv), (muL_lythvo_lo, muL_lythv_lo), (muL_lythvo_up, muL_lythv_up),
+             (muR_rythvo_up, muR_rythv_up), (muS_sythvo_lo, muS_sythv_lo), (muS_sythvo_up, muS_sythv_up), (muSC_sythvo_up, muSC_sythv_up),
+             (muSD_sythvo_up, muSD_sythv_up), (PhiS_sytvo, PhiS_sytv), (PhiS_sytvo_lo, PhiS_sytv_lo), (PhiS_syt0vo, PhiS_syt0v)]
+
 # Solve the inner-loop master problem by using ADA
 def solve_ilmp_ada(y_iter, j_iter, k_iter, tol):
     v_range = list(range(1, k_iter + 1))
     va.setRecords(v_range)
-    # Set binary decision variables to the last solved value for the given inner loop iteration
+    # Both LPs are built once per inner loop iteration, between rounds only their parameters change
+    LP1_model, frozen_lp1 = get_model(('LP1', y_iter, tuple(v_range)), build_lp1_eqns, (y_iter, v_range, config.ess_inv),
+                                      [PD_dyo, PG_gyo, PR_ryo, UG_gythv, US_sythv, VL_lyj_prev, VS_syj_prev])
+    LP2_model, frozen_lp2 = get_model(('LP2', y_iter, tuple(v_range)), build_lp2_eqns, (y_iter, v_range, config.ess_inv),
+                                      [LambdaN_nythvo, muD_dythvo_up, muG_gythvo_lo, muG_gythvo_up, muGD_gythvo, muGU_gythvo,
+                                       muL_lythvo_lo, muL_lythvo_up, muR_rythvo_up, muS_sythvo_lo, muS_sythvo_up, muSC_sythvo_up,
+                                       muSD_sythvo_up, PhiS_sytvo, PhiS_sytvo_lo, PhiS_syt0vo, UG_gythv, US_sythv, VS_syj_prev])
     ada_ov = 0
-    o_iter = 1
-    for ada_iter in range(10):
+    converged = False
+    rounds = []
+    for o_iter in range(1, config.ada_max_iter + 1):
+        trace_context['o'] = o_iter
         if o_iter == 1:
             PD_dyo[d,y] = PD_d_fc[d]
             PG_gyo[g,y] = PG_g_fc[g]
             PR_ryo[r,y] = PR_r_fc[r]
-        LP1_model = build_lp1_eqns(y_iter, v_range, ess_inv)
-        LP1_model.solve(options=Options(relative_optimality_gap=tol, lp="CPLEX", savepoint=1, log_file="log_lp1.txt"),output=sys.stdout)
+        # Between rounds PD_dyo, PG_gyo and PR_ryo change coefficients of con_7e in LP1 and the LambdaN copies change coefficients
+        # of con_8l in LP2, so the last optimal basis is neither primal nor dual feasible in general, it is only an advanced start
+        restart = config.ada_basis_restart and o_iter > 1
+        start = time.perf_counter()
+        solve_model(LP1_model, "lp", frozen_lp1, basis=restart)
+        lp1_time = time.perf_counter() - start
         if LP1_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
             raise RuntimeError('LP1 is infeasible at y = {}, j = {}, k = {}'.format(y_iter, j_iter, k_iter))
-        LambdaN_nythvo[n,y,t,h,k] = lambdaN_nythv.l[n,y,t,h,k]
-        muD_dythvo_up[d,y,t,h,k] = muD_dythv_up.l[d,y,t,h,k]
-        muG_gythvo_lo[g,y,t,h,k] = muG_gythv_lo.l[g,y,t,h,k]
-        muG_gythvo_up[g,y,t,h,k] = muG_gythv_up.l[g,y,t,h,k]
-        muGD_gythvo[g,y,t,h,k] = muGD_gythv.l[g,y,t,h,k]
-        muGU_gythvo[g,y,t,h,k] = muGU_gythv.l[g,y,t,h,k]
-        muL_lythvo_lo[l,y,t,h,k] = muL_lythv_lo.l[l,y,t,h,k]
-        muL_lythvo_up[l,y,t,h,k] = muL_lythv_up.l[l,y,t,h,k]
-        muR_rythvo_up[r,y,t,h,k] = muR_rythv_up.l[r,y,t,h,k]
-        muS_sythvo_lo[s,y,t,h,k] = muS_sythv_lo.l[s,y,t,h,k]
-        muS_sythvo_up[s,y,t,h,k] = muS_sythv_up.l[s,y,t,h,k]
-        muSC_sythvo_up[s,y,t,h,k] = muSC_sythv_up.l[s,y,t,h,k]
-        muSD_sythvo_up[s,y,t,h,k] = muSD_sythv_up.l[s,y,t,h,k]
-        PhiS_sytvo[s,y,t,k] = PhiS_sytv.l[s,y,t,k]
-        PhiS_sytvo_lo[s,y,t,k] = PhiS_sytv_lo.l[s,y,t,k]
-        PhiS_syt0vo[s,y,t,k] = PhiS_syt0v.l[s,y,t,k]
+        copy_levels(lp1_duals)
         lp1_ov = LP1_model.objective_value
 
-        LP2_model = build_lp2_eqns(y_iter, v_range, ess_inv)
-        LP2_model.solve(options=Options(relative_optimality_gap=tol, lp="CPLEX", savepoint=1, log_file="log_lp2.txt"),output=sys.stdout)
+        start = time.perf_counter()
+        solve_model(LP2_model, "lp", frozen_lp2, basis=restart)
+        lp2_time = time.perf_counter() - start
         if LP2_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
             raise RuntimeError('LP2 is infeasible at y = {}, j ={}, k = {}'.format(y_iter, j_iter, k_iter))
-        PD_dyo[d,y] = pD_dy.l[d,y]
-        PG_gyo[g,y] = pG_gy.l[g,y]
-        PR_ryo[r,y] = pR_ry.l[r,y]
+        copy_levels([(PD_dyo, pD_dy), (PG_gyo, pG_gy), (PR_ryo, pR_ry)])
         lp2_ov = LP2_model.objective_value
 
         ada_ov = min(lp1_ov, lp2_ov)
-        if (abs(lp1_ov - lp2_ov) / min(lp1_ov, lp2_ov)) < tol:
+        gap = abs(lp1_ov - lp2_ov) / min(lp1_ov, lp2_ov)
+        rounds.append({'o': o_iter, 'lp1': lp1_ov, 'lp2': lp2_ov, 'gap': gap, 'lp1_time': lp1_time, 'lp2_time': lp2_time})
+        logger.info("ADA round o = {}: LP1 = {}, LP2 = {}, gap = {:.2e} ({:.2f} s + {:.2f} s)".format(o_iter, lp1_ov, lp2_ov, gap, lp1_time, lp2_time))
+        if gap < tol:
+            converged = True
             logger.info("ADA ILMP converged in o = {} iteration(s)".format(o_iter))
             break
-        else:
-            o_iter += 1
-            if o_iter > 5:
-                logger.info("ADA ILMP did not converge in max number of iterations")
-                break
+    if not converged:
+        logger.info("ADA ILMP did not converge in max number of iterations")
+    run_stats['o'].append({'j': j_iter, 'y': y_iter, 'k': k_iter, 'o': len(rounds), 'converged': converged, 'rounds': rounds})
+    trace_context['o'] = None
 
     return ada_ov
 
-# Solve the relaxed inner-loop master problem
-def solve_ilmp_relaxed(y_iter, j_iter, k_iter, ub_i_prev):
+# Duals of the ILMP whose product with an uncertainty binary is linearized with a Big-M, as (Big-M, dual)
+# Whatever the value of the binary, con_5c_lin_* bound each of these duals by its Big-M, FD_dyth bounds the nodal price of the load
+bigm_duals = [(FD_up_dyth, muD_dythv_up), (FG_up_gyth, muG_gythv_up), (FR_up_ryth, muR_rythv_up)]
+
+# Return the (entity, y, t, h, k) records of a dual in the ILMP window as strings with its level
+def window_levels(records, y_iter, v_range):
+    records = records.iloc[:, :6].set_axis(['e', 'y', 't', 'h', 'k', 'level'], axis=1)
+    records = records[(records['y'].astype(str) == str(y_iter)) & records['k'].astype(str).isin([str(v) for v in v_range])]
+    return records.astype({col: str for col in ['e', 'y', 't', 'h', 'k']})
+
+# Big-M records, as (name, entity, y, t, h), whose dual followed them up without changing the ILMP objective
+# Such a dual has no effect on the worst case at its Big-M, e.g. a zero coefficient in the objective, so it is no longer checked
+degenerate_bigm = set()
+
+# Return, for each Big-M of the last ILMP solve at (y, window), the magnitude of the duals within bigm_check_tol of it by (entity, y, t, h)
+# A binding Big-M may cut off the worst case, the UBI of the solve is then not valid
+def binding_bigm(y_iter, v_range):
+    duals = [(bigm, window_levels(var.records, y_iter, v_range)) for bigm, var in bigm_duals if var.records is not None]
+    if lambdaN_nythv.records is not None:
+        prices = window_levels(lambdaN_nythv.records, y_iter, v_range).rename(columns={'e': 'n'})
+        loads_at = d_n.records.iloc[:, :2].set_axis(['e', 'n'], axis=1).astype(str)
+        duals.append((FD_dyth, prices.merge(loads_at, on='n')[['e', 'y', 't', 'h', 'k', 'level']]))
+    binding = {}
+    for bigm, levels in duals:
+        values = bigm.records.iloc[:, :5].set_axis(['e', 'y', 't', 'h', 'value'], axis=1).astype({col: str for col in ['e', 'y', 't', 'h']})
+        levels = levels.merge(values, on=['e', 'y', 't', 'h'])
+        levels = levels[levels['level'].abs() >= (1 - config.bigm_check_tol) * levels['value']]
+        keys = {}
+        for e_, y_, t_, h_, level in zip(levels['e'], levels['y'], levels['t'], levels['h'], levels['level'].abs()):
+            if (bigm.name, e_, y_, t_, h_) not in degenerate_bigm:
+                keys[(e_, y_, t_, h_)] = max(keys.get((e_, y_, t_, h_), 0.0), level)
+        if keys:
+            binding[bigm] = keys
+    return binding
+
+# Multiply the binding Big-Ms, at least as large as their dual and 1, by bigm_growth
+# The frozen ILMP models are released since the Big-Ms are fixed in them
+def enlarge_bigm(binding):
+    for bigm, keys in binding.items():
+        records = bigm.records.copy()
+        dual = records.iloc[:, :4].astype(str).apply(tuple, axis=1).map(keys)
+        hit = dual.notna()
+        value = records.columns[4]
+        records.loc[hit, value] = records.loc[hit, value].clip(lower=dual[hit]).clip(lower=1.0) * config.bigm_growth
+        bigm.setRecords(records)
+    for model_key in [model_key for model_key in frozen_models if model_key[0] == 'ILMP']:
+        frozen_models.pop(model_key).unfreeze()
+
+# Solve the relaxed inner-loop master problem at the given gap and with LBI as objective cutoff, return the UBI it gives
+def solve_ilmp_relaxed(y_iter, j_iter, k_iter, ub_i_prev, gap=config.tol, lb_i=None):
     ri = 1 # Initialize relaxed iteration counter
     ilmp_ov = 999999999999
     last_valid_sol = None
@@ -952,10 +1880,38 @@ def solve_ilmp_relaxed(y_iter, j_iter, k_iter, ub_i_prev):
         # Determine the subset v as a function of k and ri
         v_range = list(range(k_iter - ri + 1, k_iter + 1))
         vr.setRecords(v_range)
+        if config.prune_iterations:
+            set_iteration_window(inner_loop_symbols, 'k', v_range, 'y{}_'.format(y_iter))
         logger.info('v_range = {}'.format(v_range))
         # Solve the inner-loop master problem
-        ILMP_model = build_ilmp_eqns(y_iter, v_range, ess_inv) # Rebuild the ilmp equations to account for the change in set v
-        ILMP_model.solve(options=Options(relative_optimality_gap=tol, mip="CPLEX", savepoint=1, log_file="log_ilmp.txt"),output=sys.stdout)
+        # The ilmp structure depends on set v, a window that was already solved is reused with the updated parameters
+        enlarged = None
+        for enlargement in range(config.bigm_max_enlargements + 1):
+            ILMP_model, frozen = get_model(('ILMP', y_iter, tuple(v_range)), build_ilmp_eqns, (y_iter, v_range, config.ess_inv),
+                                           [VL_lyj_prev, VS_syj_prev, UG_gythv, US_sythv])
+            solve_model(ILMP_model, "mip", frozen, gap=gap, cutoff=objective_cutoff('cutlo', lb_i))
+            if ILMP_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
+                break
+            binding = binding_bigm(y_iter, v_range)
+            # The duals that followed their enlarged Big-M while the objective stayed within the gap of the solve do not bound the worst case
+            if binding and enlarged is not None and ILMP_model.objective_value <= enlarged['objective'] + max(gap, config.tol) * abs(enlarged['objective']):
+                for bigm, keys in binding.items():
+                    degenerate_bigm.update((bigm.name,) + key for key in keys if key in enlarged['binding'].get(bigm, {}))
+                binding = binding_bigm(y_iter, v_range)
+                logger.info("Enlarging the Big-Ms left the ILMP objective unchanged, the duals that followed them are no longer checked")
+            if not binding:
+                break
+            summary = ', '.join('{} ({} records)'.format(bigm.name, len(keys)) for bigm, keys in binding.items())
+            if enlargement == config.bigm_max_enlargements:
+                logger.error("ILMP (y = {}, k = {}, v_range = {}) still has duals at their Big-M after {} enlargements: {} --> UBI may be invalid".format(
+                    y_iter, k_iter, v_range, enlargement, summary))
+                notifier.publish("ARO-TNEP Big-M", "ILMP duals at their Big-M after {} enlargements at y = {}, k = {}: {}".format(enlargement, y_iter, k_iter, summary),
+                                 priority='high', tags='warning', event='bigm', y=y_iter, k=k_iter)
+                break
+            logger.error("ILMP (y = {}, k = {}, v_range = {}) has duals within {:.0%} of their Big-M: {} --> Multiply these Big-Ms by {} and solve again".format(
+                y_iter, k_iter, v_range, config.bigm_check_tol, summary, config.bigm_growth))
+            enlarged = {'objective': ILMP_model.objective_value, 'binding': binding}
+            enlarge_bigm(binding)
         logger.info("ILMP status = {}".format(ILMP_model.status.name))
         if ILMP_model.status.name in ['InfeasibleGlobal', 'InfeasibleLocal', 'InfeasibleIntermed', 'IntegerInfeasible', 'InfeasibleNoSolution']:
             if ri > 1 and last_valid_sol is not None:
@@ -968,7 +1924,7 @@ def solve_ilmp_relaxed(y_iter, j_iter, k_iter, ub_i_prev):
             else:
                 raise RuntimeError('ILMP is infeasible at y = {}, j = {}, k = {}'.format(y_iter, j_iter, k_iter))
         
-        ilmp_ov = ILMP_model.objective_value
+        ilmp_ov = mip_bound(ILMP_model, gap)
         last_valid_sol = {
             'cG': cG_gy.l.records.copy() if cG_gy.l.records is not None else None,
             'pD': pD_dy.l.records.copy() if pD_dy.l.records is not None else None,
@@ -993,6 +1949,7 @@ def compute_worst_case_total_cost(ess_inv, xi_worst_case):
         vS_vals = vS_sy.l.records
         IS_vals = IS_s.records
         IS_vals.columns = ['s', 'value']
+    discount = discount_factors()
     cost = 0
     for year in years_data:
         sum_line_cost = 0
@@ -1015,127 +1972,458 @@ def compute_worst_case_total_cost(ess_inv, xi_worst_case):
         logger.info('sum_line_cost = {}'.format(sum_line_cost))
         logger.info('sum_ess_cost = {}'.format(sum_ess_cost))
         logger.info('xi_y_year = {}'.format(xi_y_year))
-        cost += (1/((1+kappa.toValue())**(year-1))) * (((xi_y_year+0.04*sum_ess_cost)/(1+kappa.toValue())) + sum_line_cost + sum_ess_cost)
+        cost += discount[int(year)] * (((xi_y_year+0.04*sum_ess_cost)/(1+kappa.toValue())) + sum_line_cost + sum_ess_cost)
 
     return cost
 
-# SOLUTION PROCEDURE #
-lb_o = -999999999999
-ub_o = 999999999999
-VL_lyjm1_rec = None
-VS_syjm1_rec = None
-VL_lyjm1_prev_rec = None
+# Labels used in the log messages of the two inner loops
+inner_loop_labels = {True: ('ADA', 'First inner loop (ADA)', 'ADA ILMP'), False: ('relaxed', 'Second inner loop (relaxed)', 'relaxed ILMP')}
+
+# Return the initial state of an inner loop
+def new_inner_loop_state(ub_i):
+    return {'k': 1, 'lb_i': -999999999999, 'ub_i': ub_i, 'il_error': 999.0, 'ilsp_done': False, 'done': False}
+
+# Run an inner loop from the given state, the state is updated in place after each ILSP and ILMP solve
+def run_inner_loop(y_iter, j_iter, loop, is_ada, checkpoint):
+    name, title, ilmp_name = inner_loop_labels[is_ada]
+    while loop['k'] <= k_max:
+        k_iter = loop['k']
+        trace_context.update(y=y_iter, k=k_iter, lb=loop['lb_i'], ub=loop['ub_i'])
+        if not loop['ilsp_done']:
+            logger.info("Starting {} inner loop iteration k = {}".format(name, k_iter))
+            set_uncertain_params_ilsp(k_iter, is_ada=is_ada)
+            ilsp_val = solve_ilsp(config.ess_inv, y_iter, j_iter, k_iter)
+            loop['lb_i'] = max(loop['lb_i'], ilsp_val)
+            loop['ilsp_done'] = True
+            checkpoint()
+        logger.info("LBI = {} and UBI = {} before computing {} inner loop error.".format(loop['lb_i'], loop['ub_i'], name))
+        loop['il_error'] = (loop['ub_i'] - loop['lb_i']) / loop['lb_i'] if loop['lb_i'] > 0 else 999.0
+        logger.info("IL {} error = {:.4f}%.".format(name, loop['il_error'] * 100))
+        result_writer.write({'loop': name, **trace_context, 'lb': loop['lb_i'], 'ub': loop['ub_i'], 'error': loop['il_error']})
+        if loop['il_error'] < config.tol:
+            logger.info("{} has converged after k = {} iterations --> End {} inner loop".format(title, k_iter, name))
+            break
+        logger.info("{} has not converged after k = {} iterations --> Solve {}".format(title, k_iter, ilmp_name))
+        trace_context.update(lb=loop['lb_i'], ub=loop['ub_i'])
+        if is_ada:
+            loop['ub_i'] = solve_ilmp_ada(y_iter, j_iter, k_iter, config.ada_tol)
+        else:
+            loop['ub_i'] = min(loop['ub_i'], solve_ilmp_relaxed(y_iter, j_iter, k_iter, loop['ub_i'], adaptive_gap(loop['il_error']), loop['lb_i']))
+        loop['k'] += 1
+        loop['ilsp_done'] = False
+        checkpoint()
+    loop['done'] = True
+    run_stats['k'].append({'j': j_iter, 'y': y_iter, 'loop': name, 'k': min(loop['k'], k_max)})
+
+# Solve the ADA and relaxed inner loops of one year for the investment decisions fixed by the OLMP
+# An interrupted year is resumed from the inner loop state saved in its checkpoint
+def solve_year_inner_loops(y_iter, j_iter, inner=None, checkpoint=lambda: None):
+    if inner is None:
+        inner = {'ada': new_inner_loop_state(999999999999), 'rel': None}
+    logger.info("Starting inner loop problems for y = {}".format(y_iter))
+    # INNER LOOP: ILSP + ADA ILMP #
+    ada = inner['ada']
+    if not ada['done']:
+        logger.info("Starting first inner loop (ADA) for y = {}".format(y_iter))
+        run_inner_loop(y_iter, j_iter, ada, True, checkpoint)
+    # INNER LOOP: ILSP + relaxed ILMP #
+    if inner['rel'] is None:
+        inner['rel'] = new_inner_loop_state(ada['ub_i'] if (ada['il_error'] < config.tol and ada['ub_i'] >= ada['lb_i']) else 999999999999)
+        logger.info("Starting second inner loop (relaxed) for y = {}".format(y_iter))
+    run_inner_loop(y_iter, j_iter, inner['rel'], False, checkpoint)
+    if config.prune_iterations:
+        drop_year_records(y_iter)
+
+    return inner['rel']['ub_i']
+
+# Worst-case realization variables handed back from the year loop to the next OLMP
+wc_vars = {'cG_gy': cG_gy, 'pD_dy': pD_dy, 'pG_gy': pG_gy, 'pR_ry': pR_ry}
+
+# Return the records of a (entity, year) variable restricted to one year
+def year_records(var, y_iter):
+    if var.records is None:
+        return None
+    return var.records[var.records['y'].astype(str) == str(y_iter)].copy()
+
+# Worker process entry point: each worker holds its own container, so the investment decisions are passed in explicitly
+def solve_year_worker(y_iter, j_iter, VL_prev_rec, VS_prev_rec):
+    trace_context.update(j=j_iter, y=y_iter, k=None, o=None)
+    release_persistent_models(j_iter)
+    reset_worker_stats()
+    VL_lyj_prev[lc, y] = 0
+    VS_syj_prev[s, y] = 0
+    if VL_prev_rec is not None:
+        VL_lyj_prev.setRecords(VL_prev_rec)
+    if VS_prev_rec is not None:
+        VS_syj_prev.setRecords(VS_prev_rec)
+    xi_y_wc = solve_year_inner_loops(y_iter, j_iter)
+    levels = {name: year_records(var, y_iter) for name, var in wc_vars.items()}
+    return y_iter, xi_y_wc, levels, warm_start_stats, run_stats, profiler.collect()
+
+# Solve the inner loops of the years without a result in the worker pool and merge all results in year order
+# Each result is kept in the decomposition state as soon as its worker returns
+def solve_years_parallel(executor, j_iter, state, checkpoint):
+    futures = [executor.submit(solve_year_worker, y_iter, j_iter, VL_lyj_prev.records, VS_syj_prev.records)
+               for y_iter in years_data if y_iter not in state['year_results']]
+    profiler.rescan()
+    for future in as_completed(futures):
+        y_iter, xi_y_wc, levels, worker_stats, worker_run_stats, worker_phases = future.result()
+        logger.info("Worst-case operating cost of y = {} received from worker: {}".format(y_iter, xi_y_wc))
+        merge_warm_start_stats(worker_stats)
+        merge_run_stats(worker_run_stats)
+        # The workers are children of this process, so their memory and CPU time also count in the YEAR LOOP phase
+        profiler.merge(worker_phases, 'workers')
+        state['year_results'][y_iter] = (xi_y_wc, levels)
+        checkpoint()
+    results = [state['year_results'][y_iter] for y_iter in years_data]
+    for name, var in wc_vars.items():
+        parts = [levels[name] for _, levels in results if levels[name] is not None and not levels[name].empty]
+        if parts:
+            var.setRecords(pd.concat(parts, ignore_index=True))
+    return {y_iter: state['year_results'][y_iter][0] for y_iter in years_data}
+
 j_max = 5
 j.setRecords(list(range(1, j_max+1)))
 k_max = 5
 k.setRecords(list(range(1, k_max+1)))
-# OUTER LOOP #
-j_iter = 1
-for ol_iter in range(j_max):
-    logger.info("Starting outer loop problem for j = {}".format(j_iter))
-    set_uncertain_params_olmp(j_iter)
-    olmp_val = solve_olmp_relaxed(j_iter, lb_o, ess_inv)
-    lb_o = max(lb_o, olmp_val)
-    if j_iter > 1:
-        if vL_ly.l.records is not None and vS_sy.l.records is not None:
-            if vL_ly.l.records.equals(VL_lyjm1_rec) and vS_sy.l.records.equals(VS_syjm1_rec):
-                logger.info("No change in investment decision variables --> End outer loop")
-                break
-        elif vL_ly.l.records is None and VL_lyjm1_rec is None and vS_sy.l.records is None and VS_syjm1_rec is None:
-            logger.info("No change in investment decision variables (zero investment) --> End outer loop")
-            break
-    # YEAR LOOP
-    xi_year_worst_case = {}
-    for y_iter in years_data:
-        logger.info("Starting inner loop problems for y = {}".format(y_iter))
-        # INNER LOOP: ILSP + ADA ILMP #
-        lb_i_ada = -999999999999
-        ub_i_ada = 999999999999
-        k_iter_ada = 1
-        logger.info("Starting first inner loop (ADA) for y = {}".format(y_iter))
-        for il_ada_iter in range(k_max):
-            logger.info("Starting ADA inner loop iteration k = {}".format(k_iter_ada))
-            set_uncertain_params_ilsp(k_iter_ada, is_ada=True)
-            ilsp_val_ada = solve_ilsp(ess_inv, y_iter, j_iter, k_iter_ada)
-            lb_i_ada = max(lb_i_ada, ilsp_val_ada)
-            logger.info("LBI = {} and UBI = {} before computing ADA inner loop error.".format(lb_i_ada, ub_i_ada))
-            il_error_ada = (ub_i_ada - lb_i_ada) / lb_i_ada if lb_i_ada > 0 else 999.0
-            logger.info("IL ADA error = {:.4f}%.".format(il_error_ada * 100))
-            if il_error_ada < tol:
-                logger.info("First inner loop (ADA) has converged after k = {} iterations --> End ADA inner loop".format(k_iter_ada))
-                break
-            else:
-                logger.info("First inner loop (ADA) has not converged after k = {} iterations --> Solve ADA ILMP".format(k_iter_ada))
-                ub_i_ada = solve_ilmp_ada(y_iter, j_iter, k_iter_ada, tol)
-                k_iter_ada += 1
-        # INNER LOOP: ILSP + relaxed ILMP #
-        lb_i_rel = -999999999999
-        ub_i_rel = ub_i_ada if (il_error_ada < tol and ub_i_ada >= lb_i_ada) else 999999999999
-        k_iter_rel = 1
-        cG_solved = None
-        pD_solved = None
-        pG_solved = None
-        pR_solved = None
-        logger.info("Starting second inner loop (relaxed) for y = {}".format(y_iter))
-        for il_rel_iter in range(k_max):
-            logger.info("Starting relaxed inner loop iteration  k = {}".format(k_iter_rel))
-            set_uncertain_params_ilsp(k_iter_rel, is_ada=False)
-            ilsp_val_rel = solve_ilsp(ess_inv, y_iter, j_iter, k_iter_rel)
-            lb_i_rel = max(lb_i_rel, ilsp_val_rel)
-            logger.info("LBI = {} and UBI = {} before computing relaxed inner loop error.".format(lb_i_rel, ub_i_rel))
-            il_error_rel = (ub_i_rel - lb_i_rel) / lb_i_rel if lb_i_rel > 0 else 999.0
-            logger.info("IL relaxed error = {:.4f}%.".format(il_error_rel * 100))
-            if il_error_rel < tol:
-                logger.info("Second inner loop (relaxed) has converged after k = {} iterations --> End relaxed inner loop".format(k_iter_rel))
-                break
-            elif il_error_rel >= tol:
-                logger.info("Second inner loop (relaxed) has not converged after k = {} iterations --> Solve relaxed ILMP".format(k_iter_rel))
-                ilmp_val_rel = solve_ilmp_relaxed(y_iter, j_iter, k_iter_rel, ub_i_rel)
-                ub_i_rel = min(ub_i_rel, ilmp_val_rel)
-                k_iter_rel += 1
-                cG_solved = cG_gy.l.records
-                pD_solved = pD_dy.l.records
-                pG_solved = pG_gy.l.records
-                pR_solved = pR_ry.l.records
-        
-        xi_year_worst_case[y_iter] = ub_i_rel
 
-        if y_iter == max(years_data):
-            logger.info("Reached end of last year (y = {}) in the planning horizon --> End year loop".format(y_iter))
-            break
+# Return the initial state of the nested decomposition
+def new_decomposition_state():
+    return {
+        'step': 0,
+        'j_iter': 1,
+        'lb_o': -999999999999,
+        'ub_o': 999999999999,
+        'wc_cost': None,
+        'VL_lyjm1_rec': None,
+        'VS_syjm1_rec': None,
+        'olmp_done': False,
+        'olmp_gap': 0.0,
+        'ol_error': 999.0,
+        'cut_pool': new_cut_pool(),
+        'xi_year_worst_case': {},
+        'year_results': {},
+        'inner_y': None,
+        'inner': None,
+        'finished': False,
+        'run_id': 'run{}_{}'.format(time.strftime('%Y%m%d%H%M%S'), os.getpid()),
+    }
+
+# Records of the sets, parameters and variables at the last checkpoint, held by weak reference: every solve, assignment and
+# setRecords replaces the records of a symbol, so records that are no longer the same object have changed since then
+# Equations are left out, every solve regenerates them and a resumed ADA only loses the basis of its first restart
+checkpoint_records = {}
+
+# Symbols saved in the deltas of the checkpoint, those of the model set up at import
+# The symbols GAMSPy generates when freezing a model are left out, a resumed run generates them again
+checkpoint_symbol_names = [name for name in m.listSets() + m.listParameters() + m.listVariables() if not isinstance(m[name], Alias)]
+
+# Remember the records of every checkpointed symbol as those of the last checkpoint
+def remember_checkpoint_records():
+    checkpoint_records.clear()
+    for name in checkpoint_symbol_names:
+        records = m[name].records
+        checkpoint_records[name] = weakref.ref(records) if records is not None else None
+
+# Return the records of the symbols that changed since the last checkpoint, None for a symbol whose records were cleared
+def changed_records():
+    changed = {}
+    for name in checkpoint_symbol_names:
+        records, ref = m[name].records, checkpoint_records.get(name, False)
+        if ref is False or (ref is None) != (records is None) or (ref is not None and ref() is not records):
+            changed[name] = records
+    return changed
+
+# Return the file of a delta of the checkpoint, a delta only applies to the container written at the same step
+def delta_file(step, index):
+    return os.path.join(config.checkpoint_dir, 'delta_{}_{}.pkl'.format(step, index))
+
+# Save the decomposition state, with the whole container at the end of an outer loop iteration (full) and after a solve
+# with checkpoint_solves with only the records changed since the previous save, as a delta of the last container
+# The container alternates between two files, each file is written under a temporary name, and the state, written last,
+# names the container and the number of deltas that match it
+def save_checkpoint(state, full=True):
+    if not config.checkpointing:
+        return
+    os.makedirs(config.checkpoint_dir, exist_ok=True)
+    if full or 'container_file' not in state:
+        state['step'] += 1
+        state['container_file'] = 'container_{}.gdx'.format(state['step'] % 2)
+        state['deltas'] = 0
+        m.write(os.path.join(config.checkpoint_dir, state['container_file']))
+    else:
+        path = delta_file(state['step'], state['deltas'] + 1)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(changed_records(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+        state['deltas'] += 1
+    with open(os.path.join(config.checkpoint_dir, 'state_tmp.pkl'), 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(os.path.join(config.checkpoint_dir, 'state_tmp.pkl'), os.path.join(config.checkpoint_dir, 'state.pkl'))
+    remember_checkpoint_records()
+    flush_reloaded_spills()
+    # The deltas of the previous containers are no longer named by the state
+    if full:
+        for name in os.listdir(config.checkpoint_dir):
+            if name.startswith('delta_') and not name.startswith('delta_{}_'.format(state['step'])):
+                os.remove(os.path.join(config.checkpoint_dir, name))
+
+# Load the last checkpoint into the container, container file then deltas in order, and return its decomposition state
+def load_checkpoint():
+    with open(os.path.join(config.checkpoint_dir, 'state.pkl'), 'rb') as f:
+        state = pickle.load(f)
+    m.loadRecordsFromGdx(os.path.join(config.checkpoint_dir, state['container_file']))
+    for index in range(1, state.get('deltas', 0) + 1):
+        with open(delta_file(state['step'], index), 'rb') as f:
+            delta = pickle.load(f)
+        for name, records in delta.items():
+            if records is not None:
+                m[name].setRecords(records)
+            elif m[name].records is not None:
+                m[name].setRecords(m[name].records.iloc[0:0])
+    remember_checkpoint_records()
+    logger.info("Resuming from checkpoint step {} (j = {}) and {} solve delta(s)".format(state['step'], state['j_iter'], state.get('deltas', 0)))
+    return state
+
+# Write the machine-readable summary of the run read by the benchmark suite
+def write_run_summary(path, state, wall_time):
+    summary = {
+        'case': config.case,
+        'ess_inv': config.ess_inv,
+        'years': len(years_data),
+        'wall_time': wall_time,
+        'subproblem_time': run_stats['time'],
+        'subproblem_solves': run_stats['solves'],
+        'solve_cache_hits': run_stats['cache_hits'],
+        'j': state['j_iter'],
+        'k': run_stats['k'],
+        'o': run_stats['o'],
+        'lb_o': float(state['lb_o']),
+        'ub_o': float(state['ub_o']),
+        'peak_memory_mb': profiler.get_peak_mb(),
+        'resource_profile': profiler.report(),
+    }
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+
+# Write the resource profile of the run and log one line per phase
+def write_resource_profile(path):
+    report = profiler.report()
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    for name, phase in sorted(report['phases'].items(), key=lambda item: -item[1]['wall_time']):
+        logger.info("{}: wall time = {:.2f} s, CPU time = {:.2f} s, solver CPU time = {:.2f} s, peak RSS = {:.1f} MB, mean RSS = {} MB".format(
+            name, phase['wall_time'], phase['cpu_time'], phase['child_cpu_time'], phase['peak_rss_mb'], phase['avg_rss_mb']))
+    if 'cgroup_peak_mb' in report:
+        logger.info("Peak memory of the cgroup: {:.1f} MB".format(report['cgroup_peak_mb']))
+
+# Publish the bounds of an outer loop iteration as a progress notification
+# The ETA assumes the remaining iterations up to j_max take the mean time of the previous ones, it is an upper bound
+def notify_progress(j_iter, lb_o, ub_o, ol_error, iteration_times):
+    eta = 0.0 if ol_error < config.tol else sum(iteration_times) / len(iteration_times) * (j_max - j_iter)
+    notifier.publish("ARO-TNEP j = {}".format(j_iter), "LBO = {:.2f}, UBO = {:.2f}, gap = {:.4f}%, ETA <= {:.0f} s".format(lb_o, ub_o, ol_error * 100, eta),
+                     priority='low', tags='hourglass', event='progress', j=j_iter, lb=lb_o, ub=ub_o, gap=ol_error, eta=eta)
+
+# Return the message ending the outer loop when the last OLMP left the investments of the previous iteration unchanged, else None
+def unchanged_investments(state):
+    if vL_ly.l.records is not None and vS_sy.l.records is not None:
+        if vL_ly.l.records.equals(state['VL_lyjm1_rec']) and vS_sy.l.records.equals(state['VS_syjm1_rec']):
+            return "No change in investment decision variables --> End outer loop"
+    elif vL_ly.l.records is None and state['VL_lyjm1_rec'] is None and vS_sy.l.records is None and state['VS_syjm1_rec'] is None:
+        return "No change in investment decision variables (zero investment) --> End outer loop"
+    return None
+
+# Run the nested decomposition from the given state until the outer loop converges or stops
+# The year loop runs in year_executor when one is given and in this process otherwise
+def run_decomposition(state, checkpoint=lambda full=True: None, year_executor=None):
+    # The end of each outer loop iteration saves the whole container, each solve only a delta of the records it changed
+    solve_checkpoint = (lambda: checkpoint(False)) if config.checkpoint_solves else lambda: None
+    iteration_times = []
+    # OUTER LOOP #
+    while not state['finished'] and state['j_iter'] <= j_max:
+        j_iter = state['j_iter']
+        iteration_start = time.perf_counter()
+        trace_context.update(j=j_iter, y=None, k=None, o=None, lb=state['lb_o'], ub=state['ub_o'])
+        if not state['olmp_done']:
+            logger.info("Starting outer loop problem for j = {}".format(j_iter))
+            release_persistent_models(j_iter)
+            set_uncertain_params_olmp(j_iter)
+            set_olmp_start(j_iter)
+            # The Benders OLMP keeps its own convergence test, only the single MIP OLMP is solved at an adaptive gap
+            gap = config.tol if config.benders_olmp else adaptive_gap(state.get('ol_error', 999.0))
+            olmp_val, state['olmp_gap'] = solve_olmp_relaxed(j_iter, state['lb_o'], config.ess_inv, state['cut_pool'], gap, state['ub_o'])
+            state['lb_o'] = max(state['lb_o'], olmp_val)
+            state['olmp_done'] = True
+            solve_checkpoint()
+        if j_iter > 1:
+            reason = unchanged_investments(state)
+            # Investments repeated by an OLMP not proven within tol may not be optimal, the end of the loop is certified at full precision
+            # The certification solve keeps the blocks of the last OLMP, its unbounded LBO never triggers the restoration of evicted blocks
+            if reason is not None and state.get('olmp_gap', 0.0) > config.tol:
+                logger.info("Investments unchanged by the OLMP solved at a gap of {:.2%} --> Certify them at full precision".format(state['olmp_gap']))
+                olmp_val, state['olmp_gap'] = solve_olmp_relaxed(j_iter, -999999999999, config.ess_inv, state['cut_pool'], config.tol, state['ub_o'])
+                state['lb_o'] = max(state['lb_o'], olmp_val)
+                solve_checkpoint()
+                reason = unchanged_investments(state)
+            if reason is not None:
+                logger.info(reason)
+                break
+        # YEAR LOOP
+        if year_executor is not None:
+            with profiler.phase('YEAR LOOP'):
+                xi_year_worst_case = solve_years_parallel(year_executor, j_iter, state, solve_checkpoint)
+        else:
+            xi_year_worst_case = state['xi_year_worst_case']
+            for y_iter in years_data:
+                if y_iter in xi_year_worst_case:
+                    continue
+                if state['inner_y'] != y_iter:
+                    state['inner_y'] = y_iter
+                    state['inner'] ={'ada': new_inner_loop_state(999999999999), 'rel': None}
+                xi_year_worst_case[y_iter] = solve_year_inner_loops(y_iter, j_iter, state['inner'], solve_checkpoint)
+                state['inner_y'] = None
+                state['inner'] = None
+                solve_checkpoint()
+        logger.info("Reached end of last year (y = {}) in the planning horizon --> End year loop".format(max(years_data)))
+
+        # Update ub_o
+        wc_cost = compute_worst_case_total_cost(config.ess_inv, xi_year_worst_case)
+        state['wc_cost'] = wc_cost
+        state['ub_o'] = wc_cost
+        logger.info("LBO = {} and UBO = {} before computing outer loop error.".format(state['lb_o'], state['ub_o']))
+        print("Total worst-case cost = {}".format(state['ub_o']))
+        ol_error = (state['ub_o'] - state['lb_o']) / state['lb_o'] if state['lb_o'] > 0 else 999.0
+        logger.info("OL error = {:.4f}%.".format(ol_error * 100))
+        state['ol_error'] = ol_error
+        result_writer.write({'loop': 'outer', **trace_context, 'y': None, 'k': None, 'lb': state['lb_o'], 'ub': state['ub_o'], 'error': ol_error,
+                             'xi_worst_case': {year: float(xi_y) for year, xi_y in xi_year_worst_case.items()}, 'lines_built': built_assets(vL_ly), 'ess_built': built_assets(vS_sy) if config.ess_inv else ''})
+        iteration_times.append(time.perf_counter() - iteration_start)
+        notify_progress(j_iter, state['lb_o'], state['ub_o'], ol_error, iteration_times)
+        # Sweep scenarios share the results directory, only their bounds are streamed
+        if 'scenario' not in trace_context:
+            result_writer.export(m, 'iteration_{}'.format(j_iter))
+        if ol_error < config.tol:
+            logger.info("Outer loop has converged after j = {} iterations --> End problem".format(j_iter))
+            state['finished'] = True
         else:
-            y_iter += 1
-
-    # Update ub_o
-    wc_cost = compute_worst_case_total_cost(ess_inv, xi_year_worst_case)
-    ub_o = wc_cost
-    logger.info("LBO = {} and UBO = {} before computing outer loop error.".format(lb_o, ub_o))
-    print("Total worst-case cost = {}".format(ub_o))
-    ol_error = (ub_o - lb_o) / lb_o if lb_o > 0 else 999.0
-    logger.info("OL error = {:.4f}%.".format(ol_error * 100))
-    if ol_error < tol:
-        logger.info("Outer loop has converged after j = {} iterations --> End problem".format(j_iter))
-        break
+            state['j_iter'] += 1
+            state['VL_lyjm1_rec'] = vL_ly.l.records
+            state['VS_syjm1_rec'] = vS_sy.l.records
+            state['olmp_done'] = False
+            state['xi_year_worst_case'] = {}
+            state['year_results'] = {}
+        checkpoint()
+    return state
+
+# Parameters that a scenario of a sweep may override
+scenario_params = {'GammaD': GammaD, 'GammaGC': GammaGC, 'GammaGP': GammaGP, 'GammaRS': GammaRS, 'GammaRW': GammaRW, 'IT': IT, 'kappa': kappa}
+# Parameter records once the model is set up, restored before every scenario
+initial_param_records = {name: m[name].records.copy() if m[name].records is not None else None for name in m.listParameters()}
+
+# Bring the container and the run statistics back to their state right after the model was set up
+# Frozen models are released since the scenario parameters are not modifiable in them
+def reset_run():
+    for key in list(frozen_models):
+        frozen_models.pop(key).unfreeze()
+    for name in m.listVariables() + m.listEquations():
+        if m[name].records is not None and not m[name].records.empty:
+            m[name].setRecords(m[name].records.iloc[0:0])
+    for name, records in initial_param_records.items():
+        if records is not None:
+            m[name].setRecords(records.copy())
+        elif m[name].records is not None:
+            m[name].setRecords(m[name].records.iloc[0:0])
+    remove_spills()
+    degenerate_bigm.clear()
+    warm_start_stats.clear()
+    for stats in run_stats.values():
+        stats.clear()
+    pending_build_time.clear()
+
+# Return the candidates built in each year as 'candidate@year' entries
+def built_assets(var):
+    if var.l.records is None:
+        return ''
+    built = var.l.records[var.l.records['level'] > 0.5]
+    return ' '.join('{}@{}'.format(asset, year) for asset, year in zip(built.iloc[:, 0], built['y']))
+
+# Sweep worker entry point: solve the whole problem for one set of scenario parameters in this process's container
+def solve_scenario(params):
+    start = time.perf_counter()
+    reset_run()
+    for name, value in params.items():
+        scenario_params[name].setRecords(value)
+    set_year_coefficients()
+    trace_context.update(scenario=params)
+    state = run_decomposition(new_decomposition_state())
+    return {
+        'lb_o': float(state['lb_o']),
+        'ub_o': float(state['ub_o']),
+        'worst_case_cost': float(state['wc_cost']) if state['wc_cost'] is not None else None,
+        'j': state['j_iter'],
+        'lines_built': built_assets(vL_ly),
+        'ess_built': built_assets(vS_sy) if config.ess_inv else '',
+        'wall_time': time.perf_counter() - start,
+    }
+
+# SOLUTION PROCEDURE #
+if __name__ == '__main__':
+    run_start = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Multi-year ARO-TNEP solution procedure")
+    parser.add_argument('--resume', action='store_true', help="Resume from the last checkpoint instead of starting over")
+    parser.add_argument('--summary', help="Path of the JSON run summary (timings, iteration counts, bounds and peak memory)")
+    args = parser.parse_args()
+    if args.resume:
+        state = load_checkpoint()
+        # Spills of other runs can no longer be resumed
+        if os.path.isdir(config.spill_dir):
+            for name in os.listdir(config.spill_dir):
+                if name != state.get('run_id'):
+                    shutil.rmtree(os.path.join(config.spill_dir, name), ignore_errors=True)
     else:
-        j_iter += 1
-        VL_lyjm1_rec = vL_ly.l.records
-        VS_syjm1_rec = vS_sy.l.records
-print(min_inv_cost_wc.records)
-print(wc_cost)
-print(vL_ly.l.records)
-if ess_inv:
-    print(vS_sy.l.records)
-m.write(r'C:\Users\Kevin\OneDrive - McGill University\Research\Sandbox\optimization\multi-year_AROTNEP\results\antigravity_test\aro_tnep_results.gdx')
-
-# At the end of the script:
-msg = f"multi_year_aro_tnep.py completed successfully!\n\nvL_ly records:\n{vL_ly.l.records}"
-if ess_inv:
-    msg += f"\n\nvS_sy records:\n{vS_sy.l.records}"
-
-# Stop tracking and get peak RAM
-peak_memory = mem_tracker.stop()
-print(f"Peak Memory Used: {peak_memory}")
-
-notify_mobile(topic="kevin_aro_tnep_job_0919", title="Execution SUCCESS", message=msg, tags="white_check_mark")
+        for directory in [config.checkpoint_dir, config.spill_dir]:
+            if os.path.isdir(directory):
+                shutil.rmtree(directory)
+        solve_trace.reset()
+        solver_logs.reset()
+        result_writer.reset()
+        state = new_decomposition_state()
+    if 'run_id' in state:
+        set_spill_run(state['run_id'])
+    checkpoint = lambda full=True: save_checkpoint(state, full)
+    # Worker processes are spawned once and keep their container and frozen models across outer iterations
+    year_executor = ProcessPoolExecutor(max_workers=min(config.year_workers, len(years_data)), mp_context=multiprocessing.get_context('spawn')) if config.parallel_years else None
+    # Year-loop workers solve the RDs of their ILSP one after the other rather than each starting its own pool
+    if config.subproblem_workers > 0 and ((config.decompose_ilsp and not config.parallel_years and len(weights) > 1) or config.benders_olmp):
+        subproblem_executor = ProcessPoolExecutor(max_workers=config.subproblem_workers, mp_context=multiprocessing.get_context('spawn'))
+    run_decomposition(state, checkpoint, year_executor)
+    for executor in [year_executor, subproblem_executor]:
+        if executor is not None:
+            executor.shutdown()
+    remove_spills()
+    if args.summary:
+        write_run_summary(args.summary, state, time.perf_counter() - run_start)
+    wc_cost = state['wc_cost']
+    with profiler.phase('EXPORT'):
+        print(min_inv_cost_wc.records)
+        print(wc_cost)
+        print(vL_ly.l.records)
+        if config.ess_inv:
+            print(vS_sy.l.records)
+        logger.info("Results written to {}".format(result_writer.export(m, 'aro_tnep_results')))
+
+    # At the end of the script:
+    msg = f"multi_year_aro_tnep.py completed successfully!\n\nvL_ly records:\n{vL_ly.l.records}"
+    if config.ess_inv:
+        msg += f"\n\nvS_sy records:\n{vS_sy.l.records}"
+
+    # Stop profiling and report the resources used by each phase
+    profiler.stop()
+    write_resource_profile(config.profile_file)
+    print(f"Peak Memory Used: {profiler.get_peak_formatted()}")
+    report_warm_starts(warm_start_stats)
+
+    notify_mobile(topic=config.notify_topic, title="Execution SUCCESS", message=msg, tags="white_check_mark")
+    notifier.flush()
 
 
@@ -0,0 +1,76 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+
+# Scalar parameters of multi_year_aro_tnep.py that a grid may vary
+sweep_params = ['GammaD', 'GammaGC', 'GammaGP', 'GammaRS', 'GammaRW', 'IT', 'kappa']
+# Maximum number of scenario worker processes
+sweep_workers = 4
+# Number of times a failed scenario is run again before it is reported as failed
+sweep_retries = 2
+
+# Return the scenarios of a grid definition {parameter: value or list of values}, one dict per grid point
+def grid_points(grid):
+    unknown = sorted(set(grid) - set(sweep_params))
+    if unknown:
+        raise ValueError("Unknown sweep parameter(s) {}, expected some of {}".format(unknown, sweep_params))
+    values = [grid[name] if isinstance(grid[name], list) else [grid[name]] for name in grid]
+    return [dict(zip(grid, point)) for point in itertools.product(*values)]
+
+# Worker process entry point: the input data and the model are loaded once per worker and reused by all its scenarios
+# The year loop of each scenario runs in the worker itself
+def run_scenario(params):
+    import multi_year_aro_tnep
+    return multi_year_aro_tnep.solve_scenario(params)
+
+# Solve every scenario in a pool of worker processes and return the result of each one, in order
+# Failed scenarios are submitted again to a new pool, which also recovers from a worker process that died
+def run_sweep(points, workers, retries):
+    results = [None] * len(points)
+    attempts = [0] * len(points)
+    pending = list(range(len(points)))
+    while pending:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=multiprocessing.get_context('spawn'))
+        futures = {}
+        for i in pending:
+            attempts[i] += 1
+            futures[executor.submit(run_scenario, points[i])] = i
+        pending = []
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = {'status': 'ok', **future.result()}
+                print("Scenario {} {} solved: worst-case cost = {}".format(i, points[i], results[i]['worst_case_cost']))
+            except Exception as exc:
+                print("Scenario {} {} failed at attempt {}: {!r}".format(i, points[i], attempts[i], exc))
+                if attempts[i] <= retries:
+                    pending.append(i)
+                else:
+                    results[i] = {'status': 'failed', 'error': repr(exc)}
+        executor.shutdown()
+    return [{**point, 'attempts': attempts[i], **results[i]} for i, point in enumerate(points)]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Solve the ARO-TNEP over a grid of uncertainty budgets, investment budget and discount rate")
+    parser.add_argument('grid', help="JSON file mapping each swept parameter ({}) to a value or a list of values".format(', '.join(sweep_params)))
+    parser.add_argument('--workers', type=int, default=sweep_workers, help="Maximum number of worker processes")
+    parser.add_argument('--retries', type=int, default=sweep_retries, help="Number of retries of a failed scenario")
+    parser.add_argument('--output', default='sweep_results.csv', help="Path of the consolidated CSV results table")
+    args = parser.parse_args()
+
+    with open(args.grid) as f:
+        points = grid_points(json.load(f))
+    # Preprocess the input data once here so that the workers only read the columnar cache
+    import input_data_processing  # noqa: F401
+    start = time.perf_counter()
+    print("Solving {} scenario(s) with up to {} worker(s)".format(len(points), args.workers))
+    table = pd.DataFrame(run_sweep(points, args.workers, args.retries))
+    table.to_csv(args.output, index=False)
+    nb_failed = int((table['status'] != 'ok').sum())
+    print("Sweep finished in {:.1f} s, {} scenario(s) failed, results written to {}".format(time.perf_counter() - start, nb_failed, args.output))
+    sys.exit(1 if nb_failed else 0)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules of code/ are imported by their file name, as the scripts import each other
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
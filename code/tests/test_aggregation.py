@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from aggregation import aggregate, cluster_days, day_hours, pam_medoids, profile_columns, rd_methods, year_days
+
+# Return a year of hourly profiles made of three kinds of day, with a little noise, and the kind of each day
+def three_kinds_of_day(seed=0):
+    rng = np.random.default_rng(seed)
+    hours = np.arange(day_hours) / day_hours
+    shapes = np.array([[np.full(day_hours, 0.2)] * len(profile_columns),
+                       [np.sin(np.pi * hours)] * len(profile_columns),
+                       [0.9 - 0.5 * hours] * len(profile_columns)]).transpose(0, 2, 1)
+    kinds = np.arange(year_days) % 3
+    return shapes[kinds] + rng.normal(0.0, 0.01, (year_days, day_hours, len(profile_columns))), kinds
+
+@pytest.mark.parametrize('method', rd_methods)
+def test_aggregate_weights_sum_to_a_year(method):
+    profiles, _ = three_kinds_of_day()
+    rds, _ = aggregate(profiles, 3, 4, method)
+    assert list(rds) == ['weights', 'RD1', 'RD2', 'RD3']
+    assert rds['weights']['sigma_t [days]'].sum() == pytest.approx(year_days)
+    for name in ['RD1', 'RD2', 'RD3']:
+        assert rds[name]['tau_th [h]'].sum() == day_hours
+        assert list(rds[name].columns) == ['RTP', 'tau_th [h]'] + profile_columns
+
+@pytest.mark.parametrize('method', rd_methods)
+def test_cluster_days_recovers_the_kinds_of_day(method):
+    profiles, kinds = three_kinds_of_day()
+    labels, _ = cluster_days(profiles.reshape(year_days, -1), 3, method)
+    # Clusters are numbered by their first day, which is day 0, 1 and 2 for the three kinds
+    assert (labels == kinds).all()
+
+def test_kmedoids_representatives_are_members_of_their_cluster():
+    profiles, _ = three_kinds_of_day()
+    x = profiles.reshape(year_days, -1)
+    labels, medoids = cluster_days(x, 3, 'kmedoids')
+    assert [labels[row] for row in medoids] == [0, 1, 2]
+
+def test_pam_medoids_cannot_be_improved_by_a_single_swap():
+    x = np.random.default_rng(1).normal(size=(40, 3))
+    dist = ((x[:, None, :] - x[None, :, :]) ** 2).sum(axis=2)
+    medoids = pam_medoids(x, 4)
+    cost = dist[medoids].min(axis=0).sum()
+    for i in range(len(medoids)):
+        for candidate in set(range(len(x))) - set(medoids):
+            swapped = medoids.copy()
+            swapped[i] = candidate
+            assert dist[swapped].min(axis=0).sum() >= cost - 1e-9
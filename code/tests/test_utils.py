@@ -0,0 +1,69 @@
+from utils import SolveCache, parse_cplex_log, parse_mip_start
+
+# Excerpt of the log of a CPLEX MIP solve through GAMS
+mip_log = """
+        Nodes                                         Cuts/
+   Node  Left     Objective  IInf  Best Integer    Best Bound    ItCnt     Gap
+
+Found incumbent of value 1.3592820e+07 after 0.19 sec. (130.08 ticks)
+*   240+  113                       1.36649e+07   1.42672e+08           944.07%
+Found incumbent of value 1.3664945e+07 after 0.24 sec. (170.13 ticks)
+*   246   107      integral     0   1.36957e+07   1.42672e+08     1099  941.72%
+    699   198   4.40154e+07    16   1.36958e+07   4.41718e+07     2651  222.52%
+
+Flow cuts applied:  44
+Mixed integer rounding cuts applied:  6
+Gomory fractional cuts applied:  1
+
+--- MIP status (102): integer optimal, tolerance.
+--- Cplex Time: 0.51sec (det. 397.20 ticks)
+
+MIP Solution:     13695764.867832    (2944 iterations, 784 nodes)
+"""
+
+def test_parse_cplex_log_of_a_mip():
+    stats = parse_cplex_log(mip_log)
+    assert stats['solver_status'] == 'integer optimal, tolerance'
+    assert stats['iterations'] == 2944
+    assert stats['nodes'] == 784
+    assert stats['cuts'] == {'Flow': 44, 'Mixed integer rounding': 6, 'Gomory fractional': 1}
+    assert stats['total_cuts'] == 51
+    assert stats['first_incumbent'] == 13592820.0
+    assert stats['first_incumbent_time'] == 0.19
+    assert [node for node, _ in stats['gap_progression']] == [240, 246, 699]
+    assert stats['gap_progression'][-1][1] == 2.2252
+    assert stats['solver_time'] == 0.51
+
+def test_parse_cplex_log_of_an_lp():
+    # The log of an LP has no solution line, its iteration count is that of the last simplex log line
+    stats = parse_cplex_log("Iteration:    66   Dual objective     =   30911247057.726467\n"
+                            "Iteration:   127   Dual objective     =    3156207146.370160\n"
+                            "--- LP status (1): optimal.\n--- Cplex Time: 0.02sec (det. 3.1 ticks)\n")
+    assert stats['solver_status'] == 'optimal'
+    assert stats['iterations'] == 127
+    assert stats['nodes'] is None
+    assert stats['gap_progression'] == []
+    assert stats['solver_time'] == 0.02
+
+
+def test_solve_cache_drops_corrupt_entries(tmp_path):
+    cache = SolveCache(str(tmp_path), 1)
+    cache.put('a', {'objective': 1.0})
+    assert cache.get('a') == {'objective': 1.0}
+    (tmp_path / 'b.pkl').write_bytes(b'\x80')
+    assert cache.get('b') is None
+    assert not (tmp_path / 'b.pkl').exists()
+    assert cache.get('c') is None
+
+
+def test_parse_mip_start():
+    accepted = ("Processing 1 MIP starts.\nMIP start 'm1' defined solution with objective 1.3696e+07.\n"
+                "1 of 1 MIP starts provided solutions.\nMIP start 'm1' defined initial solution with objective 1.3696e+07.\n"
+                "Found incumbent of value 1.3695607e+07 after 0.03 sec. (13.41 ticks)\n")
+    assert parse_mip_start(accepted) == {'mip_start_accepted': True, 'mip_start_objective': 1.3696e7, 'first_incumbent_time': 0.0}
+    assert parse_cplex_log(accepted)['mip_start_accepted'] is True
+    rejected = ("Processing 1 MIP starts.\nWarning:  No solution found from 1 MIP starts.\n"
+                "Found incumbent of value 9729967.646072 after 0.21 sec. (3.88 ticks)\n")
+    assert parse_mip_start(rejected) == {'mip_start_accepted': False, 'mip_start_objective': None, 'first_incumbent_time': 0.21}
+    cold = "Found incumbent of value 1.6331639e+10 after 0.04 sec. (22.65 ticks)\n"
+    assert parse_mip_start(cold) == {'mip_start_accepted': None, 'mip_start_objective': None, 'first_incumbent_time': 0.04}
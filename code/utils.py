@@ -1,17 +1,25 @@
+import json
 import logging
+import os
+import multiprocessing
+import multiprocessing.util
+import pickle
+import queue
+import re
 import sys
 import requests
 import traceback
 import psutil
 import threading
 import time
+from contextlib import contextmanager
 
 # Create logger
 logger = logging.getLogger('my_logger')
 logger.setLevel(logging.DEBUG)  # Set the lowest level to capture all messages
 
-# Create file handler
-file_handler = logging.FileHandler('my_log_file.log', mode='w')
+# Create file handler (worker processes append so that they do not truncate the main process log)
+file_handler = logging.FileHandler('my_log_file.log', mode='w' if multiprocessing.parent_process() is None else 'a')
 file_handler.setLevel(logging.DEBUG)  # Log all levels to the file
 
 # Create console handler
@@ -28,23 +36,114 @@ logger.addHandler(file_handler)
 logger.addHandler(console_handler)
 
 
-def notify_mobile(topic="kevin_aro_tnep_job_0919", title="Execution Update", message="Job finished", priority="high", tags="white_check_mark"):
-    """Sends a notification to a mobile phone via ntfy.sh."""
-    try:
+class NtfySink:
+    """Pushes notifications to an ntfy.sh topic, a batch of events is sent as a single notification."""
+    def __init__(self, topic, timeout=5):
+        self.topic = topic
+        self.timeout = timeout
+    def send(self, events):
+        last = events[-1]
+        title = last['title'] if len(events) == 1 else '{} ({} updates)'.format(last['title'], len(events))
         # Sanitize Title header to ASCII to prevent latin-1 HTTP header encoding errors in urllib3
         safe_title = title.encode('ascii', 'ignore').decode('ascii').strip()
         headers = {
             "Title": safe_title if safe_title else "Execution Update",
-            "Priority": priority,
-            "Tags": tags
+            "Priority": max((event['priority'] for event in events), key=priority_levels.index),
+            "Tags": last['tags']
         }
-        requests.post(
-            f"https://ntfy.sh/{topic}",
-            data=message.encode('utf-8'),
-            headers=headers
-        )
-    except Exception as e:
-        logger.error(f"Failed to send ntfy notification: {e}")
+        message = '\n\n'.join(event['message'] for event in events)
+        requests.post(f"https://ntfy.sh/{last.get('topic') or self.topic}", data=message.encode('utf-8'), headers=headers, timeout=self.timeout)
+
+class WebhookSink:
+    """Posts each batch of events as a JSON list, e.g. to a local endpoint standing in for ntfy."""
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+    def send(self, events):
+        requests.post(self.url, json=events, timeout=self.timeout).raise_for_status()
+
+class FileSink:
+    """Appends one JSON record per event to a local JSON Lines file."""
+    def __init__(self, path):
+        self.path = path
+    def send(self, events):
+        with open(self.path, 'a') as f:
+            for event in events:
+                f.write(json.dumps(event, default=str) + '\n')
+
+# ntfy priorities, from the lowest to the highest
+priority_levels = ['min', 'low', 'default', 'high', 'urgent']
+
+class Notifier:
+    """Delivers notifications to its sinks from a background thread, so that a slow or unreachable sink never stalls the run.
+
+    Events published within batch_interval of each other are delivered together, urgent events are delivered at once.
+    A failing sink is logged and skipped. At shutdown, pending events are given at most timeout seconds to be delivered.
+    """
+    def __init__(self, sinks=None, batch_interval=2.0, timeout=5):
+        self.sinks = sinks or []
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._done = threading.Event()
+        self._done.set()
+        self._flushing = threading.Event()
+    def configure(self, sinks, batch_interval, timeout):
+        self.sinks = sinks
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+    def publish(self, title, message, priority='default', tags='', **fields):
+        if not self.sinks:
+            return
+        with self._lock:
+            self._pending += 1
+            self._done.clear()
+        self._queue.put({'time': time.time(), 'title': title, 'message': message, 'priority': priority, 'tags': tags, **fields})
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+    def flush(self, timeout=None):
+        """Delivers the pending events without waiting for their batch, for at most timeout seconds (by default the notifier's)."""
+        self._flushing.set()
+        if not self._done.wait(self.timeout if timeout is None else timeout):
+            logger.warning("Pending notifications dropped after waiting {} s".format(self.timeout if timeout is None else timeout))
+        self._flushing.clear()
+    def _run(self):
+        while True:
+            events = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_interval
+            while events[-1]['priority'] != 'urgent' and not self._flushing.is_set() and time.monotonic() < deadline:
+                try:
+                    events.append(self._queue.get(timeout=min(deadline - time.monotonic(), 0.1)))
+                except queue.Empty:
+                    pass
+            for sink in self.sinks:
+                try:
+                    sink.send(events)
+                except Exception as e:
+                    logger.error("Failed to send {} notification(s) to {}: {}".format(len(events), type(sink).__name__, e))
+            with self._lock:
+                self._pending -= len(events)
+                if self._pending == 0:
+                    self._done.set()
+
+# Return the notification sinks with the given names: 'ntfy', 'webhook' and 'file'
+def notification_sinks(names, topic, webhook_url, file_path, timeout):
+    sinks = {'ntfy': lambda: NtfySink(topic, timeout), 'webhook': lambda: WebhookSink(webhook_url, timeout), 'file': lambda: FileSink(file_path)}
+    unknown = sorted(set(names) - set(sinks))
+    if unknown:
+        raise ValueError("Unknown notification sink(s) {}, expected some of {}".format(unknown, sorted(sinks)))
+    return [sinks[name]() for name in names]
+
+notifier = Notifier()
+
+
+def notify_mobile(topic="kevin_aro_tnep_job_0919", title="Execution Update", message="Job finished", priority="high", tags="white_check_mark"):
+    """Queues a notification to the configured sinks, it is delivered in the background."""
+    notifier.publish(title, message, priority=priority, tags=tags, topic=topic)
 
 
 def setup_ntfy_exception_handler(topic="kevin_aro_tnep_job_0919", script_name="multi_year_aro_tnep.py"):
@@ -60,44 +159,433 @@ def setup_ntfy_exception_handler(topic="kevin_aro_tnep_job_0919", script_name="m
             tags="x,warning"
         )
         sys.__excepthook__(exctype, value, tb)
+        notifier.flush()
 
     sys.excepthook = handle_exception
 
-class MemoryTracker:
-    """Monitors peak RAM usage (in MB/GB) of Python and child solver processes."""
-    def __init__(self, interval=0.5):
+class SolveTrace:
+    """Appends one JSON record per solve to a JSON Lines file, flushed on every write so it can be followed live."""
+    def __init__(self, path):
+        self.path = path
+    def reset(self):
+        open(self.path, 'w').close()
+    def write(self, record):
+        # Each record is a single append, so year-loop workers can share the file
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+
+class ResultWriter:
+    """Streams the bounds of every loop iteration to a JSON Lines file and exports selected symbols to compressed GDX files.
+
+    Each GDX file is written under a temporary name and renamed once complete, so a killed run leaves its last
+    complete snapshot behind.
+    """
+    def __init__(self, directory, symbols, compress=True, history_file='bounds_history.jsonl'):
+        self.directory = directory
+        self.symbols = symbols
+        self.compress = compress
+        self.history_path = os.path.join(directory, history_file)
+    def reset(self):
+        os.makedirs(self.directory, exist_ok=True)
+        open(self.history_path, 'w').close()
+    def write(self, record):
+        # Each record is a single append, so year-loop workers can share the file
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.history_path, 'a') as f:
+            f.write(json.dumps(record, default=str) + '\n')
+    def export(self, container, name):
+        """Writes the selected symbols of the container to <directory>/<name>.gdx and returns its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name + '.gdx')
+        partial = os.path.join(self.directory, name + '.partial.gdx')
+        container.write(partial, symbol_names=[symbol for symbol in self.symbols if symbol in container], compress=self.compress)
+        os.replace(partial, path)
+        return path
+
+class SolveCache:
+    """Content-addressed cache of solve results on local disk, one pickle file per key.
+
+    Reading an entry refreshes its modification time and the least recently used entries are evicted once the
+    files exceed max_mb. Entries are written under a temporary name and renamed, so processes can share the directory.
+    """
+    def __init__(self, directory, max_mb):
+        self.directory = directory
+        self.max_bytes = max_mb * 1024 * 1024
+    def get(self, key):
+        path = os.path.join(self.directory, key + '.pkl')
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, OSError):
+            # A corrupt entry is dropped, another reader may have removed it meanwhile
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        # The entry may have been evicted since it was read, its value is still valid
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key + '.pkl')
+        partial = '{}.{}.partial'.format(path, os.getpid())
+        with open(partial, 'wb') as f:
+            pickle.dump(value, f)
+        os.replace(partial, path)
+        self.evict()
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+class LogCapture:
+    """File-like sink of the log of one solve, it only buffers the lines so that the solve never waits on disk I/O."""
+    def __init__(self, path, record):
+        self.path = path
+        self.record = record
+        self.lines = []
+    def write(self, data):
+        self.lines.append(data)
+    def flush(self):
+        pass
+
+class SolverLogs:
+    """Writes the log of every solve to its own indexed file and parses its solver statistics in a background thread.
+
+    The statistics of each solve (status, iterations, nodes, cuts, gap progression, time to the first incumbent) are
+    appended to a JSON Lines file in the same directory, together with the record the solve was captured with.
+    """
+    def __init__(self, directory, stats_file='solver_stats.jsonl'):
+        self.directory = directory
+        self.stats_path = os.path.join(directory, stats_file)
+        self.count = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        # Also runs at the exit of worker processes, which skip the atexit handlers
+        multiprocessing.util.Finalize(None, self.join, exitpriority=10)
+    def reset(self):
+        os.makedirs(self.directory, exist_ok=True)
+        for name in os.listdir(self.directory):
+            if name.endswith('.log'):
+                os.remove(os.path.join(self.directory, name))
+        open(self.stats_path, 'w').close()
+    def capture(self, name, record):
+        """Returns the sink of the next solve, its file is indexed by solve and process."""
+        self.count += 1
+        return LogCapture(os.path.join(self.directory, '{:06d}_{}_{}.log'.format(self.count, name, os.getpid())), record)
+    def submit(self, capture):
+        """Hands a finished capture to the background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._queue.put(capture)
+    def join(self):
+        """Waits until every submitted log has been written and parsed."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+    def _run(self):
+        while True:
+            capture = self._queue.get()
+            try:
+                text = ''.join(capture.lines)
+                os.makedirs(self.directory, exist_ok=True)
+                with open(capture.path, 'w') as f:
+                    f.write(text)
+                with open(self.stats_path, 'a') as f:
+                    f.write(json.dumps({**capture.record, 'log': capture.path, **parse_cplex_log(text)}, default=str) + '\n')
+            except Exception as e:
+                logger.error("Failed to write solver log {}: {}".format(capture.path, e))
+            finally:
+                self._queue.task_done()
+
+# Node log line of the CPLEX branch and cut, e.g. "*     0+    0     1.24691e+07        0.0000           100.00%"
+node_line = re.compile(r'^[*A-Za-z]?\s+(\d+)\+?\s+\d+\+?\s.*\s(\d+(?:\.\d+)?)%$')
+
+# MIP start lines of the CPLEX log, e.g. "1 of 1 MIP starts provided solutions." and "MIP start 'm1' defined initial solution with objective 1.3696e+07."
+mip_start_summary = re.compile(r'^(?:(\d+) of \d+ MIP starts provided solutions|Warning:\s+No solution found from \d+ MIP starts)')
+mip_start_solution = re.compile(r"^MIP start '.*' defined (?:initial )?solution with objective (\S+)\.$")
+
+def parse_mip_start(text):
+    """Returns whether CPLEX accepted the MIP start of a GAMS/CPLEX log, the objective of the start and the time to the first incumbent.
+
+    An accepted start is the incumbent from the beginning of the solve, its time to the first incumbent is 0. The scan
+    stops at the first incumbent, so it stays cheap enough to run right after the solve.
+    """
+    stats = {'mip_start_accepted': None, 'mip_start_objective': None, 'first_incumbent_time': None}
+    for line in text.splitlines():
+        line = line.rstrip()
+        match = mip_start_solution.match(line)
+        if match:
+            if stats['mip_start_objective'] is None:
+                stats['mip_start_objective'] = float(match.group(1))
+            continue
+        match = mip_start_summary.match(line)
+        if match and stats['mip_start_accepted'] is None:
+            stats['mip_start_accepted'] = match.group(1) is not None and int(match.group(1)) > 0
+            if stats['mip_start_accepted']:
+                stats['first_incumbent_time'] = 0.0
+                break
+            continue
+        match = re.match(r'^Found incumbent of value \S+ after ([\d.]+) sec', line)
+        if match:
+            stats['first_incumbent_time'] = float(match.group(1))
+            break
+    return stats
+
+def parse_cplex_log(text):
+    """Returns the solver statistics of a GAMS/CPLEX log."""
+    stats = {'solver_status': None, 'iterations': None, 'nodes': None, 'cuts': {}, 'total_cuts': 0,
+             'first_incumbent_time': None, 'first_incumbent': None, 'gap_progression': [], 'solver_time': None,
+             'mip_start_accepted': None, 'mip_start_objective': None}
+    for line in text.splitlines():
+        line = line.rstrip()
+        match = mip_start_solution.match(line)
+        if match:
+            if stats['mip_start_objective'] is None:
+                stats['mip_start_objective'] = float(match.group(1))
+            continue
+        match = mip_start_summary.match(line)
+        if match:
+            if stats['mip_start_accepted'] is None:
+                stats['mip_start_accepted'] = match.group(1) is not None and int(match.group(1)) > 0
+            continue
+        match = node_line.match(line)
+        if match:
+            stats['gap_progression'].append([int(match.group(1)), float(match.group(2)) / 100])
+            continue
+        match = re.match(r'^(.+?) cuts applied:\s+(\d+)', line)
+        if match:
+            stats['cuts'][match.group(1).strip()] = int(match.group(2))
+            stats['total_cuts'] += int(match.group(2))
+            continue
+        match = re.match(r'^Found incumbent of value (\S+) after ([\d.]+) sec', line)
+        if match and stats['first_incumbent_time'] is None:
+            stats['first_incumbent'] = float(match.group(1))
+            stats['first_incumbent_time'] = float(match.group(2))
+            continue
+        # The simplex iteration log of an LP, overridden by the iteration count of the MIP solution line
+        match = re.match(r'^Iteration:\s+(\d+)', line)
+        if match:
+            stats['iterations'] = int(match.group(1))
+            continue
+        match = re.match(r'^(?:MIP|LP) Solution:\s+\S+\s+\((\d+) iterations(?:, (\d+) nodes)?\)', line)
+        if match:
+            stats['iterations'] = int(match.group(1))
+            stats['nodes'] = int(match.group(2)) if match.group(2) is not None else None
+            continue
+        match = re.match(r'^--- (?:MIP|LP) status \((\d+)\): (.+?)\.?$', line)
+        if match:
+            stats['solver_status'] = match.group(2)
+            continue
+        match = re.match(r'^--- Cplex Time: ([\d.]+)sec', line)
+        if match:
+            stats['solver_time'] = float(match.group(1))
+    return stats
+
+class PhaseProfiler:
+    """Attributes peak and average RSS, CPU time and child solver-process CPU time of the process tree to named phases.
+
+    On Linux the sampler reads /proc directly and only rescans the process tree every few seconds or when a phase
+    change finds new direct children, other platforms fall back to psutil. Nested phases are exclusive: time spent in
+    an inner phase is not counted in the outer one.
+    """
+    def __init__(self, interval=0.25, rescan_interval=5.0):
         self.interval = interval
-        self.peak_bytes = 0
-        self._running = False
+        self.rescan_interval = rescan_interval
+        self.phases = {}
+        self._stack = []
+        self._lock = threading.Lock()
         self._thread = None
-    def _monitor(self):
-        current_proc = psutil.Process()
-        while self._running:
+        self._running = False
+        self._pids = [os.getpid()]
+        self._last_scan = 0.0
+        self._children = None
+        self._use_proc = os.path.exists('/proc/self/statm')
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if self._use_proc else 1
+        self._ticks = os.sysconf('SC_CLK_TCK') if self._use_proc else 1
+        self._segment_start = None
+    def _phase(self, name):
+        return self.phases.setdefault(name, {'wall_time': 0.0, 'cpu_time': 0.0, 'child_cpu_time': 0.0,
+                                             'peak_rss_mb': 0.0, 'rss_sum_mb': 0.0, 'samples': 0})
+    def rescan(self):
+        """Refreshes the process tree, e.g. right after starting worker processes."""
+        if not self._use_proc:
+            return
+        # Map every process to its parent once, then walk down from this process
+        parents = {}
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open('/proc/{}/stat'.format(entry)) as f:
+                        parents.setdefault(int(f.read().rsplit(')', 1)[1].split()[1]), []).append(int(entry))
+                except (OSError, IndexError, ValueError):
+                    pass
+        pids = [os.getpid()]
+        for pid in pids:
+            pids.extend(parents.get(pid, []))
+        self._pids = pids
+        self._children = self._direct_children()
+        self._last_scan = time.monotonic()
+    def _direct_children(self):
+        # Children of every thread of this process, None if the kernel does not expose them
+        children = set()
+        try:
+            for task in os.listdir('/proc/self/task'):
+                with open('/proc/self/task/{}/children'.format(task)) as f:
+                    children.update(int(pid) for pid in f.read().split())
+        except (OSError, ValueError):
+            return None
+        return children
+    def _tree_rss(self):
+        if not self._use_proc:
+            proc = psutil.Process()
             try:
-                # Sum memory of Python process + GAMS/solver child processes
-                mem = current_proc.memory_info().rss
-                for child in current_proc.children(recursive=True):
-                    mem += child.memory_info().rss
-                if mem > self.peak_bytes:
-                    self.peak_bytes = mem
+                return proc.memory_info().rss + sum(child.memory_info().rss for child in proc.children(recursive=True))
             except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return 0
+        if time.monotonic() - self._last_scan > self.rescan_interval:
+            self.rescan()
+        rss = 0
+        for pid in self._pids:
+            try:
+                with open('/proc/{}/statm'.format(pid)) as f:
+                    rss += int(f.read().split()[1]) * self._page_size
+            except (OSError, IndexError, ValueError):
                 pass
+        return rss
+    def _child_cpu(self):
+        # CPU time of the live descendants plus that of the terminated ones already reaped
+        times = os.times()
+        cpu = times.children_user + times.children_system
+        if not self._use_proc:
+            try:
+                return cpu + sum(sum(child.cpu_times()[:2]) for child in psutil.Process().children(recursive=True))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                return cpu
+        for pid in self._pids[1:]:
+            try:
+                with open('/proc/{}/stat'.format(pid)) as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+                cpu += (int(fields[11]) + int(fields[12])) / self._ticks
+            except (OSError, IndexError, ValueError):
+                pass
+        return cpu
+    def _snapshot(self):
+        return time.perf_counter(), time.process_time(), self._child_cpu()
+    def _close_segment(self):
+        # Attribute the time since the last phase change to the current phase
+        now = self._snapshot()
+        if self._segment_start is not None:
+            # Phases shorter than the sampling interval still get one sample
+            self._sample()
+            phase = self._phase(self._stack[-1] if self._stack else 'OTHER')
+            phase['wall_time'] += now[0] - self._segment_start[0]
+            phase['cpu_time'] += now[1] - self._segment_start[1]
+            phase['child_cpu_time'] += max(0.0, now[2] - self._segment_start[2])
+        self._segment_start = now
+    def _sample(self):
+        rss_mb = self._tree_rss() / (1024 * 1024)
+        phase = self._phase(self._stack[-1] if self._stack else 'OTHER')
+        phase['peak_rss_mb'] = max(phase['peak_rss_mb'], rss_mb)
+        phase['rss_sum_mb'] += rss_mb
+        phase['samples'] += 1
+    def _monitor(self):
+        while self._running:
+            with self._lock:
+                self._sample()
             time.sleep(self.interval)
     def start(self):
-        self.peak_bytes = 0
+        if self._running:
+            return
+        self.rescan()
         self._running = True
+        self._segment_start = self._snapshot()
         self._thread = threading.Thread(target=self._monitor, daemon=True)
         self._thread.start()
     def stop(self):
         self._running = False
         if self._thread:
             self._thread.join(timeout=1.0)
-        return self.get_peak_formatted()
+        with self._lock:
+            self._close_segment()
+    def enter(self, name):
+        self.start()
+        # A new phase usually starts a new solver process, only walk /proc when the direct children changed
+        if self._use_proc and self._children is not None and self._direct_children() != self._children:
+            self.rescan()
+        with self._lock:
+            self._close_segment()
+            self._stack.append(name)
+    def exit(self):
+        with self._lock:
+            self._close_segment()
+            self._stack.pop()
+    @contextmanager
+    def phase(self, name):
+        self.enter(name)
+        try:
+            yield
+        finally:
+            self.exit()
+    def collect(self):
+        """Returns a copy of the raw phase totals up to now, to be merged by another process."""
+        with self._lock:
+            self._close_segment()
+            return {name: dict(phase) for name, phase in self.phases.items()}
+    def reset(self):
+        with self._lock:
+            self._close_segment()
+            self.phases.clear()
+    def merge(self, phases, label):
+        """Adds the raw phase totals collected in another process, e.g. a year-loop worker, as '<phase> (<label>)'."""
+        with self._lock:
+            for name, other in phases.items():
+                phase = self._phase('{} ({})'.format(name, label))
+                for key in ['wall_time', 'cpu_time', 'child_cpu_time', 'rss_sum_mb', 'samples']:
+                    phase[key] += other[key]
+                phase['peak_rss_mb'] = max(phase['peak_rss_mb'], other['peak_rss_mb'])
     def get_peak_mb(self):
-        return round(self.peak_bytes / (1024 * 1024), 2)
+        return round(max([phase['peak_rss_mb'] for phase in self.phases.values()] + [0.0]), 2)
     def get_peak_formatted(self):
         mb = self.get_peak_mb()
         if mb >= 1024:
             return f"{mb / 1024:.2f} GB ({mb:.0f} MB)"
         return f"{mb:.1f} MB"
+    def report(self):
+        """Returns the per-phase results, with the cgroup peak when the run is confined to a memory cgroup."""
+        phases = {}
+        for name, phase in self.collect().items():
+            phases[name] = {key: round(value, 3) for key, value in phase.items() if key != 'rss_sum_mb'}
+            phases[name]['avg_rss_mb'] = round(phase['rss_sum_mb'] / phase['samples'], 2) if phase['samples'] else None
+        report = {'peak_rss_mb': self.get_peak_mb(), 'phases': phases}
+        for cgroup_file in ['/sys/fs/cgroup/memory.peak', '/sys/fs/cgroup/memory/memory.max_usage_in_bytes']:
+            try:
+                with open(cgroup_file) as f:
+                    report['cgroup_peak_mb'] = round(int(f.read()) / (1024 * 1024), 2)
+                break
+            except (OSError, ValueError):
+                pass
+        return report
 
+# Shared profiler of this process, started by the first phase
+profiler = PhaseProfiler()